@@ -0,0 +1,431 @@
+import asyncio
+import multiprocessing
+import time
+from AuctionSolver import baseline_state, create_instance_with_fixed_observations, integrate_observation, _regret_value, snapshot_plans, user_sub_instance
+from GreedySolver import greedy_schedule
+from MessageCodec import BinaryCodec
+
+CENTRAL = "u0"
+
+class Network():
+    """
+        Liens entre agents : une file asyncio par agent, chaque message livré après la latence du lien.
+
+        latency : délai fixe en secondes, ou fonction (émetteur, destinataire, nb d'octets) -> délai ;
+        bandwidth : débit en octets/s (délai de sérialisation nb d'octets / bandwidth ajouté), None pour l'ignorer.
+        Compte les messages et les octets envoyés, au total et par agent émetteur.
+    """
+    def __init__(self, latency=0.0, bandwidth=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.inboxes = {}
+        self.nb_messages = 0
+        self.comm_load = 0
+        self.sent = {} # agent -> [messages, octets]
+
+    def register(self, name):
+        self.inboxes[name] = asyncio.Queue()
+        self.sent[name] = [0, 0]
+
+    def delay(self, src, dst, nbytes):
+        d = self.latency(src, dst, nbytes) if callable(self.latency) else self.latency
+        if self.bandwidth:
+            d += nbytes / self.bandwidth
+        return d
+
+    def send(self, src, dst, data):
+        self.nb_messages += 1
+        self.comm_load += len(data)
+        self.sent[src][0] += 1
+        self.sent[src][1] += len(data)
+        d = self.delay(src, dst, len(data))
+        if d > 0:
+            asyncio.get_running_loop().call_later(d, self._deliver, src, dst, data)
+        else:
+            self._deliver(src, dst, data)
+
+    def _deliver(self, src, dst, data):
+        self.inboxes[dst].put_nowait((src, data))
+
+    async def receive(self, name):
+        return await self.inboxes[name].get()
+
+class ProcessNetwork(Network):
+    """
+        Network dont les exclusifs sont des processus distincts, reliés à l'agent central par un tube
+        (multiprocessing.Pipe, messages encadrés par send_bytes). Les latences simulées s'ajoutent au coût réel de
+        l'IPC, dans les deux sens ; les messages des agents sont comptés à leur réception.
+        Un agent signale qu'il est prêt (initialisé) par un message vide, hors protocole et non compté.
+        closed : future en erreur si un agent s'arrête avant la fin du protocole.
+    """
+    def __init__(self, latency=0.0, bandwidth=None):
+        super().__init__(latency, bandwidth)
+        self.links = {} # agent -> (processus, extrémité du tube côté central)
+        self.ready = {} # agent -> future résolue à la réception de son message « prêt »
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def spawn(self, name, target, args):
+        parent_end, child_end = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=target, args=(child_end, *args), name=f"agent-{name}", daemon=True)
+        process.start()
+        child_end.close()
+        self.links[name] = (process, parent_end)
+        self.sent[name] = [0, 0]
+        loop = asyncio.get_running_loop()
+        self.ready[name] = loop.create_future()
+        loop.add_reader(parent_end.fileno(), self._on_readable, name)
+
+    async def wait_ready(self):
+        """
+            Attend que tous les agents soient prêts ; RuntimeError si l'un d'eux s'arrête avant.
+        """
+        ready = asyncio.gather(*self.ready.values())
+        done, _ = await asyncio.wait([ready, self.closed], return_when=asyncio.FIRST_COMPLETED)
+        if ready not in done:
+            ready.cancel()
+            self.closed.result()
+
+    def _on_readable(self, name):
+        conn = self.links[name][1]
+        try:
+            while conn.poll():
+                data = conn.recv_bytes()
+                if data:
+                    self.send(name, CENTRAL, data)
+                elif not self.ready[name].done():
+                    self.ready[name].set_result(None)
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            if not self.closed.done():
+                self.closed.set_exception(RuntimeError(f"Agent {name} arrêté avant la fin du protocole"))
+
+    def _deliver(self, src, dst, data):
+        if dst in self.links:
+            self.links[dst][1].send_bytes(data)
+        else:
+            super()._deliver(src, dst, data)
+
+    def shutdown(self):
+        """
+            Arrête les agents (message vide) ; retourne agent -> mesures renvoyées par l'agent ({} s'il est déjà arrêté).
+        """
+        loop = asyncio.get_running_loop()
+        stats = {}
+        for name, (process, conn) in self.links.items():
+            loop.remove_reader(conn.fileno())
+            try:
+                conn.send_bytes(b"")
+                stats[name] = conn.recv()
+            except (EOFError, OSError):
+                stats[name] = {}
+            conn.close()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.links = {}
+        return stats
+
+class _PipeLink():
+    """
+        Côté agent distant : même interface que Network pour UserAgent, tout message part vers l'agent central.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def register(self, name):
+        pass
+
+    def send(self, src, dst, data):
+        self.conn.send_bytes(data)
+
+def _agent_process(conn, sub_instance, user_id, codec_class, vocabulary, alpha):
+    """
+        Boucle d'un exclusif dans son processus : il ne connaît que sa sous-instance (user_sub_instance). Une fois
+        initialisé (codec, état glouton de référence), il se déclare prêt par un message vide ; il traite ensuite les
+        messages reçus jusqu'au message vide, puis renvoie ses mesures (initialisation, temps CPU, messages traités).
+    """
+    t_init = time.perf_counter()
+    agent = UserAgent(sub_instance, user_id, _PipeLink(conn), codec_class(sub_instance, vocabulary), alpha)
+    baseline_state(sub_instance, user_id) # mis en cache dans la sous-instance, repris au début du premier tour
+    init_time = time.perf_counter() - t_init
+    conn.send_bytes(b"")
+    handled, busy, c0 = 0, 0.0, time.process_time()
+    while True:
+        data = conn.recv_bytes()
+        if not data:
+            break
+        t = time.perf_counter()
+        agent.handle(data)
+        busy += time.perf_counter() - t
+        handled += 1
+    conn.send({"init_time": init_time, "cpu_time": time.process_time() - c0, "busy_time": busy, "handled": handled})
+    conn.close()
+
+class UserAgent():
+    """
+        Exclusif : répond aux annonces par ses offres (gain marginal sur son état glouton, cf. AuctionSolver.bid),
+        intègre les observations gagnées et renvoie son plan au commissaire-priseur.
+
+        Les ordonnancements proposés restent chez l'agent : une attribution ne désigne que la requête, l'agent
+        intègre l'observation de son offre, sous la capacité partagée jointe à l'attribution (charges des autres).
+        Après une attribution, seuls les satellites dont le plan a changé sont renvoyés.
+    """
+    def __init__(self, instance, user_id, network, codec, alpha=0.1, plan_cache=None):
+        self.instance = instance
+        self.user_id = user_id
+        self.network = network
+        self.codec = codec
+        self.alpha = alpha
+        self.plan_cache = plan_cache
+        self.state = None
+        self.offers = {} # tid -> ordonnancement proposé
+        self.reported = {} # dernier plan connu du commissaire-priseur
+        network.register(user_id)
+
+    def send(self, data):
+        self.network.send(self.user_id, CENTRAL, data)
+
+    def report_plan(self, full=False):
+        plan = self.state.plan
+        changed = plan if full else {sid: plan.get(sid, []) for sid in set(plan) | set(self.reported)
+                                     if plan.get(sid, []) != self.reported.get(sid, [])}
+        self.reported = plan
+        self.send(self.codec.plan(self.user_id, changed))
+
+    async def run(self):
+        while True:
+            _, data = await self.network.receive(self.user_id)
+            self.handle(data)
+
+    def handle(self, data):
+        """
+            Traite un message reçu ; les réponses partent par self.send.
+        """
+        message = self.codec.decode(data)
+        kind = message[0]
+        if kind == "start":
+            self.state = baseline_state(self.instance, self.user_id, cache=self.plan_cache)
+            self.offers = {}
+            self.report_plan(full=True)
+        elif kind == "announce":
+            _, _, tids, regret = message
+            for tid in tids:
+                # même calcul que AuctionSolver.bid, sans l'objet requête (absent de la sous-instance d'un agent distant)
+                value, placements = self.state.marginal_gain(self.instance.obs_by_task.get(tid, []))
+                if regret is not None: # enchère par regret
+                    value = _regret_value(value, regret, self.alpha)
+                self.offers[tid] = placements[0] if placements else None
+                self.send(self.codec.bid(tid, self.user_id, value))
+        elif kind == "award":
+            _, tid, _, _, loads = message
+            schedule = self.offers.get(tid)
+            if schedule is not None:
+                check = self._capacity_check(loads) if loads is not None else None
+                integrate_observation(self.state, schedule, check, self.plan_cache)
+            self.report_plan()
+
+    def _capacity_check(self, loads):
+        """
+            Même règle que AuctionSolver.shared_capacity_check, à partir des charges des autres exclusifs.
+        """
+        sats = self.instance.sats_by_id
+        current = self.state.plan
+        def check(new_plan):
+            return all(len(obs_list) <= len(current.get(sid, [])) or loads.get(sid, 0) + len(obs_list) <= sats[sid].capacity
+                       for sid, obs_list in new_plan.items())
+        return check
+
+class Auctioneer():
+    """
+        Agent central (u0) : déroule PSI, SSI ou les enchères par regret comme protocoles de messages.
+        Les décisions sont celles de psi_solve / ssi_solve / regret_auction_solve.
+    """
+    def __init__(self, instance, network, codec, user_ids):
+        self.instance = instance
+        self.network = network
+        self.codec = codec
+        self.user_ids = list(user_ids)
+        self.user_plans = {}
+        network.register(CENTRAL)
+
+    def send(self, user_id, data):
+        self.network.send(CENTRAL, user_id, data)
+
+    async def receive(self):
+        _, data = await self.network.receive(CENTRAL)
+        return self.codec.decode(data)
+
+    async def start_round(self, round_num):
+        for uid in self.user_ids:
+            self.send(uid, self.codec.start(uid, round_num))
+        for _ in self.user_ids:
+            _, uid, plan = await self.receive()
+            self.user_plans[uid] = plan
+
+    async def collect_bids(self, tids, regrets=None):
+        """
+            Annonce tids à chaque exclusif et attend toutes les offres : {(tid, uid): valeur}.
+        """
+        for uid in self.user_ids:
+            self.send(uid, self.codec.announce(uid, tids, None if regrets is None else regrets[uid]))
+        bids = {}
+        for _ in range(len(tids) * len(self.user_ids)):
+            _, tid, uid, value = await self.receive()
+            bids[(tid, uid)] = value
+        return bids
+
+    async def award(self, tid, winner_id):
+        """
+            Attribue tid à winner_id et attend son nouveau plan ; retourne (Observation, t_start) placée ou None.
+        """
+        loads = {}
+        for uid, plan in self.user_plans.items():
+            if uid != winner_id:
+                for sid, obs_list in plan.items():
+                    loads[sid] = loads.get(sid, 0) + len(obs_list)
+        self.send(winner_id, self.codec.award(tid, winner_id, None, loads))
+        _, _, changed = await self.receive()
+        plan = {**self.user_plans[winner_id], **changed}
+        self.user_plans[winner_id] = {sid: obs_list for sid, obs_list in plan.items() if obs_list}
+        return next(((obs, t) for obs_list in changed.values() for obs, t in obs_list if obs.task_id == tid), None)
+
+    def final_plans(self, Mu0):
+        inst_u0_fixed = create_instance_with_fixed_observations(self.instance, Mu0)
+        final_u0_plan = greedy_schedule(inst_u0_fixed, fixed_plans=self.user_plans).get("u0", {})
+        return {**self.user_plans, "u0": final_u0_plan}
+
+    def winner(self, bids, tid):
+        return max(self.user_ids, key=lambda uid: bids[(tid, uid)])
+
+    async def psi(self):
+        await self.start_round(0)
+        u0_tasks = self.instance.tasks_by_owner.get("u0", [])
+        bids = await self.collect_bids([r.tid for r in u0_tasks])
+        allocations = []
+        for r in u0_tasks:
+            winner_id = self.winner(bids, r.tid)
+            if bids[(r.tid, winner_id)] > 0:
+                allocations.append((bids[(r.tid, winner_id)], r.tid, winner_id))
+        allocations.sort(key=lambda x: (-x[0], x[1]))
+        Mu0 = {}
+        for _, tid, winner_id in allocations:
+            placed = await self.award(tid, winner_id)
+            if placed is not None:
+                Mu0.setdefault(placed[0].satellite, []).append(placed)
+        return self.final_plans(Mu0)
+
+    async def ssi(self, sort_key=lambda r: r.t_end):
+        await self.start_round(0)
+        Mu0 = {}
+        for r in sorted(self.instance.tasks_by_owner.get("u0", []), key=sort_key):
+            bids = await self.collect_bids([r.tid])
+            winner_id = self.winner(bids, r.tid)
+            if bids[(r.tid, winner_id)] <= 0:
+                continue
+            placed = await self.award(r.tid, winner_id)
+            if placed is not None:
+                Mu0.setdefault(placed[0].satellite, []).append(placed)
+        return self.final_plans(Mu0)
+
+    async def regret(self, sort_key=lambda r: r.t_end, n_rounds=3):
+        history_bids = {uid: 0.0 for uid in self.user_ids}
+        u0_tasks = sorted(self.instance.tasks_by_owner.get("u0", []), key=sort_key)
+        # plans de référence (premier tour) : résultat tant qu'aucun tour ne fait mieux, même sans tour
+        await self.start_round(0)
+        best_plans, best_score = snapshot_plans(self.user_plans), 0.0
+        for round_num in range(n_rounds):
+            if round_num > 0:
+                await self.start_round(round_num)
+            Mu0 = {}
+            for r in u0_tasks:
+                bids = await self.collect_bids([r.tid], history_bids)
+                winner_id = self.winner(bids, r.tid)
+                if bids[(r.tid, winner_id)] - history_bids[winner_id] <= 0:
+                    continue
+                placed = await self.award(r.tid, winner_id)
+                if placed is None:
+                    continue
+                Mu0.setdefault(placed[0].satellite, []).append(placed)
+                for loser_id in self.user_ids: # màj regret perdants
+                    if loser_id != winner_id:
+                        history_bids[loser_id] += bids[(r.tid, loser_id)] * 0.1
+            round_plans = self.final_plans(Mu0)
+            round_score = sum(obs.reward for plan in round_plans.values() for obs_list in plan.values() for obs, _ in obs_list)
+            if round_score > best_score:
+                best_score = round_score
+                best_plans = snapshot_plans(round_plans)
+        return best_plans
+
+def _spawn_agents(network, instance, user_ids, codec, alpha):
+    """
+        Un processus par exclusif, avec sa sous-instance et les tables du codec limitées à ses requêtes et à celles de u0.
+    """
+    u0_tids = [r.tid for r in instance.tasks_by_owner.get("u0", [])]
+    for uid in user_ids:
+        sub_instance = user_sub_instance(instance, uid)
+        vocabulary = codec.vocabulary([r.tid for r in sub_instance.tasks] + u0_tids)
+        network.spawn(uid, _agent_process, (sub_instance, uid, type(codec), vocabulary, alpha))
+
+async def run_auction_async(instance, protocol="ssi", latency=0.0, bandwidth=None, codec=None, alpha=0.1, n_rounds=3, plan_cache=None,
+                            processes=False):
+    """
+        Exécute l'enchère protocol ("psi", "ssi" ou "regret") entre agents asyncio : un commissaire-priseur (u0) et
+        un agent par exclusif, reliés par un Network(latency, bandwidth).
+        processes : chaque exclusif tourne dans son propre processus, avec sa seule sous-instance (user_sub_instance),
+        et échange avec le commissaire-priseur par tube (ProcessNetwork) ; les enchères sont calculées en parallèle.
+        Retourne (plans, métriques) ; métriques : messages, octets (codec, BinaryCodec par défaut), makespan (secondes
+        entre le début et la fin du protocole, latences comprises) et messages / octets émis par agent. En mode
+        processes, s'y ajoutent le temps de lancement des agents (startup_time, jusqu'au dernier agent prêt) et,
+        par agent, son temps d'initialisation, son temps CPU et son temps de calcul (busy_time) : le reste du
+        makespan est l'attente et le coût de l'IPC.
+    """
+    if protocol not in ("psi", "ssi", "regret"):
+        raise ValueError(f"Protocole d'enchères inconnu : {protocol}")
+    codec = BinaryCodec(instance) if codec is None else codec
+    user_ids = [u.uid for u in instance.users if u.uid != "u0"]
+    loop = asyncio.get_running_loop()
+    t_spawn = loop.time()
+    if processes:
+        network = ProcessNetwork(latency, bandwidth)
+        agents = []
+    else:
+        network = Network(latency, bandwidth)
+        agents = [UserAgent(instance, uid, network, codec, alpha, plan_cache) for uid in user_ids]
+    auctioneer = Auctioneer(instance, network, codec, user_ids)
+
+    central, tasks = None, []
+    agent_stats = {}
+    try:
+        if processes:
+            _spawn_agents(network, instance, user_ids, codec, alpha)
+            await network.wait_ready()
+            tasks.append(network.closed)
+        t0 = loop.time()
+        if protocol == "psi":
+            central = asyncio.ensure_future(auctioneer.psi())
+        elif protocol == "ssi":
+            central = asyncio.ensure_future(auctioneer.ssi())
+        else:
+            central = asyncio.ensure_future(auctioneer.regret(n_rounds=n_rounds))
+        tasks += [asyncio.ensure_future(agent.run()) for agent in agents]
+        done, _ = await asyncio.wait([central, *tasks], return_when=asyncio.FIRST_COMPLETED)
+        plans = central.result() if central in done else next(iter(done)).result() # erreur d'un agent : propagée
+        makespan = loop.time() - t0
+    finally:
+        pending = [task for task in (central, *tasks) if task is not None]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if processes:
+            agent_stats = network.shutdown()
+    metrics = {"nb_messages": network.nb_messages, "comm_load": network.comm_load, "makespan": makespan,
+               "per_agent": {name: {"messages": m, "bytes": b, **agent_stats.get(name, {})} for name, (m, b) in network.sent.items()}}
+    if processes:
+        metrics["startup_time"] = t0 - t_spawn
+    return plans, metrics
+
+def run_auction(instance, protocol="ssi", **kwargs):
+    """
+        Version synchrone de run_auction_async (nouvelle boucle d'événements).
+    """
+    return asyncio.run(run_auction_async(instance, protocol, **kwargs))
@@ -0,0 +1,232 @@
+import re
+import time
+from heapq import heappush, heappop
+
+HARD_COST = 1e9
+
+_UNARY = re.compile(r"^\s*(-?\d+(?:\.\d+)?(?:e[+-]?\d+)?)\s*\*\s*(\w+)\s*$")
+_SUM_LE = re.compile(r"^\s*0 if (.+?) <= (\d+) else 1e9\s*$")
+
+class AllocationModel():
+    """
+        Modèle des DCOP ESOP : variables binaires avec coût unaire, contraintes "somme <= k" (au plus une par
+        observation / requête, capacité par (utilisateur, satellite)).
+
+        Tant que chaque variable apparaît dans au plus deux contraintes de somme et que ces contraintes se répartissent
+        en deux côtés (chaque variable relie un côté gauche à un côté droit), le problème est un b-matching biparti de
+        poids maximal, résolu exactement par flot de coût minimum.
+    """
+    def __init__(self):
+        self.costs = {}    # variable -> coût unaire (contribution si la variable vaut 1)
+        self.limits = {}   # contrainte -> (variables, k)
+
+    def add_variable(self, name, cost=0):
+        self.costs[name] = self.costs.get(name, 0) + cost
+
+    def add_sum_le(self, name, var_names, k):
+        self.limits[name] = (tuple(var_names), k)
+
+    @classmethod
+    def from_dcop_dict(cls, dcop_dict):
+        """
+            Reconnaît la structure dans un DCOP au format dict pydcop (cf. generate_DCOP_instance, build_sdcop_for_request).
+            Lève ValueError si une contrainte n'a pas l'une des deux formes attendues.
+        """
+        if dcop_dict.get("objective", "min") != "min":
+            raise ValueError("Seul l'objectif min est supporté")
+        model = cls()
+        for v, d in (dcop_dict.get("variables") or {}).items():
+            if list(dcop_dict["domains"][d["domain"]]["values"]) != [0, 1]:
+                raise ValueError(f"Variable {v} non binaire")
+            model.add_variable(v)
+        for name, c in (dcop_dict.get("constraints") or {}).items():
+            function = str(c.get("function", ""))
+            m = _UNARY.match(function)
+            if m and m.group(2) in model.costs:
+                model.add_variable(m.group(2), float(m.group(1)))
+                continue
+            m = _SUM_LE.match(function)
+            if m:
+                var_names = [v.strip() for v in m.group(1).split("+")]
+                if all(v in model.costs for v in var_names):
+                    model.add_sum_le(name, var_names, int(m.group(2)))
+                    continue
+            raise ValueError(f"Contrainte {name} hors du modèle supporté : {function}")
+        return model
+
+    @classmethod
+    def from_dcop_model(cls, dcop_model):
+        """
+            Même chose à partir d'un DcopModel, sans passer par les expressions : coefficients lus directement.
+        """
+        if dcop_model.objective != "min":
+            raise ValueError("Seul l'objectif min est supporté")
+        model = cls()
+        for v, (domain, _) in dcop_model.variables.items():
+            if list(dcop_model.domains[domain]) != [0, 1]:
+                raise ValueError(f"Variable {v} non binaire")
+            model.add_variable(v)
+        for c in dcop_model.unary:
+            model.add_variable(c.var, c.coef)
+        for c in dcop_model.linear:
+            if not c.is_cardinality():
+                raise ValueError(f"Contrainte {c.name} hors du modèle supporté (coefficients non unitaires)")
+            model.add_sum_le(c.name, c.vars, c.bound)
+        return model
+
+    def _sides(self):
+        """
+            Répartit les contraintes de somme en deux côtés (2-coloration des contraintes partageant une variable).
+            Retourne var -> (gauche, droite) où chaque côté est un nom de contrainte ou None.
+        """
+        by_var = {v: [] for v in self.costs}
+        for name, (var_names, _) in self.limits.items():
+            for v in var_names:
+                by_var[v].append(name)
+        if any(len(cs) > 2 for cs in by_var.values()):
+            raise ValueError("Une variable apparaît dans plus de deux contraintes de somme")
+
+        side = {}
+        for start in self.limits:
+            if start in side:
+                continue
+            side[start] = 0
+            stack = [start]
+            while stack:
+                c = stack.pop()
+                for v in self.limits[c][0]:
+                    for other in by_var[v]:
+                        if other == c:
+                            continue
+                        if other not in side:
+                            side[other] = 1 - side[c]
+                            stack.append(other)
+                        elif side[other] == side[c]:
+                            raise ValueError("Contraintes de somme non bipartites")
+
+        ends = {}
+        for v, cs in by_var.items():
+            left = next((c for c in cs if side[c] == 0), None)
+            right = next((c for c in cs if side[c] == 1), None)
+            ends[v] = (left, right)
+        return ends
+
+    def solve(self):
+        """
+            Affectation optimale (minimise la somme des coûts unaires sous les contraintes de somme).
+
+            Flot de coût minimum : source -> contraintes gauches (capacité k) -> variables (coût unaire)
+            -> contraintes droites (capacité k) -> puits ; plus courts chemins successifs (Dijkstra avec potentiels),
+            arrêtés dès que le chemin améliorant n'a plus un coût strictement négatif.
+        """
+        ends = self._sides()
+        # noeuds : 0 = source, 1 = puits, puis une extrémité par contrainte (ou par variable sans contrainte d'un côté)
+        node = {}
+        def node_of(key):
+            if key not in node:
+                node[key] = len(node) + 2
+            return node[key]
+
+        graph = [[], []] # listes d'adjacence : [to, capacité résiduelle, coût, indice de l'arc inverse]
+        def add_edge(a, b, cap, cost):
+            while len(graph) <= max(a, b):
+                graph.append([])
+            graph[a].append([b, cap, cost, len(graph[b])])
+            graph[b].append([a, 0, -cost, len(graph[a]) - 1])
+            return graph[a][-1]
+
+        var_edges = {}
+        for v in sorted(self.costs):
+            cost = self.costs[v]
+            if cost >= 0:
+                continue # ne peut pas améliorer l'objectif : reste à 0
+            left, right = ends[v]
+            a = node_of(("L", left) if left is not None else ("Lv", v))
+            b = node_of(("R", right) if right is not None else ("Rv", v))
+            var_edges[v] = add_edge(a, b, 1, cost)
+        for key, n in list(node.items()):
+            kind, ref = key
+            cap = self.limits[ref][1] if kind in ("L", "R") else 1
+            if kind[0] == "L":
+                add_edge(0, n, cap, 0)
+            else:
+                add_edge(n, 1, cap, 0)
+
+        n_nodes = len(graph)
+        # potentiels initiaux : le graphe de départ est un DAG source -> L -> R -> puits
+        pot = [0] * n_nodes
+        for e in var_edges.values():
+            pot[e[0]] = min(pot[e[0]], e[2])
+        pot[1] = min(pot)
+
+        while True:
+            dist = [None] * n_nodes
+            prev = [None] * n_nodes
+            dist[0] = 0
+            heap = [(0, 0)]
+            while heap:
+                d, u = heappop(heap)
+                if d > dist[u]:
+                    continue
+                for i, (b, cap, cost, _) in enumerate(graph[u]):
+                    if cap <= 0:
+                        continue
+                    nd = d + cost + pot[u] - pot[b]
+                    if dist[b] is None or nd < dist[b] - 1e-9:
+                        dist[b] = nd
+                        prev[b] = (u, i)
+                        heappush(heap, (nd, b))
+            if dist[1] is None:
+                break
+            real = dist[1] - pot[0] + pot[1]
+            if real >= -1e-9:
+                break
+            for u in range(n_nodes):
+                if dist[u] is not None: # un noeud inatteignable le reste (les arcs inverses relient des noeuds atteints)
+                    pot[u] += dist[u]
+            # augmentation d'une unité le long du chemin
+            b = 1
+            while b != 0:
+                u, i = prev[b]
+                e = graph[u][i]
+                e[1] -= 1
+                graph[b][e[3]][1] += 1
+                b = u
+
+        assignment = {v: 0 for v in self.costs}
+        for v, e in var_edges.items():
+            if e[1] == 0:
+                assignment[v] = 1
+        return assignment
+
+    def cost(self, assignment):
+        total = sum(c for v, c in self.costs.items() if assignment[v])
+        violation = sum(1 for var_names, k in self.limits.values() if sum(assignment[v] for v in var_names) > k)
+        return total + violation * HARD_COST, violation
+
+def _result(model, t0):
+    assignment = model.solve()
+    cost, violation = model.cost(assignment)
+    return {"status": "FINISHED",
+            "assignment": assignment,
+            "cost": cost,
+            "violation": violation,
+            "cycle": 0,
+            "time": time.perf_counter() - t0,
+            "msg_count": 0,
+            "msg_size": 0}
+
+def solve_dcop_dict_native(dcop_dict):
+    """
+        Résout exactement un DCOP ESOP au format dict, sans YAML ni pydcop ; même format de sortie que DpopSolver
+        (aucun message n'est échangé : msg_count = msg_size = 0).
+    """
+    t0 = time.perf_counter()
+    return _result(AllocationModel.from_dcop_dict(dcop_dict), t0)
+
+def solve_dcop_model_native(dcop_model):
+    """
+        Même chose à partir d'un DcopModel.
+    """
+    t0 = time.perf_counter()
+    return _result(AllocationModel.from_dcop_model(dcop_model), t0)
@@ -1,7 +1,9 @@
-from copy import deepcopy
-import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from ESOPInstance import ESOPInstance
-from GreedySolver import greedy_schedule, greedy_schedule_P_u
+from GreedySolver import greedy_schedule, UserGreedyState
+from LRUCache import LRUCache
+from MessageCodec import BinaryCodec
+import Instrumentation
 
 
 def plan_reward(plan, user_id):
@@ -29,103 +31,239 @@ def get_schedule(plan, task_id):
 
 def create_instance_with_fixed_observations(instance, fixed_obs):
     """
-        Crée une nouvelle instance où certaines observations sont fixées (notamment pour plan u0)
+        Crée une vue de l'instance où certaines observations sont fixées (notamment pour plan u0) :
+        leurs tâches sont retirées, le reste est partagé avec l'instance (cf. ESOPInstance.without_tasks)
     """
-    new_inst = deepcopy(instance)
     fixed_tasks = set()
     for sat_plans in fixed_obs.values():
         for obs, _ in sat_plans:
             fixed_tasks.add(obs.task_id)
+    return instance.without_tasks(fixed_tasks)
 
-    new_inst.tasks = [t for t in new_inst.tasks if t.tid not in fixed_tasks]
-    new_inst.nb_tasks = len(new_inst.tasks)
-    new_inst.observations = [o for o in new_inst.observations if o.task_id not in fixed_tasks]
-    return new_inst
+def snapshot_plans(plans):
+    """
+        Copie des plans (uid -> sid -> liste (Observation, t_start)) sans copier les observations.
+    """
+    return {uid: {sid: list(obs_list) for sid, obs_list in plan.items()} for uid, plan in plans.items()}
+
+def _baseline_key(instance, user_id, accepted_obs):
+    return (instance, instance.version, user_id, frozenset(o.oid for o in accepted_obs))
+
+def baseline_state(instance, user_id, accepted_obs=(), cache=None):
+    """
+        État glouton de référence M_u de user_id avec les obs de u0 déjà acceptées, mémoïsé dans cache
+        (par défaut instance.baseline_cache, partagé par PSI, SSI et regret et libéré avec l'instance).
+        Retourne une copie : l'appelant peut la faire évoluer sans altérer le cache.
+    """
+    cache = instance.baseline_cache if cache is None else cache
+    key = _baseline_key(instance, user_id, accepted_obs)
+    state = cache.get(key)
+    if state is None:
+        Instrumentation.count("auction.baseline_misses")
+        state = UserGreedyState(instance, user_id, accepted_obs)
+        cache.put(key, state)
+    else:
+        Instrumentation.count("auction.baseline_hits")
+    return state.copy()
+
+def remember_state(state, cache=None):
+    """
+        Enregistre l'état d'un utilisateur après intégration d'une obs gagnée (nouvel ensemble d'obs acceptées).
+    """
+    cache = state.instance.baseline_cache if cache is None else cache
+    cache.put(_baseline_key(state.instance, state.user_id, state.accepted_obs), state.copy())
 
-def bid(u_id, instance, request):
+def bid(u_id, instance, request, state=None):
     """
-        Calcule l'enchère d'un utilisateur u_id pour une requête donnée.
+        Calcule l'enchère d'un utilisateur u_id pour une requête donnée : gain marginal LOCAL de u s'il prend en charge
+        une opportunité de la requête dans son plan glouton courant (state, plan de référence en cache si absent).
+        Seul le suffixe de l'ordre glouton à partir du rang de r est rejoué (cf. UserGreedyState).
     """
-    u = next((user for user in instance.users if user.uid == u_id), None)
+    u = instance.users_by_id.get(u_id)
     if u is None:
         return 0.0, None
-    
-    # UNIQUEMENT tâches/obs de u
-    tasks_u = [t for t in instance.tasks if t.owner == u_id]
-    obs_u = [o for o in instance.observations if o.owner == u_id]
-    inst_u = ESOPInstance(nb_satellites=instance.nb_satellites, nb_users=1, nb_tasks=len(tasks_u),
-                        horizon=instance.horizon, satellites=instance.satellites, users=[u],
-                        tasks=tasks_u, observations=obs_u)
-    Mu = greedy_schedule_P_u(inst_u, u_id)
-    old_reward = plan_reward({"temp": Mu}, u_id)
-    
-    # tâches/obs de u + r
-    tasks_u_r = tasks_u + [request]
-    obs_u_r = obs_u + [o for o in instance.observations if o.task_id == request.tid]
-    inst_u_r = ESOPInstance(nb_satellites=instance.nb_satellites, nb_users=1, nb_tasks=len(tasks_u_r),
-                            horizon=instance.horizon, satellites=instance.satellites, users=[u],
-                            tasks=tasks_u_r, observations=obs_u_r)
-    new_plan = greedy_schedule_P_u(inst_u_r, u_id)
-    new_reward = plan_reward({"temp": new_plan}, u_id)
-    
-    bid_value = new_reward - old_reward # Gain marginal LOCAL
-    schedule_r = get_schedule({"temp": new_plan}, request.tid)
+    if state is None:
+        state = baseline_state(instance, u_id)
+
+    bid_value, placements = state.marginal_gain(instance.obs_by_task.get(request.tid, []))
+    schedule_r = placements[0] if placements else None
     return bid_value, schedule_r
 
-def integrate_observation(current_plan, new_obs_schedule, instance):
+def shared_capacity_check(instance, user_plans, user_id):
     """
-        Opérateur (+) (cercle) : refait greedy sur instance mise à jour
+        Les exclusifs partagent la capacité des satellites : le nouveau plan de user_id ne doit pas la dépasser
+        compte tenu des plans des autres exclusifs.
     """
-    obs, t_start = new_obs_schedule
-    u_id = obs.owner
-    u = next((user for user in instance.users if user.uid == u_id), None)
-    if u is None:
-        return current_plan
+    def check(new_plan):
+        for sid, obs_list in new_plan.items():
+            if len(obs_list) <= len(user_plans[user_id].get(sid, [])):
+                continue
+            load = sum(len(plan.get(sid, [])) for uid, plan in user_plans.items() if uid != user_id)
+            if load + len(obs_list) > instance.sats_by_id[sid].capacity:
+                return False
+        return True
+    return check
 
-    tasks_u = [t for t in instance.tasks if t.owner == u_id]
-    obs_u = [o for o in instance.observations if o.owner == u_id and o.task_id != obs.task_id]
+def integrate_observation(state, new_obs_schedule, check=None, plan_cache=None):
+    """
+        Opérateur (+) (cercle) : intègre l'observation gagnée dans l'état glouton du gagnant et retourne son nouveau plan
+        (inchangé si l'observation ne peut pas être intégrée)
+    """
+    obs, t_start = new_obs_schedule
+    if state.insert([obs], check):
+        remember_state(state, plan_cache)
+    return state.plan
 
-    inst_u = ESOPInstance(nb_satellites=instance.nb_satellites, nb_users=1, nb_tasks=len(tasks_u),
-                        horizon=instance.horizon, satellites=instance.satellites, users=[u],
-                        tasks=tasks_u, observations=obs_u)
+############ Collecte des enchères (série / threads / processus)
+def user_sub_instance(instance, user_id):
+    """
+        Sous-instance compacte de user_id : ses tâches et observations, et les seules observations de u0
+        qu'il peut prendre en charge (incluses dans une de ses exclusives). Suffit pour calculer ses enchères.
+    """
+    u = instance.users_by_id[user_id]
+    windows = instance.exclusive_index
+    u0_obs = [o for o in instance.obs_by_owner.get("u0", []) if windows.contains(user_id, o.satellite, o.t_start, o.t_end)]
+    tasks_u = instance.tasks_by_owner.get(user_id, [])
+    return ESOPInstance(nb_satellites=instance.nb_satellites, nb_users=1, nb_tasks=len(tasks_u), horizon=instance.horizon,
+                        satellites=instance.satellites, users=[u], tasks=tasks_u,
+                        observations=instance.obs_by_owner.get(user_id, []) + u0_obs)
+
+# état d'un worker du pool de processus : sous-instances reçues à l'initialisation et états gloutons déjà construits
+_worker_instances = {}
+_worker_states = LRUCache(maxsize=256)
+
+def _init_bid_worker(sub_instances):
+    _worker_instances.clear()
+    _worker_instances.update(sub_instances)
+    _worker_states.clear()
+
+def _worker_bids(user_id, accepted_oids, request_ids):
+    """
+        Enchères de user_id pour request_ids, calculées dans un worker sur sa sous-instance.
+        Les observations sont renvoyées par oid (les objets du worker sont des copies).
+    """
+    inst_u = _worker_instances[user_id]
+    key = (user_id, accepted_oids)
+    state = _worker_states.get(key)
+    if state is None:
+        state = UserGreedyState(inst_u, user_id, [inst_u.obs_by_id[oid] for oid in sorted(accepted_oids)])
+        _worker_states.put(key, state)
+
+    bids = []
+    for tid in request_ids:
+        b_val, placements = state.marginal_gain(inst_u.obs_by_task.get(tid, []))
+        sigma = (placements[0][0].oid, placements[0][1]) if placements else None
+        bids.append((b_val, sigma))
+    return bids
+
+class BidCollector():
+    """
+        Calcule les enchères (requête, utilisateur) d'un tour d'enchères, en série ou réparties sur un pool
+        concurrent.futures (executor = "serial", "thread" ou "process").
 
-    return greedy_schedule_P_u(inst_u, u_id)
+        Les enchères d'un utilisateur ne dépendent que de son état glouton : chaque tâche du pool porte les enchères
+        d'un utilisateur pour toutes les requêtes du tour. En mode "process", chaque worker reçoit une fois pour toutes
+        les sous-instances compactes des exclusifs (user_sub_instance) et seul l'ensemble des obs acceptées transite
+        ensuite. Les enchères sont identiques au calcul en série.
+    """
+    def __init__(self, instance, user_ids, executor="serial", max_workers=None):
+        if executor not in ("serial", "thread", "process"):
+            raise ValueError(f"executor inconnu : {executor}")
+        self.instance = instance
+        self.user_ids = list(user_ids)
+        self.executor = executor
+        self._pool = None
+        if executor == "thread":
+            instance.users_by_id # index construits avant le partage entre threads
+            self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        elif executor == "process":
+            sub_instances = {uid: user_sub_instance(instance, uid) for uid in self.user_ids}
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_bid_worker, initargs=(sub_instances,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def collect(self, requests, states):
+        """
+            Retourne {(tid, uid): (bid_value, schedule)} pour toutes les requêtes et tous les utilisateurs.
+        """
+        requests = list(requests)
+        Instrumentation.count("auction.bids", len(requests) * len(self.user_ids))
+        with Instrumentation.span("auction.collect", executor=self.executor, requests=len(requests)):
+            return self._collect(requests, states)
+
+    def _collect(self, requests, states):
+        if self.executor == "serial":
+            return {(r.tid, uid): bid(uid, self.instance, r, states[uid]) for r in requests for uid in self.user_ids}
+
+        if self.executor == "thread":
+            futures = {uid: self._pool.submit(self._user_bids, uid, requests, states[uid]) for uid in self.user_ids}
+            return {(r.tid, uid): b for uid, fut in futures.items() for r, b in zip(requests, fut.result())}
+
+        request_ids = [r.tid for r in requests]
+        futures = {uid: self._pool.submit(_worker_bids, uid, frozenset(o.oid for o in states[uid].accepted_obs), request_ids)
+                   for uid in self.user_ids}
+        obs_by_id = self.instance.obs_by_id
+        bids = {}
+        for uid, fut in futures.items():
+            for tid, (b_val, sigma) in zip(request_ids, fut.result()):
+                bids[(tid, uid)] = (b_val, None if sigma is None else (obs_by_id[sigma[0]], sigma[1]))
+        return bids
+
+    def _user_bids(self, uid, requests, state):
+        return [bid(uid, self.instance, r, state) for r in requests]
 
 ############ PSI
-def psi_solve(instance):
+@Instrumentation.traced("psi_solve")
+def psi_solve(instance, plan_cache=None, executor="serial", max_workers=None, codec=None):
     """
         Algorithme PSI de l'article
         retourne (plans, nb_messages, comm_load)
+
+        executor : "serial", "thread" ou "process" pour le calcul des enchères (cf. BidCollector)
+        codec : format des messages (cf. MessageCodec, BinaryCodec par défaut) ; comm_load = octets sérialisés
     """
+    codec = BinaryCodec(instance) if codec is None else codec
     nb_messages = 0
     comm_load = 0
 
     Mu0 = {}
     exclusive_users = [u for u in instance.users if u.uid != "u0"]
 
-    # Résolution locale initiale pour chaque user
-    initial_plans = {u.uid: greedy_schedule_P_u(instance, u.uid) for u in exclusive_users}
+    # Résolution locale initiale pour chaque user (état glouton persistant)
+    states = {u.uid: baseline_state(instance, u.uid, cache=plan_cache) for u in exclusive_users}
 
     # Requêtes du central (items)
-    u0_tasks = [t for t in instance.tasks if t.owner == "u0"]
+    u0_tasks = instance.tasks_by_owner.get("u0", [])
 
     # Annonce globale des items à tous les exclusifs
     # 1 message par user contenant la liste complète des items (hyp. choisie)
     for u in exclusive_users:
         nb_messages += 1
-        comm_load += sys.getsizeof((u.uid, u0_tasks))
+        comm_load += len(codec.announce(u.uid, [r.tid for r in u0_tasks]))
 
     allocations = []
 
-    # Bidding en parallèle sur chaque requête
+    # Bidding en parallèle sur chaque requête : toutes les enchères sont indépendantes
+    with BidCollector(instance, [u.uid for u in exclusive_users], executor, max_workers) as collector:
+        all_bids = collector.collect(u0_tasks, states)
+
     for r in u0_tasks:
         bids_r = {}
         for u in exclusive_users:
-            b_val, sigma = bid(u.uid, instance, r)
+            b_val, sigma = all_bids[(r.tid, u.uid)]
             bids_r[u.uid] = (b_val, sigma)
             # 1 message bid (valeur + éventuellement schedule)
             nb_messages += 1
-            comm_load += sys.getsizeof((r.tid, u.uid, b_val))
+            comm_load += len(codec.bid(r.tid, u.uid, b_val))
 
         if not bids_r:
             continue
@@ -138,25 +276,37 @@ def psi_solve(instance):
 
     # determination globale du winner
     allocations.sort(key=lambda x: (-x[0], x[1]))
+    user_plans = {uid: state.plan for uid, state in states.items()}
     for _, task_id, winner_id, sigma_w in allocations:
-        obs, t = sigma_w
-        sid = obs.satellite
-        Mu0.setdefault(sid, []).append(sigma_w)
         # notif. au gagnant
         nb_messages += 1
-        comm_load += sys.getsizeof((task_id, winner_id, sigma_w))
+        comm_load += len(codec.award(task_id, winner_id, sigma_w))
+
+        # les enchères portaient sur le plan initial : le gagnant n'accepte que ce qui s'intègre encore à son plan
+        obs, _ = sigma_w
+        check = shared_capacity_check(instance, user_plans, winner_id)
+        user_plans[winner_id] = integrate_observation(states[winner_id], sigma_w, check, plan_cache)
+        t = states[winner_id].start_time(obs)
+        if t is None:
+            continue
+        Mu0.setdefault(obs.satellite, []).append((obs, t))
 
-    # Plan de u0 avec les obs fixées
+    # Plan de u0 avec les obs fixées, autour des plans des exclusifs
     inst_u0_fixed = create_instance_with_fixed_observations(instance, Mu0)
-    final_u0_plan = greedy_schedule(inst_u0_fixed).get("u0", {})
+    final_u0_plan = greedy_schedule(inst_u0_fixed, fixed_plans=user_plans).get("u0", {})
 
-    return {**initial_plans, "u0": final_u0_plan}, nb_messages, comm_load
+    return {**user_plans, "u0": final_u0_plan}, nb_messages, comm_load
 
 ##### SSI
-def ssi_solve(instance, sort_key=lambda r: r.t_end):
+@Instrumentation.traced("ssi_solve")
+def ssi_solve(instance, sort_key=lambda r: r.t_end, plan_cache=None, executor="serial", max_workers=None, codec=None):
     """
         Algorithme SSI.
+
+        executor : "serial", "thread" ou "process" pour le calcul des enchères d'une requête (cf. BidCollector)
+        codec : format des messages (cf. psi_solve)
     """
+    codec = BinaryCodec(instance) if codec is None else codec
     nb_messages = 0
     comm_load = 0
 
@@ -164,125 +314,148 @@ def ssi_solve(instance, sort_key=lambda r: r.t_end):
     exclusive_users = [u for u in instance.users if u.uid != "u0"]
 
     # Plans locaux initiaux
-    user_plans = {u.uid: greedy_schedule_P_u(instance, u.uid) for u in exclusive_users}
+    states = {u.uid: baseline_state(instance, u.uid, cache=plan_cache) for u in exclusive_users}
+    user_plans = {uid: state.plan for uid, state in states.items()}
 
     # Requêtes de u0 triées
-    u0_tasks = sorted([t for t in instance.tasks if t.owner == "u0"], key=sort_key)
+    u0_tasks = sorted(instance.tasks_by_owner.get("u0", []), key=sort_key)
 
     # Boucle séquentielle sur les requêtes
-    for r in u0_tasks:
-        for u in exclusive_users: # annonce de la requête r à chaque user
-            nb_messages += 1
-            comm_load += sys.getsizeof((u.uid, r.tid))
+    with BidCollector(instance, [u.uid for u in exclusive_users], executor, max_workers) as collector:
+        for r in u0_tasks:
+            for u in exclusive_users: # annonce de la requête r à chaque user
+                nb_messages += 1
+                comm_load += len(codec.announce(u.uid, [r.tid]))
 
-        bids_r = {}
-        for u in exclusive_users:
-            b_val, sigma = bid(u.uid, instance, r)
-            bids_r[u.uid] = (b_val, sigma)
-            nb_messages += 1
-            comm_load += sys.getsizeof((r.tid, u.uid, b_val))
+            all_bids = collector.collect([r], states)
+            bids_r = {}
+            for u in exclusive_users:
+                b_val, sigma = all_bids[(r.tid, u.uid)]
+                bids_r[u.uid] = (b_val, sigma)
+                nb_messages += 1
+                comm_load += len(codec.bid(r.tid, u.uid, b_val))
 
-        if not bids_r:
-            continue
+            if not bids_r:
+                continue
 
-        winner_id = max(bids_r, key=lambda uid: bids_r[uid][0])
-        winner_bid, sigma_w = bids_r[winner_id]
+            winner_id = max(bids_r, key=lambda uid: bids_r[uid][0])
+            winner_bid, sigma_w = bids_r[winner_id]
 
-        if sigma_w is None or winner_bid <= 0:
-            continue
+            if sigma_w is None or winner_bid <= 0:
+                continue
 
-        obs, t = sigma_w
-        sid = obs.satellite
-        Mu0.setdefault(sid, []).append(sigma_w)
+            # màj du plan gagnant (refusée si la capacité partagée du satellite serait dépassée)
+            obs, t = sigma_w
+            check = shared_capacity_check(instance, user_plans, winner_id)
+            user_plans[winner_id] = integrate_observation(states[winner_id], sigma_w, check, plan_cache)
+            if states[winner_id].start_time(obs) is None:
+                continue
 
-        # màj du plan gagnant
-        user_plans[winner_id] = integrate_observation(user_plans[winner_id], sigma_w, instance)
+            sid = obs.satellite
+            Mu0.setdefault(sid, []).append(sigma_w)
 
-        # notif winner
-        nb_messages += 1
-        comm_load += sys.getsizeof((r.tid, winner_id, sigma_w))
+            # notif winner
+            nb_messages += 1
+            comm_load += len(codec.award(r.tid, winner_id, sigma_w))
 
     # et plan final de u0
     inst_u0_fixed = create_instance_with_fixed_observations(instance, Mu0)
-    final_u0_plan = greedy_schedule(inst_u0_fixed).get("u0", {})
+    final_u0_plan = greedy_schedule(inst_u0_fixed, fixed_plans=user_plans).get("u0", {})
 
     return {**user_plans, "u0": final_u0_plan}, nb_messages, comm_load
 
 ######## REGRET AUCTION (extension SSI)
-def regret_bid(u_id, instance, request, all_user_plans, history_bids, alpha = 0.1):
+def _regret_value(classic_bid, past_regret, alpha = 0.1):
+    # formule de l'enchère par regret, partagée par regret_bid, regret_auction_solve et AgentRuntime
+    return classic_bid + alpha * past_regret
+
+def regret_bid(u_id, instance, request, all_user_plans, history_bids, alpha = 0.1, state=None):
     """
         Enchère par regret : bid = gain_marginal + alpha * regret_passé
     """
-    classic_bid, schedule = bid(u_id, instance, request)
-    past_regret = history_bids.get(u_id, 0.0)
-    regret_bonus = alpha * past_regret
-    final_bid = classic_bid + regret_bonus
-    return final_bid, schedule
+    classic_bid, schedule = bid(u_id, instance, request, state)
+    return _regret_value(classic_bid, history_bids.get(u_id, 0.0), alpha), schedule
 
-def regret_auction_solve(instance, sort_key=lambda r: r.t_end, alpha = 0.1, n_rounds = 3):
+@Instrumentation.traced("regret_auction_solve")
+def regret_auction_solve(instance, sort_key=lambda r: r.t_end, alpha = 0.1, n_rounds = 3, plan_cache=None, executor="serial", max_workers=None,
+                         codec=None):
     """
         Regret Auction : extension multi-rounds d'SSI
+
+        executor : "serial", "thread" ou "process" pour le calcul des enchères d'une requête (cf. BidCollector)
+        codec : format des messages (cf. psi_solve)
     """
+    codec = BinaryCodec(instance) if codec is None else codec
     nb_messages = 0 # toujours sous hyp. choisies car manque d'infos dans l'article.
     comm_load = 0
 
     exclusive_users = [u for u in instance.users if u.uid != "u0"]
     history_bids = {u.uid: 0.0 for u in exclusive_users} # historique des regrets
 
-    # Plans initiaux
-    user_plans = {u.uid: greedy_schedule_P_u(instance, u.uid) for u in exclusive_users}
-    best_plans = deepcopy(user_plans)
+    # plans initiaux (états de référence, repris par le premier round) tant qu'aucun round ne fait mieux
+    initial_states = {u.uid: baseline_state(instance, u.uid, cache=plan_cache) for u in exclusive_users}
+    best_plans = snapshot_plans({uid: state.plan for uid, state in initial_states.items()})
     best_score = 0.0
 
-    u0_tasks = sorted([t for t in instance.tasks if t.owner == "u0"], key=sort_key)
-
-    for round_num in range(n_rounds):
-        Mu0 = {}
-
-        for r in u0_tasks:
-            # Annonce r + info regret aux users
-            for u in exclusive_users:
+    u0_tasks = sorted(instance.tasks_by_owner.get("u0", []), key=sort_key)
+
+    with BidCollector(instance, [u.uid for u in exclusive_users], executor, max_workers) as collector:
+        for round_num in range(n_rounds):
+            Mu0 = {}
+            # chaque round repart des plans locaux initiaux, seuls les regrets sont conservés
+            states = initial_states if round_num == 0 else {u.uid: baseline_state(instance, u.uid, cache=plan_cache)
+                                                            for u in exclusive_users}
+            user_plans = {uid: state.plan for uid, state in states.items()}
+
+            for r in u0_tasks:
+                # Annonce r + info regret aux users
+                for u in exclusive_users:
+                    nb_messages += 1
+                    comm_load += len(codec.announce(u.uid, [r.tid], history_bids[u.uid]))
+
+                all_bids = collector.collect([r], states)
+                bids_r = {}
+                for u in exclusive_users:
+                    classic_bid, schedule = all_bids[(r.tid, u.uid)]
+                    bid_val = _regret_value(classic_bid, history_bids.get(u.uid, 0.0), alpha) # cf. regret_bid
+                    bids_r[u.uid] = (bid_val, schedule)
+                    nb_messages += 1
+                    comm_load += len(codec.bid(r.tid, u.uid, bid_val))
+
+                if not bids_r:
+                    continue
+
+                winner_id = max(bids_r, key=lambda uid: bids_r[uid][0])
+                winner_bid, sigma_w = bids_r[winner_id]
+
+                marginal_bid = winner_bid - history_bids.get(winner_id, 0.0)
+                if sigma_w is None or marginal_bid <= 0:
+                    continue
+
+                obs, t = sigma_w
+                check = shared_capacity_check(instance, user_plans, winner_id)
+                user_plans[winner_id] = integrate_observation(states[winner_id], sigma_w, check, plan_cache)
+                if states[winner_id].start_time(obs) is None:
+                    continue
+
+                sid = obs.satellite
+                Mu0.setdefault(sid, []).append(sigma_w)
+
+                # notification gagnant
                 nb_messages += 1
-                comm_load += sys.getsizeof((u.uid, r.tid, history_bids[u.uid]))
-
-            bids_r = {}
-            for u in exclusive_users:
-                bid_val, schedule = regret_bid(u.uid, instance, r, user_plans, history_bids, alpha)
-                bids_r[u.uid] = (bid_val, schedule)
-                nb_messages += 1
-                comm_load += sys.getsizeof((r.tid, u.uid, bid_val))
-
-            if not bids_r:
-                continue
-
-            winner_id = max(bids_r, key=lambda uid: bids_r[uid][0])
-            winner_bid, sigma_w = bids_r[winner_id]
-
-            marginal_bid = winner_bid - history_bids.get(winner_id, 0.0)
-            if sigma_w is None or marginal_bid <= 0:
-                continue
-
-            obs, t = sigma_w
-            sid = obs.satellite
-            Mu0.setdefault(sid, []).append(sigma_w)
-
-            user_plans[winner_id] = integrate_observation(user_plans[winner_id], sigma_w, instance)
-
-            # notification gagnant
-            nb_messages += 1
-            comm_load += sys.getsizeof((r.tid, winner_id, sigma_w))
+                comm_load += len(codec.award(r.tid, winner_id, sigma_w))
 
-            for loser_id, (loser_bid, _) in bids_r.items(): # màj regret perdants
-                if loser_id != winner_id:
-                    history_bids[loser_id] += loser_bid * 0.1
+                for loser_id, (loser_bid, _) in bids_r.items(): # màj regret perdants
+                    if loser_id != winner_id:
+                        history_bids[loser_id] += loser_bid * 0.1
 
-        inst_u0_fixed = create_instance_with_fixed_observations(instance, Mu0)
-        final_u0_plan = greedy_schedule(inst_u0_fixed).get("u0", {})
-        round_plans = {**user_plans, "u0": final_u0_plan}
-        round_score = sum(sum(sum(obs.reward for obs, _ in (obslist or [])) for obslist in sat_plans.values()) for sat_plans in round_plans.values())
+            inst_u0_fixed = create_instance_with_fixed_observations(instance, Mu0)
+            final_u0_plan = greedy_schedule(inst_u0_fixed, fixed_plans=user_plans).get("u0", {})
+            round_plans = {**user_plans, "u0": final_u0_plan}
+            round_score = sum(sum(sum(obs.reward for obs, _ in (obslist or [])) for obslist in sat_plans.values()) for sat_plans in round_plans.values())
 
-        if round_score > best_score:
-            best_score = round_score
-            best_plans = deepcopy(round_plans)
+            if round_score > best_score:
+                best_score = round_score
+                best_plans = snapshot_plans(round_plans)
 
     return best_plans, nb_messages, comm_load
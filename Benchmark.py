@@ -0,0 +1,201 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import time
+import tracemalloc
+import Instrumentation
+from ESOPInstance import assess_solution, estRealisable
+from InstanceGenerator import GENERATOR_VERSION, iter_benchmark_instances
+from LRUCache import LRUCache
+
+def _greedy(instance, options):
+    from GreedySolver import greedy_schedule
+    return greedy_schedule(instance), None, None
+
+def _psi(instance, options):
+    from AuctionSolver import psi_solve
+    return psi_solve(instance, plan_cache=LRUCache())
+
+def _ssi(instance, options):
+    from AuctionSolver import ssi_solve
+    return ssi_solve(instance, plan_cache=LRUCache())
+
+def _regret(instance, options):
+    from AuctionSolver import regret_auction_solve
+    return regret_auction_solve(instance, plan_cache=LRUCache())
+
+def _runtime(protocol, processes=False):
+    def solve(instance, options):
+        from AgentRuntime import run_auction
+        plans, metrics = run_auction(instance, protocol, latency=options["latency"], processes=processes, plan_cache=LRUCache())
+        extra = {"makespan": metrics["makespan"]}
+        if processes:
+            extra.update(startup_time=metrics["startup_time"],
+                         agent_busy_time=sum(a.get("busy_time", 0.0) for a in metrics["per_agent"].values()))
+        return plans, metrics["nb_messages"], metrics["comm_load"], extra
+    return solve
+
+def _dcop(instance, options):
+    from DCOP import solve_dcop
+    metrics = {}
+    plans = solve_dcop(instance, print_output=False, backend=options["dcop_backend"], metrics=metrics)
+    return plans, metrics.get("msg_count"), metrics.get("msg_size")
+
+def _sdcop(instance, options):
+    from SDcop import sdcop_with_pydcop
+    plans, _, _, msgs, load = sdcop_with_pydcop(instance, timeout_per_dcop=options["timeout"], backend=options["dcop_backend"])
+    return plans, msgs, load
+
+# Les enchères reçoivent un cache d'états de référence neuf à chaque appel : chaque mesure (temps, puis pic mémoire)
+# part d'un cache vide, sans profiter des états laissés par un autre solveur ou une autre exécution.
+# solveur -> fonction (instance, options) retournant (plans, nb_messages, comm_load[, mesures supplémentaires]) ;
+# None si non mesuré. Les variantes *_agents jouent l'enchère entre agents asyncio (cf. AgentRuntime), les variantes
+# *_processes avec un processus par exclusif.
+SOLVERS = {"greedy": _greedy, "psi": _psi, "ssi": _ssi, "regret": _regret, "dcop": _dcop, "sdcop": _sdcop,
+           "psi_agents": _runtime("psi"), "ssi_agents": _runtime("ssi"), "regret_agents": _runtime("regret"),
+           "psi_processes": _runtime("psi", True), "ssi_processes": _runtime("ssi", True), "regret_processes": _runtime("regret", True)}
+
+def _cpu_time():
+    """
+        Temps CPU du processus et de ses sous-processus terminés (pydcop en backend subprocess).
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+def run_solver(name, instance, options, measure_memory=True, trace_path=None):
+    """
+        Exécute un solveur sur une instance et retourne ses mesures : temps réel et CPU, pic mémoire, score
+        (assess_solution), réalisabilité (estRealisable, None pour un plan sans dates), messages et charge de communication,
+        et les mesures propres au solveur (makespan des enchères entre agents).
+
+        Le pic mémoire (tracemalloc, allocations Python du processus) est mesuré par une seconde exécution, pour ne
+        pas compter le surcoût du traçage dans les temps. La sortie des solveurs est masquée.
+        trace_path : fichier Chrome trace de l'exécution chronométrée (spans et compteurs, cf. Instrumentation).
+    """
+    record = {"solver": name, "status": "ok", "wall_time": None, "cpu_time": None, "peak_memory": None,
+              "score": None, "feasible": None, "msgs": None, "load": None}
+    solve = SOLVERS[name]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with Instrumentation.tracing(trace_path) if trace_path is not None else contextlib.nullcontext():
+                t0, c0 = time.perf_counter(), _cpu_time()
+                plans, msgs, load, *extra = solve(instance, options)
+                record["wall_time"], record["cpu_time"] = time.perf_counter() - t0, _cpu_time() - c0
+            if measure_memory:
+                tracemalloc.start()
+                try:
+                    solve(instance, options)
+                    record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+        return record
+    if plans is None:
+        record["status"] = "failed"
+        return record
+    # solve_dcop ne donne qu'une allocation (dates None) : réalisabilité non vérifiable
+    scheduled = all(t is not None for plan in plans.values() for obs_list in plan.values() for _, t in obs_list)
+    record.update(score=sum(assess_solution(instance, plans).values()),
+                  feasible=estRealisable(instance, plans, verbose=False) if scheduled else None, msgs=msgs, load=load)
+    if extra:
+        record.update(extra[0])
+    return record
+
+def run_benchmark(scenarios=("small_scale", "large_scale"), solvers=tuple(SOLVERS), num_instances=30, output="benchmark_results.jsonl",
+                  root_seed=0, cache_dir=None, dcop_backend="native", timeout=60, measure_memory=True, trace_dir=None,
+                  latency=0.0):
+    """
+        Balaye les grilles de benchmark (cf. generate_benchmark_instances) et exécute chaque solveur sur chaque instance.
+        Une ligne JSON par (scénario, taille, instance, solveur) est ajoutée à output au fil de l'eau ; la première
+        ligne d'une exécution décrit sa configuration (graine racine, version du générateur, backend DCOP, Python).
+        dcop_backend : backend de solve_dcop et sdcop_with_pydcop ("native" par défaut : pas de pydcop requis).
+        latency : latence des liens (secondes) des enchères entre agents.
+        trace_dir : répertoire où écrire un fichier Chrome trace par exécution (scenario_taille_instance_solveur.trace.json).
+        Retourne la liste des mesures.
+    """
+    unknown = [s for s in solvers if s not in SOLVERS]
+    if unknown:
+        raise ValueError(f"Solveurs inconnus : {', '.join(unknown)}")
+    options = {"dcop_backend": dcop_backend, "timeout": timeout, "latency": latency}
+    records = []
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok=True)
+    with open(output, "a") as f:
+        f.write(json.dumps({"run": {"scenarios": list(scenarios), "solvers": list(solvers), "num_instances": num_instances,
+                                    "root_seed": root_seed, "generator_version": GENERATOR_VERSION, "dcop_backend": dcop_backend,
+                                    "timeout": timeout, "latency": latency, "python": platform.python_version(), "cpus": os.cpu_count()}}) + "\n")
+        for scenario in scenarios:
+            for nb_tasks, seed, instance in iter_benchmark_instances(scenario, num_instances, cache_dir=cache_dir, root_seed=root_seed):
+                for name in solvers:
+                    trace_path = None
+                    if trace_dir is not None:
+                        trace_path = os.path.join(trace_dir, f"{scenario}_{nb_tasks}_{seed}_{name}.trace.json")
+                    record = {"scenario": scenario, "nb_tasks": nb_tasks, "seed": seed, "nb_observations": len(instance.observations),
+                              **run_solver(name, instance, options, measure_memory, trace_path)}
+                    f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    records.append(record)
+    return records
+
+def summarize(records):
+    """
+        Moyennes par (scénario, taille, solveur) sur les exécutions réussies, affichées et retournées.
+    """
+    groups = {}
+    for r in records:
+        groups.setdefault((r["scenario"], r["nb_tasks"], r["solver"]), []).append(r)
+    def mean(rs, field):
+        values = [r[field] for r in rs if r[field] is not None]
+        return sum(values) / len(values) if values else None
+
+    summary = {}
+    for key, rs in groups.items():
+        ok = [r for r in rs if r["status"] == "ok"]
+        summary[key] = {"runs": len(rs), "ok": len(ok), "feasible": sum(1 for r in ok if r["feasible"]),
+                        "checked": sum(1 for r in ok if r["feasible"] is not None),
+                        **{field: mean(ok, field) for field in ("wall_time", "cpu_time", "score", "peak_memory", "msgs", "load")},
+                        "makespan": mean([r for r in ok if "makespan" in r], "makespan")}
+        s = summary[key]
+        if ok:
+            comm = f", msgs {s['msgs']:.0f}, charge {s['load']:.0f}" if s["msgs"] is not None else ""
+            memory = f", {s['peak_memory'] / 2**20:.1f} Mo" if s["peak_memory"] is not None else ""
+            if s["makespan"] is not None:
+                comm += f", makespan {s['makespan']:.3f}s"
+            feasible = f"{s['feasible']}/{s['checked']} réalisables" if s["checked"] else "réalisabilité non vérifiée"
+            print(f"{key[0]} {key[1]} tâches [{key[2]}] : {s['ok']}/{s['runs']} résolues, {feasible}, "
+                  f"score {s['score']:.1f}, {s['wall_time']:.3f}s ({s['cpu_time']:.3f}s CPU){memory}{comm}")
+        else:
+            print(f"{key[0]} {key[1]} tâches [{key[2]}] : aucune exécution réussie")
+    return summary
+
+def load_results(path):
+    """
+        Relit un fichier de résultats : mesures seules (les lignes de configuration sont ignorées).
+    """
+    with open(path) as f:
+        return [r for r in map(json.loads, f) if "run" not in r]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark des solveurs ESOP sur les grilles de l'article")
+    parser.add_argument("--scenarios", nargs="+", default=["small_scale", "large_scale"], choices=["small_scale", "large_scale"])
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument("--instances", type=int, default=30)
+    parser.add_argument("--output", default="benchmark_results.jsonl")
+    parser.add_argument("--root-seed", type=int, default=0)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--dcop-backend", default="native", choices=["subprocess", "inprocess", "native"])
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--no-memory", action="store_true", help="ne pas mesurer le pic mémoire (une exécution par solveur)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latence des liens (s) des enchères entre agents")
+    parser.add_argument("--trace-dir", default=None, help="un fichier Chrome trace par exécution dans ce répertoire")
+    args = parser.parse_args()
+
+    records = run_benchmark(args.scenarios, args.solvers, args.instances, args.output, args.root_seed, args.cache_dir,
+                            args.dcop_backend, args.timeout, not args.no_memory, args.trace_dir, args.latency)
+    summarize(records)
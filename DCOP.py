@@ -1,33 +1,101 @@
 import subprocess
+import asyncio
 import re
-from InstanceGenerator import generate_DCOP_instance
+from InstanceGenerator import generate_DCOP_instance, build_DCOP_model
+from AllocationSolver import solve_dcop_model_native
 import time
 import json
 from GreedySolver import greedy_schedule_P_u as greedy_schedule_for_user
 from ESOPInstance import Observation, Task, ESOPInstance, User
 import yaml
+import Instrumentation
 
 def save_dcop_instance(dcop):
     with open("esop_dcop.yaml", "w") as f:
         f.write(dcop)
 
-def run_pydcop_solve(yaml_path, algo = "dpop", timeout = 60):
+def run_pydcop_solve(yaml_path, algo = "dpop", timeout = 60, backend = "subprocess", distribution = None):
     """
         Lance le subprocess 'pydcop solve --algo {algo} {yaml_path}' avec timeout.
+        backend="inprocess" : résolution en mémoire par le DPOP intégré (DpopSolver), sans démarrer pydcop ;
+        backend="native" : solveur exact par flot (AllocationSolver) propre à la structure des DCOP ESOP.
+        La sortie a le même format JSON.
+        distribution : fichier de répartition des calculs passé à pydcop (--distribution), cf. DcopModel.write_distribution.
+
+        Instrumentation (cf. Instrumentation) : spans pydcop.spawn (création du sous-processus) et pydcop.run (attente
+        de la sortie), compteur pydcop.startup_time = durée de pydcop.run moins le temps de résolution rapporté par pydcop.
     """
-    cmd = ["pydcop", "solve", "--algo", algo, yaml_path]
+    if backend == "inprocess":
+        from DpopSolver import solve_dcop_yaml
+        with Instrumentation.span("dcop.inprocess", algo=algo):
+            result = solve_dcop_yaml(yaml_path, algo=algo, timeout=timeout)
+        if result is None:
+            print(f"Timeout DPOP > {timeout}s")
+            return None
+        return json.dumps(result)
+    if backend == "native":
+        from AllocationSolver import solve_dcop_dict_native
+        with open(yaml_path) as f, Instrumentation.span("dcop.native"):
+            return json.dumps(solve_dcop_dict_native(yaml.safe_load(f)))
+    if backend != "subprocess":
+        raise ValueError(f"Backend DCOP inconnu : {backend}")
+
+    cmd = ["pydcop", "solve", "--algo", algo]
+    if distribution is not None:
+        cmd += ["--distribution", distribution]
+    cmd.append(yaml_path)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
-        return result.stdout
+        with Instrumentation.span("pydcop.spawn", algo=algo):
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except FileNotFoundError:
+        print("Erreur file not found error.")
+        return None
+    try:
+        t0 = time.perf_counter()
+        with Instrumentation.span("pydcop.run", algo=algo):
+            stdout, _ = proc.communicate(timeout=timeout)
     except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
         print(f"Timeout PyDCOP > {timeout}s")
         return None
-    except subprocess.CalledProcessError as e:
-        print(f"Erreur PyDCOP : {e}")
+    if proc.returncode != 0:
+        print(f"Erreur PyDCOP : {subprocess.CalledProcessError(proc.returncode, cmd)}")
         return None
+    if Instrumentation.recorder is not None:
+        Instrumentation.count("pydcop.startup_time", time.perf_counter() - t0 - extract_time_from_output(stdout))
+    return stdout
+
+async def run_pydcop_solve_async(yaml_path, algo = "dpop", timeout = 60, distribution = None):
+    """
+        Même chose que run_pydcop_solve (backend "subprocess") avec un sous-processus asyncio : la boucle d'événements
+        reste libre pendant la résolution (cf. pipeline de sdcop_with_pydcop).
+    """
+    cmd = ["pydcop", "solve", "--algo", algo]
+    if distribution is not None:
+        cmd += ["--distribution", distribution]
+    cmd.append(yaml_path)
+    try:
+        with Instrumentation.span("pydcop.spawn", algo=algo):
+            proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
     except FileNotFoundError:
         print("Erreur file not found error.")
         return None
+    try:
+        t0 = time.perf_counter()
+        with Instrumentation.span("pydcop.run", algo=algo):
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        print(f"Timeout PyDCOP > {timeout}s")
+        return None
+    if proc.returncode != 0:
+        print(f"Erreur PyDCOP : {cmd} a retourné {proc.returncode}")
+        return None
+    if Instrumentation.recorder is not None:
+        Instrumentation.count("pydcop.startup_time", time.perf_counter() - t0 - extract_time_from_output(stdout.decode()))
+    return stdout.decode()
 
 def extract_time_from_output(output):
     if output is None or output.strip() == "":
@@ -96,7 +164,7 @@ def print_assignment_summary(instance, assignment):
     print("---------------")
     print("Résultats DCOP")
     
-    obs_by_id = {o.oid: o for o in instance.observations}
+    obs_by_id = instance.obs_by_id
     
     # Grouper par utilisateur exclusif
     user_allocations = {}
@@ -174,9 +242,8 @@ def assignment_to_user_plans(instance, assignment):
         except ValueError: # problème parsing ici sinon...
             continue
 
-        try:
-            obs = next(o for o in instance.observations if o.oid == o_id)
-        except StopIteration:
+        obs = instance.obs_by_id.get(o_id)
+        if obs is None:
             continue
 
         user_plans.setdefault(u_id, {}).setdefault(obs.satellite, []).append((obs, None))
@@ -213,9 +280,13 @@ def validate_dcop_functions(dcop_yaml):
     print("Toutes les fonctions sont valides")
     return True
 
-def solve_dcop(inst, print_output=True):
+@Instrumentation.traced("solve_dcop")
+def solve_dcop(inst, print_output=True, backend="subprocess", metrics=None):
     """
         Résout l'instance ESOP en la transformant en instance DCOP puis en utilisant l'algorithme DPOP avec PyDcop.
+        backend : "subprocess" (pydcop en ligne de commande), "inprocess" (DPOP intégré) ou "native" (flot),
+        cf. run_pydcop_solve.
+        metrics : dict optionnel, complété avec msg_count et msg_size de la résolution.
     """
     print("\n=== Résolution DCOP avec DPOP ===\n")
     
@@ -223,28 +294,34 @@ def solve_dcop(inst, print_output=True):
     
     if print_output:
         print("> Génération du DCOP...")
-    dcop_yaml = generate_DCOP_instance(inst)
+    with Instrumentation.span("dcop.build"):
+        model = build_DCOP_model(inst)
     
-    validate_dcop_functions(dcop_yaml)
-    save_dcop_instance(dcop_yaml)
-
-    if print_output:
-        print(f"> DCOP sauvegardé dans {yaml_path}\n")
+    dist_path = "esop_dcop.dist.yaml"
+    if backend != "native": # le solveur natif lit directement le modèle
+        model.write_yaml(yaml_path)
+        model.write_distribution(dist_path)
+        if print_output:
+            print(f"> DCOP sauvegardé dans {yaml_path}\n")
     
-    lines = dcop_yaml.split('\n')
-    nb_vars = sum(1 for line in lines if line.strip().startswith('x_'))
-    nb_constraints = sum(1 for line in lines if line.strip().startswith('c_'))
+    stats = model.stats()
     if print_output:
         print(f"> Informations du DCOP:")
-    print(f"  - Nombre de variables: {nb_vars}")
-    print(f"  - Nombre de contraintes: {nb_constraints}\n")
+    print(f"  - Nombre de variables: {stats['variables']}")
+    print(f"  - Nombre de contraintes: {stats['constraints']}\n")
 
     if print_output:
         print("Lancement de DPOP...")
     time_start = time.time()
-    output = run_pydcop_solve(yaml_path, algo="dpop")
+    with Instrumentation.span("dcop.solve", backend=backend):
+        if backend == "native":
+            output = json.dumps(solve_dcop_model_native(model))
+        else:
+            output = run_pydcop_solve(yaml_path, algo="dpop", backend=backend, distribution=dist_path)
     time_end = time.time()
     print(f"Temps de résolution DPOP : {time_end - time_start:.4f} secondes\n")
+    if metrics is not None:
+        metrics["msg_count"], metrics["msg_size"] = extract_metrics_from_output(output)
     
     if output is None:
         print("\n!!! Échec de la résolution DCOP.")
@@ -279,9 +356,10 @@ def build_restricted_plan_for_user(instance, user_id, extra_obs, accepted_u0_obs
             - + extra_obs si non None.
         retourne le plan par satellite.
     """
-    user = next(u for u in instance.users if u.uid == user_id)
+    user = instance.users_by_id[user_id]
     sats = instance.satellites
 
+    accepted_u0_obs = set(accepted_u0_obs)
     base_obs = [o for o in instance.observations if (o.owner == user_id) or (o in accepted_u0_obs)]
     if extra_obs is not None:
         base_obs = base_obs + [extra_obs]
@@ -491,12 +569,13 @@ def solve_request_with_dcop_exact(instance, request, current_plans, exclusive_us
 
     best_cost = None
     best_choice = (None, None)
+    windows = instance.exclusive_index
     for obs in observations_r:
         for u in exclusive_users:
             u_id = u.uid
 
             # Vérifier qu'il existe au moins une fenêtre exclusive compatible
-            can_take = any(w.satellite == obs.satellite and not (w.t_end <= obs.t_start or w.t_start >= obs.t_end) for w in u.exclusive_windows)
+            can_take = windows.overlaps(u_id, obs.satellite, obs.t_start, obs.t_end)
             if not can_take:
                 continue
 
@@ -0,0 +1,198 @@
+import io
+import json
+
+# algorithmes pydcop dont le graphe de calcul est un factor graph (les contraintes sont aussi des calculs)
+FACTOR_GRAPH_ALGOS = {"maxsum", "amaxsum"}
+
+class UnaryConstraint():
+    """
+        Coût coef * x sur une variable binaire.
+    """
+    __slots__ = ("name", "var", "coef")
+
+    def __init__(self, name, var, coef):
+        self.name = name
+        self.var = var
+        self.coef = coef
+
+    def expression(self):
+        return f"{self.coef} * {self.var}"
+
+class LinearConstraint():
+    """
+        Contrainte dure sum(coefs[i] * vars[i]) <= bound (coût 1e9 si violée).
+    """
+    __slots__ = ("name", "vars", "coefs", "bound")
+
+    def __init__(self, name, vars, bound, coefs=None):
+        self.name = name
+        self.vars = list(vars)
+        self.coefs = list(coefs) if coefs is not None else [1] * len(self.vars)
+        self.bound = bound
+
+    def is_cardinality(self):
+        return all(c == 1 for c in self.coefs)
+
+    def _terms(self):
+        if self.is_cardinality():
+            return self.vars
+        return (f"{c} * {v}" for c, v in zip(self.coefs, self.vars))
+
+    def expression(self):
+        return f"0 if {' + '.join(self._terms())} <= {self.bound} else 1e9"
+
+    def write_expression(self, f):
+        """
+            Écrit l'expression terme par terme (pas de chaîne intermédiaire pour les grandes contraintes).
+        """
+        f.write("0 if ")
+        for i, term in enumerate(self._terms()):
+            if i:
+                f.write(" + ")
+            f.write(term)
+        f.write(f" <= {self.bound} else 1e9")
+
+class DcopModel():
+    """
+        Modèle DCOP typé : variables (domaine, agent), contraintes unaires et linéaires sous forme de coefficients.
+
+        Sert d'intermédiaire entre les générateurs (generate_DCOP_instance, S-DCOP) et les backends : YAML pydcop écrit
+        en flux (write_yaml), dict pydcop (to_dict, DpopSolver), modèle d'allocation (AllocationSolver).
+    """
+    def __init__(self, name, objective="min", domains=None):
+        self.name = name
+        self.objective = objective
+        self.domains = domains if domains is not None else {"binary": [0, 1]}
+        self.agents = {}       # agent -> capacité (None si non déclarée)
+        self.variables = {}    # variable -> (domaine, agent ou None)
+        self.unary = []
+        self.linear = []
+
+    @classmethod
+    def merge(cls, name, models):
+        """
+            Réunion de DCOP indépendants (noms de variables et de contraintes disjoints) en un seul modèle.
+        """
+        merged = cls(name, models[0].objective, dict(models[0].domains))
+        for m in models:
+            for a, cap in m.agents.items():
+                old = merged.agents.get(a)
+                merged.agents[a] = cap if old is None else max(old, cap)
+            merged.domains.update(m.domains)
+            merged.variables.update(m.variables)
+            merged.unary.extend(m.unary)
+            merged.linear.extend(m.linear)
+        return merged
+
+    def add_agent(self, agent, capacity=None):
+        self.agents[agent] = capacity
+
+    def add_variable(self, name, domain="binary", agent=None):
+        self.variables[name] = (domain, agent)
+
+    def add_unary(self, name, var, coef):
+        self.unary.append(UnaryConstraint(name, var, coef))
+
+    def add_linear(self, name, vars, bound, coefs=None):
+        self.linear.append(LinearConstraint(name, vars, bound, coefs))
+
+    def constraints(self):
+        return self.linear + self.unary
+
+    @property
+    def nb_variables(self):
+        return len(self.variables)
+
+    @property
+    def nb_constraints(self):
+        return len(self.unary) + len(self.linear)
+
+    def stats(self):
+        return {"variables": self.nb_variables, "constraints": self.nb_constraints,
+                "unary": len(self.unary), "linear": len(self.linear), "agents": len(self.agents),
+                "max_arity": max((len(c.vars) for c in self.linear), default=1 if self.unary else 0)}
+
+    def to_dict(self):
+        """
+            DCOP au format dict pydcop (ce que yaml.dump sérialisait auparavant).
+        """
+        if any(c is not None for c in self.agents.values()):
+            agents = {a: {"capacity": c} for a, c in self.agents.items()}
+        else:
+            agents = list(self.agents)
+        variables = {}
+        for v, (domain, agent) in self.variables.items():
+            variables[v] = {"domain": domain} if agent is None else {"domain": domain, "agent": agent}
+        return {"name": self.name,
+                "objective": self.objective,
+                "domains": {d: {"values": list(values)} for d, values in self.domains.items()},
+                "agents": agents,
+                "variables": variables,
+                "constraints": {c.name: {"type": "intention", "function": c.expression()} for c in self.constraints()}}
+
+    def write_yaml(self, f):
+        """
+            Écrit le DCOP au format YAML pydcop dans le fichier f (objet fichier ou chemin), ligne par ligne.
+        """
+        if isinstance(f, str):
+            with open(f, "w") as fh:
+                return self.write_yaml(fh)
+        w = f.write
+        w(f"name: {self.name}\nobjective: {self.objective}\ndomains:\n")
+        for d, values in self.domains.items():
+            w(f"  {d}:\n    values:\n")
+            for x in values:
+                w(f"    - {x}\n")
+        if any(c is not None for c in self.agents.values()):
+            w("agents:\n")
+            for a, cap in self.agents.items():
+                w(f"  {a}:\n    capacity: {cap}\n")
+        else:
+            w("agents:\n" if self.agents else "agents: []\n")
+            for a in self.agents:
+                w(f"- {a}\n")
+        w("variables:\n" if self.variables else "variables: {}\n")
+        for v, (domain, agent) in self.variables.items():
+            w(f"  {v}:\n    domain: {domain}\n")
+            if agent is not None:
+                w(f"    agent: {agent}\n")
+        w("constraints:\n" if self.nb_constraints else "constraints: {}\n")
+        for c in self.linear:
+            w(f"  {c.name}:\n    type: intention\n    function: ")
+            c.write_expression(f)
+            w("\n")
+        for c in self.unary:
+            w(f"  {c.name}:\n    type: intention\n    function: {json.dumps(c.expression())}\n")
+
+    def distribution(self, algo="dpop"):
+        """
+            Répartition des calculs : chaque variable est hébergée par son agent (l'utilisateur exclusif concerné) ;
+            pour les factor graphs, chaque contrainte l'est par l'agent de sa première variable.
+            Retourne agent -> liste des calculs.
+        """
+        dist = {a: [] for a in self.agents}
+        for v, (_, agent) in self.variables.items():
+            dist.setdefault(agent, []).append(v)
+        if algo in FACTOR_GRAPH_ALGOS:
+            for c in self.constraints():
+                var = c.var if isinstance(c, UnaryConstraint) else c.vars[0]
+                dist.setdefault(self.variables[var][1], []).append(c.name)
+        if None in dist:
+            raise ValueError("Variables sans agent : répartition impossible")
+        return {a: comps for a, comps in dist.items() if comps}
+
+    def write_distribution(self, f, algo="dpop"):
+        """
+            Écrit la répartition au format fichier de distribution pydcop (option --distribution).
+        """
+        if isinstance(f, str):
+            with open(f, "w") as fh:
+                return self.write_distribution(fh, algo)
+        f.write("distribution:\n")
+        for agent, comps in self.distribution(algo).items():
+            f.write(f"  {agent}: [{', '.join(comps)}]\n")
+
+    def to_yaml(self):
+        buf = io.StringIO()
+        self.write_yaml(buf)
+        return buf.getvalue()
@@ -0,0 +1,172 @@
+import re
+import time
+from itertools import product
+import yaml
+
+HARD_COST = 1e9 # coût des contraintes dures dans les YAML générés ("0 if ... else 1e9")
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+class Constraint():
+    """
+        Contrainte en intention d'un DCOP pydcop : fonction Python de ses variables (scope).
+    """
+    __slots__ = ("name", "scope", "_code")
+
+    def __init__(self, name, function, var_names):
+        self.name = name
+        source = str(function)
+        self.scope = tuple(dict.fromkeys(v for v in _IDENT.findall(source) if v in var_names))
+        if "return" in source:
+            # forme pydcop multi-lignes : corps d'une fonction
+            body = "\n".join("    " + line for line in source.splitlines())
+            env = {}
+            exec(f"def _f({', '.join(self.scope)}):\n{body}\n", {}, env)
+            f = env["_f"]
+            self._code = lambda values: f(*(values[v] for v in self.scope))
+        else:
+            code = compile(source, f"<{name}>", "eval")
+            self._code = lambda values: eval(code, {"__builtins__": {}}, values)
+
+    def cost(self, values):
+        return self._code(values)
+
+class DpopSolver():
+    """
+        DPOP exact en mémoire pour les DCOP au format dict pydcop (domains / variables / constraints en intention).
+
+        Même algorithme que `pydcop solve --algo dpop` : pseudo-arbre DFS sur le graphe des contraintes, propagation
+        UTIL des feuilles vers la racine puis VALUE de la racine vers les feuilles. Sans sous-processus ni relecture du
+        YAML : le coût d'un appel est celui de la résolution.
+    """
+    def __init__(self, dcop_dict):
+        self.objective = dcop_dict.get("objective", "min")
+        domains = {name: list(d["values"]) for name, d in (dcop_dict.get("domains") or {}).items()}
+        self.domains = {v: domains[d["domain"]] for v, d in (dcop_dict.get("variables") or {}).items()}
+        var_names = set(self.domains)
+        self.constraints = [Constraint(name, c["function"], var_names) for name, c in (dcop_dict.get("constraints") or {}).items()]
+
+    def _pseudo_tree(self):
+        """
+            Pseudo-arbre DFS (itératif) : parent, enfants et ordre de visite ; une racine par composante connexe,
+            en partant des variables de plus haut degré.
+        """
+        neighbors = {v: set() for v in self.domains}
+        for c in self.constraints:
+            for v in c.scope:
+                neighbors[v].update(c.scope)
+        for v in neighbors:
+            neighbors[v].discard(v)
+
+        parent, children, order = {}, {v: [] for v in self.domains}, []
+        for root in sorted(self.domains, key=lambda v: (-len(neighbors[v]), v)):
+            if root in parent:
+                continue
+            parent[root] = None
+            order.append(root)
+            stack = [(root, iter(sorted(neighbors[root], key=lambda v: (-len(neighbors[v]), v))))]
+            while stack:
+                node, it = stack[-1]
+                nxt = next((v for v in it if v not in parent), None)
+                if nxt is None:
+                    stack.pop()
+                    continue
+                parent[nxt] = node
+                children[node].append(nxt)
+                order.append(nxt)
+                stack.append((nxt, iter(sorted(neighbors[nxt], key=lambda v: (-len(neighbors[v]), v)))))
+        return parent, children, order
+
+    def solve(self, timeout=None):
+        """
+            Retourne un dict au format de la sortie JSON de pydcop solve
+            (status, assignment, cost, violation, cycle, time, msg_count, msg_size) ; None en cas de timeout.
+
+            msg_count / msg_size comptent les messages UTIL et VALUE que s'échangeraient les variables
+            (taille d'un message = nombre d'entrées de la table ou de l'affectation transmise).
+        """
+        t0 = time.perf_counter()
+        sign = 1 if self.objective == "min" else -1
+        parent, children, order = self._pseudo_tree()
+        depth = {v: i for i, v in enumerate(order)}
+
+        # chaque contrainte est portée par la variable la plus profonde de son scope
+        placed = {v: [] for v in self.domains}
+        constant = 0
+        for c in self.constraints:
+            if c.scope:
+                placed[max(c.scope, key=depth.__getitem__)].append(c)
+            else:
+                constant += c.cost({})
+
+        # UTIL : post-ordre
+        util = {}   # v -> (séparateur, table) envoyée au parent
+        best = {}   # v -> (séparateur, meilleure valeur de v par combinaison du séparateur)
+        msg_count, msg_size = 0, 0
+        for v in reversed(order):
+            if timeout is not None and time.perf_counter() - t0 > timeout:
+                return None
+            sep = set()
+            for c in placed[v]:
+                sep.update(c.scope)
+            for ch in children[v]:
+                sep.update(util[ch][0])
+            sep.discard(v)
+            sep = tuple(sorted(sep, key=depth.__getitem__))
+
+            table, argbest = {}, {}
+            values = {}
+            for k, combo in enumerate(product(*(self.domains[s] for s in sep))):
+                if timeout is not None and not k & 1023 and time.perf_counter() - t0 > timeout:
+                    return None
+                values.update(zip(sep, combo))
+                best_cost, best_val = None, None
+                for x in self.domains[v]:
+                    values[v] = x
+                    cost = sum(sign * c.cost(values) for c in placed[v])
+                    for ch in children[v]:
+                        ch_sep, ch_table = util[ch]
+                        cost += ch_table[tuple(values[s] for s in ch_sep)]
+                    if best_cost is None or cost < best_cost:
+                        best_cost, best_val = cost, x
+                table[combo] = best_cost
+                argbest[combo] = best_val
+            util[v] = (sep, table)
+            best[v] = (sep, argbest)
+            if parent[v] is not None:
+                msg_count += 1
+                msg_size += len(table)
+
+        # VALUE : pré-ordre
+        assignment = {}
+        for v in order:
+            sep, argbest = best[v]
+            assignment[v] = argbest[tuple(assignment[s] for s in sep)]
+            if parent[v] is not None:
+                msg_count += 1
+                msg_size += len(sep) + 1
+
+        costs = [c.cost(assignment) for c in self.constraints if c.scope]
+        return {"status": "FINISHED",
+                "assignment": assignment,
+                "cost": constant + sum(costs),
+                "violation": sum(1 for x in costs if x >= HARD_COST),
+                "cycle": len(order),
+                "time": time.perf_counter() - t0,
+                "msg_count": msg_count,
+                "msg_size": msg_size}
+
+def solve_dcop_dict(dcop_dict, algo="dpop", timeout=None):
+    """
+        Résout en mémoire un DCOP au format dict (tel que produit avant yaml.dump).
+    """
+    if algo != "dpop":
+        raise ValueError(f"Backend en mémoire : algorithme {algo} non disponible (seul dpop est implémenté)")
+    return DpopSolver(dcop_dict).solve(timeout=timeout)
+
+def solve_dcop_yaml(yaml_path, algo="dpop", timeout=None):
+    """
+        Même chose à partir d'un fichier YAML pydcop.
+    """
+    with open(yaml_path) as f:
+        return solve_dcop_dict(yaml.safe_load(f), algo=algo, timeout=timeout)
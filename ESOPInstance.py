@@ -1,4 +1,6 @@
 class Satellite():
+    __slots__ = ("sid", "t_start", "t_end", "capacity", "transition_time")
+
     def __init__(self, sid, t_start, t_end, capacity, transition_time=None):
         self.sid = sid
         self.t_start = t_start
@@ -7,17 +9,23 @@ class Satellite():
         self.transition_time = transition_time if transition_time is not None else 1 # article : tau constant
 
 class ExclusiveWindow():
+    __slots__ = ("satellite", "t_start", "t_end")
+
     def __init__(self, satellite, t_start, t_end):
         self.satellite = satellite
         self.t_start = t_start
         self.t_end = t_end
 
 class User():
+    __slots__ = ("uid", "exclusive_windows")
+
     def __init__(self, uid, exclusive_windows):
         self.uid = uid
         self.exclusive_windows = exclusive_windows
 
 class Observation():
+    __slots__ = ("oid", "task_id", "satellite", "t_start", "t_end", "duration", "reward", "owner")
+
     def __init__(self, oid, task_id, satellite, t_start, t_end, duration, reward, owner):
         self.oid = oid
         self.task_id = task_id
@@ -29,6 +37,8 @@ class Observation():
         self.owner = owner # uid
 
 class Task():
+    __slots__ = ("tid", "owner", "t_start", "t_end", "duration", "reward", "opportunities")
+
     def __init__(self, tid, owner, t_start, t_end, duration, reward, opportunities):
         self.tid = tid
         self.owner = owner
@@ -38,7 +48,28 @@ class Task():
         self.reward = reward
         self.opportunities = opportunities
 
+class _IndexedField():
+    """
+        Attribut d'ESOPInstance dont la réaffectation invalide les index de recherche.
+    """
+    def __set_name__(self, owner, name):
+        self.name = "_" + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.name)
+
+    def __set__(self, instance, value):
+        setattr(instance, self.name, value)
+        instance.invalidate_indexes()
+
 class ESOPInstance():
+    satellites = _IndexedField()
+    users = _IndexedField()
+    tasks = _IndexedField()
+    observations = _IndexedField()
+
     def __init__(self, nb_satellites, nb_users, nb_tasks, horizon, satellites, users, tasks, observations):
         """
             Initialise une instance ESOP avec les paramètres donnés.
@@ -46,6 +77,8 @@ class ESOPInstance():
             nb_users est le nombre d'utilisateurs exclusifs (hors u0).
             users inclut l'utilisateur central u0.
         """
+        self._indexes = None
+        self.version = 0 # incrémenté à chaque invalidation (sert de clé aux caches externes)
         self.nb_satellites = nb_satellites
         self.nb_users = nb_users
         self.nb_tasks = nb_tasks
@@ -55,6 +88,159 @@ class ESOPInstance():
         self.tasks = tasks
         self.observations = observations
 
+    def invalidate_indexes(self):
+        """
+            À appeler après une modification en place des listes (append, remove...) ;
+            la réaffectation d'une liste invalide déjà les index.
+        """
+        self._indexes = None
+        self.version += 1
+
+    def _build_indexes(self):
+        """
+            Construit tous les index en une passe sur chaque liste.
+        """
+        idx = {
+            "sats_by_id": {s.sid: s for s in self._satellites},
+            "users_by_id": {u.uid: u for u in self._users},
+            "tasks_by_id": {},
+            "tasks_by_owner": {},
+            "obs_by_id": {},
+            "obs_by_owner": {},
+            "obs_by_task": {},
+            "obs_by_satellite": {},
+        }
+        for t in self._tasks:
+            idx["tasks_by_id"][t.tid] = t
+            idx["tasks_by_owner"].setdefault(t.owner, []).append(t)
+        for o in self._observations:
+            idx["obs_by_id"][o.oid] = o
+            idx["obs_by_owner"].setdefault(o.owner, []).append(o)
+            idx["obs_by_task"].setdefault(o.task_id, []).append(o)
+            idx["obs_by_satellite"].setdefault(o.satellite, []).append(o)
+        if self._indexes: # structures dérivées déjà construites (columns, exclusive_index)
+            idx.update((k, v) for k, v in self._indexes.items() if k not in idx)
+        self._indexes = idx
+        return idx
+
+    def _index(self, name):
+        idx = self._indexes
+        if idx is None or name not in idx:
+            idx = self._build_indexes()
+        return idx[name]
+
+    def _derived(self, name, build):
+        """
+            Structure dérivée (construite par build au premier accès), invalidée avec les index
+            mais indépendante d'eux : y accéder ne construit pas les index de recherche.
+        """
+        idx = self._indexes
+        if idx is None:
+            idx = self._indexes = {}
+        if name not in idx:
+            idx[name] = build()
+        return idx[name]
+
+    # Index paresseux (construits au premier accès, partagés : ne pas modifier les listes retournées)
+    @property
+    def sats_by_id(self):
+        return self._index("sats_by_id")
+
+    @property
+    def users_by_id(self):
+        return self._index("users_by_id")
+
+    @property
+    def tasks_by_id(self):
+        return self._index("tasks_by_id")
+
+    @property
+    def tasks_by_owner(self):
+        return self._index("tasks_by_owner")
+
+    @property
+    def obs_by_id(self):
+        return self._index("obs_by_id")
+
+    @property
+    def obs_by_owner(self):
+        return self._index("obs_by_owner")
+
+    @property
+    def obs_by_task(self):
+        return self._index("obs_by_task")
+
+    @property
+    def obs_by_satellite(self):
+        return self._index("obs_by_satellite")
+
+    @property
+    def columns(self):
+        """
+            ObservationStore (tableaux NumPy) des observations, construit au premier accès et invalidé avec les index.
+            NumPy n'est requis que pour cet accès.
+        """
+        from ObservationStore import ObservationStore
+        return self._derived("columns", lambda: ObservationStore.from_instance(self))
+
+    @property
+    def exclusive_index(self):
+        """
+            Index des fenêtres d'exclusivité (ExclusiveWindowIndex), construit au premier accès et invalidé avec les index.
+        """
+        from WindowIndex import ExclusiveWindowIndex
+        return self._derived("exclusive_index", lambda: ExclusiveWindowIndex(self._users))
+
+    @property
+    def baseline_cache(self):
+        """
+            Cache par défaut des états gloutons de référence (cf. AuctionSolver.baseline_state), rattaché à l'instance :
+            libéré avec elle et invalidé avec les index.
+        """
+        from LRUCache import LRUCache
+        return self._derived("baseline_cache", lambda: LRUCache(maxsize=1024))
+
+    def compact(self):
+        """
+            Instance équivalente dont les observations sont des vues (ObservationView) sur le store colonnaire :
+            plus légère en mémoire, à utiliser en lecture seule (les solveurs n'accèdent qu'aux attributs).
+        """
+        store = self.columns
+        views = store.views()
+        view_by_id = {v.oid: v for v in views}
+        tasks = [Task(tid=t.tid, owner=t.owner, t_start=t.t_start, t_end=t.t_end, duration=t.duration, reward=t.reward,
+                      opportunities=[view_by_id[o.oid] for o in t.opportunities]) for t in self.tasks]
+        inst = ESOPInstance(nb_satellites=self.nb_satellites, nb_users=self.nb_users, nb_tasks=self.nb_tasks, horizon=self.horizon,
+                            satellites=self.satellites, users=self.users, tasks=tasks, observations=views)
+        inst._derived("columns", lambda: store)
+        return inst
+
+    def materialize(self):
+        """
+            Inverse de compact : instance équivalente dont les observations sont des objets Observation.
+        """
+        obs_by_id = {o.oid: Observation(oid=o.oid, task_id=o.task_id, satellite=o.satellite, t_start=o.t_start, t_end=o.t_end,
+                                        duration=o.duration, reward=o.reward, owner=o.owner) for o in self.observations}
+        tasks = [Task(tid=t.tid, owner=t.owner, t_start=t.t_start, t_end=t.t_end, duration=t.duration, reward=t.reward,
+                      opportunities=[obs_by_id[o.oid] for o in t.opportunities]) for t in self.tasks]
+        return ESOPInstance(nb_satellites=self.nb_satellites, nb_users=self.nb_users, nb_tasks=self.nb_tasks, horizon=self.horizon,
+                            satellites=self.satellites, users=self.users, tasks=tasks, observations=list(obs_by_id.values()))
+
+    def without_tasks(self, task_ids):
+        """
+            Vue de l'instance privée des tâches task_ids et de leurs observations.
+            Satellites, utilisateurs, tâches et observations sont partagés avec l'instance d'origine (aucune copie) :
+            la vue est à utiliser en lecture seule.
+        """
+        task_ids = set(task_ids)
+        if not task_ids:
+            tasks, observations = self.tasks, self.observations
+        else:
+            tasks = [t for t in self.tasks if t.tid not in task_ids]
+            observations = [o for o in self.observations if o.task_id not in task_ids]
+        return ESOPInstance(nb_satellites=self.nb_satellites, nb_users=self.nb_users, nb_tasks=len(tasks), horizon=self.horizon,
+                            satellites=self.satellites, users=self.users, tasks=tasks, observations=observations)
+
     def to_text(self):
         lines = []
         lines.append("[Parameters]")
@@ -81,6 +267,29 @@ class ESOPInstance():
             lines.append(f"{o.oid} task={o.task_id} owner={o.owner} sat={o.satellite} window=[{o.t_start},{o.t_end}] duration={o.duration} reward={o.reward}")
         return "\n".join(lines)
 
+    @classmethod
+    def from_text(cls, source, horizon=None):
+        """
+            Instance lue depuis le format texte de to_text (cf. InstanceIO.parse_instance_text).
+        """
+        from InstanceIO import parse_instance_text
+        return parse_instance_text(source, horizon)
+
+    def to_binary(self, path):
+        """
+            Écrit l'instance au format binaire colonnaire (cf. InstanceIO.write_instance_binary).
+        """
+        from InstanceIO import write_instance_binary
+        write_instance_binary(self, path)
+
+    @classmethod
+    def from_binary(cls, path, mmap=True):
+        """
+            Instance chargée depuis le format binaire, par défaut projetée en mémoire (cf. InstanceIO.load_instance_binary).
+        """
+        from InstanceIO import load_instance_binary
+        return load_instance_binary(path, mmap)
+
 def assess_solution(instance, user_plans):
     """
         Évalue une solution donnée (plannings par utilisateur) et retourne le score total par utilisateur.
@@ -94,89 +303,19 @@ def assess_solution(instance, user_plans):
         scores[uid] = total_reward
     return scores
 
-def estRealisable(instance, user_plans):
+def estRealisable(instance, user_plans, verbose=True):
     """
         Vérifie si user_plans est réalisable pour l'instance donnée.
+        Les contraintes sont vérifiées par FeasibilityChecker.check_plans ; verbose affiche les violations.
     """
+    from FeasibilityChecker import check_plans
 
-    ok = True
-
-    sats_by_id = {s.sid: s for s in instance.satellites}
-    users_by_id = {u.uid: u for u in instance.users}
-
-    # vérification de l'unicité des observations + au plus une obs par requête
-    used_obs = set()
-    used_tasks = set()
-    for uid, plan in user_plans.items():
-        for sid, obs_list in plan.items():
-            for obs, t_start in obs_list:
-                if obs in used_obs:
-                    print(f"[ERREUR] Observation {obs.oid} planifiée plusieurs fois.")
-                    ok = False
-                used_obs.add(obs)
-
-                # au plus 1 observation par requête / tâche
-                if obs.task_id in used_tasks:
-                    print(f"[ERREUR] Task {obs.task_id} satisfaite par plusieurs observations.")
-                    ok = False
-                used_tasks.add(obs.task_id)
-
-    # capacité globale, délais, fenêtres et transitions, par satellite
-    for sid, sat in sats_by_id.items():
-        # rassembler toutes les obs planifiées sur ce sat (tous utilisateurs confondus)
-        all_obs_on_sat = [(obs, t_start, uid) for uid, plan in user_plans.items() for s2, obs_list in plan.items() if s2 == sid for (obs, t_start) in obs_list]
-
-        # capacité globale
-        if len(all_obs_on_sat) > sat.capacity:
-            print(f"[ERREUR] Capacité globale dépassée sur {sid}: "
-                  f"{len(all_obs_on_sat)} > {sat.capacity}")
-            ok = False
-
-        all_obs_on_sat.sort(key=lambda p: p[1]) # tri par temps début
-
-        # fenêtres / horizon + transitions globales
-        tau = sat.transition_time
-        for i, (obs, t_start, uid) in enumerate(all_obs_on_sat):
-            t_end = t_start + obs.duration
-
-            # horizon satellite
-            if t_start < sat.t_start or t_end > sat.t_end:
-                print(f"[ERREUR] {uid} / {sid} : {obs.oid} sort de l'horizon sat [{sat.t_start},{sat.t_end}] avec [{t_start},{t_end}].")
-                ok = False
-
-            # fenêtre observation
-            if t_start < obs.t_start or t_end > obs.t_end:
-                print(f"[ERREUR] {uid} / {sid} : {obs.oid} hors de sa fenêtre [{obs.t_start},{obs.t_end}] avec [{t_start},{t_end}].")
-                ok = False
-
-            if i < len(all_obs_on_sat) - 1: # transition avec l'observation suivante (globale)
-                obs2, t2, uid2 = all_obs_on_sat[i + 1]
-                end1 = t_end
-                if end1 + tau > t2:
-                    print(f"[ERREUR] Transition insuffisante sur {sid} entre {obs.oid} ({uid}) [{t_start},{end1}] et {obs2.oid} ({uid2}) commençant à t={t2} (tau={tau}).")
-                    ok = False
-
-    # Fenêtres d'exclusivité pour utilisateurs exclusifs (uid != "u0")
-    for uid, plan in user_plans.items():
-        if uid == "u0":
-            continue  # le central peut utiliser les portions non exclusives
-
-        user = users_by_id.get(uid)
-        if user is None:
-            print(f"[ERREUR] Utilisateur inconnu (dans exclusifs) : {uid}")
-            ok = False
-            continue
-
-        for sid, obs_list in plan.items():
-            for obs, t_start in obs_list:
-                t_end = t_start + obs.duration
-                in_excl = any((w.satellite == sid and t_start >= w.t_start and t_end <= w.t_end) for w in user.exclusive_windows)
-                if not in_excl:
-                    print(f"[ERREUR] {uid} / {sid} : {obs.oid} planifiée en dehors de toute fenêtre d'exclusivité de {uid}.")
-                    ok = False
-
-    if ok:
-        print("[OK] Le planning est réalisable selon les contraintes vérifiées.")
-    else:
-        print("[ECHEC] Le planning viole au moins une contrainte.")
-    return ok
+    report = check_plans(instance, user_plans)
+    if verbose:
+        for message in report.messages():
+            print(message)
+        if report.ok:
+            print("[OK] Le planning est réalisable selon les contraintes vérifiées.")
+        else:
+            print("[ECHEC] Le planning viole au moins une contrainte.")
+    return report.ok
@@ -0,0 +1,208 @@
+import numpy as np
+
+class Violation():
+    """
+        Contrainte violée par un planning : kind parmi "duplicate_observation", "duplicate_task", "capacity",
+        "horizon", "window", "transition", "unknown_satellite", "unknown_user", "exclusivity".
+    """
+    __slots__ = ("kind", "message", "uid", "sid", "oids")
+
+    def __init__(self, kind, message, uid=None, sid=None, oids=()):
+        self.kind = kind
+        self.message = message
+        self.uid = uid
+        self.sid = sid
+        self.oids = oids
+
+    def __repr__(self):
+        return f"Violation({self.kind}: {self.message})"
+
+class FeasibilityReport():
+    """
+        Résultat de check_plans : liste des violations, dans l'ordre des vérifications d'estRealisable.
+    """
+    def __init__(self, violations, nb_scheduled):
+        self.violations = violations
+        self.nb_scheduled = nb_scheduled
+
+    @property
+    def ok(self):
+        return not self.violations
+
+    def __bool__(self):
+        return self.ok
+
+    def __len__(self):
+        return len(self.violations)
+
+    def by_kind(self):
+        counts = {}
+        for v in self.violations:
+            counts[v.kind] = counts.get(v.kind, 0) + 1
+        return counts
+
+    def messages(self):
+        return [v.message for v in self.violations]
+
+def _flatten(user_plans, sat_pos):
+    """
+        Aplatit user_plans en une seule passe (une ligne par observation planifiée, dans l'ordre de parcours des plans).
+        Retourne les listes uids, sids, obs et les colonnes numériques
+        (indice satellite ou -1, t_start, durée, début et fin de fenêtre, identité de l'observation, code de la tâche).
+    """
+    uids, sids, obs, ts, sat_idx = [], [], [], [], []
+    for uid, plan in user_plans.items():
+        for sid, obs_list in plan.items():
+            if not obs_list:
+                continue
+            m = len(obs_list)
+            os_, ts_ = zip(*obs_list)
+            obs.extend(os_)
+            ts.extend(ts_)
+            uids.extend([uid] * m)
+            sids.extend([sid] * m)
+            sat_idx.extend([sat_pos.get(sid, -1)] * m)
+    task_codes = {}
+    # dates et durées dans leur type natif (int64, ou float64 si une valeur n'est pas entière : pas de troncature)
+    times = [np.array(col) if col else np.empty(0, dtype=np.int64)
+             for col in (ts, [o.duration for o in obs], [o.t_start for o in obs], [o.t_end for o in obs])]
+    ids = np.array([sat_idx, [id(o) for o in obs], [task_codes.setdefault(o.task_id, len(task_codes)) for o in obs]],
+                   dtype=np.int64).reshape(3, -1)
+    return uids, sids, obs, (ids[0], *times, ids[1], ids[2])
+
+def _repeated(codes):
+    """
+        Positions (dans l'ordre d'origine) des occurrences d'un code déjà vu plus tôt dans le tableau.
+    """
+    if len(codes) < 2:
+        return np.empty(0, dtype=np.intp)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    dup = np.flatnonzero(sorted_codes[1:] == sorted_codes[:-1]) + 1
+    return np.sort(order[dup])
+
+def check_plans(instance, user_plans):
+    """
+        Vérifie user_plans (uid -> sid -> liste (Observation, t_start)) sur l'instance, sans rien afficher.
+
+        Les plans sont aplatis une seule fois en tableaux ; chaque contrainte (unicité, capacité, horizon, fenêtre,
+        transition, exclusivité) est ensuite vérifiée par opérations vectorisées sur tableaux triés.
+        Retourne un FeasibilityReport.
+    """
+    violations = []
+    sats = instance.satellites
+    sat_pos = {s.sid: k for k, s in enumerate(sats)}
+    uids, sids, obs, cols = _flatten(user_plans, sat_pos)
+    n = len(obs)
+
+    # utilisateurs exclusifs inconnus, même sans observation planifiée
+    users_by_id = instance.users_by_id
+    for uid in user_plans:
+        if uid != "u0" and uid not in users_by_id:
+            violations.append(Violation("unknown_user", f"[ERREUR] Utilisateur inconnu (dans exclusifs) : {uid}", uid=uid))
+    if n == 0:
+        return FeasibilityReport(violations, 0)
+    sat_idx, t, dur, o_start, o_end, obs_id, task_code = cols
+    end = t + dur
+
+    # unicité des observations + au plus une obs par requête
+    for i in _repeated(obs_id):
+        violations.append(Violation("duplicate_observation", f"[ERREUR] Observation {obs[i].oid} planifiée plusieurs fois.",
+                                    uid=uids[i], sid=sids[i], oids=(obs[i].oid,)))
+    for i in _repeated(task_code):
+        violations.append(Violation("duplicate_task", f"[ERREUR] Task {obs[i].task_id} satisfaite par plusieurs observations.",
+                                    uid=uids[i], sid=sids[i], oids=(obs[i].oid,)))
+
+    # satellites inconnus (indice -1)
+    for i in np.flatnonzero(sat_idx < 0):
+        violations.append(Violation("unknown_satellite", f"[ERREUR] {uids[i]} : {obs[i].oid} planifiée sur un satellite inconnu {sids[i]}.",
+                                    uid=uids[i], sid=sids[i], oids=(obs[i].oid,)))
+    known = np.flatnonzero(sat_idx >= 0)
+
+    sat_t_start = np.array([s.t_start for s in sats], dtype=np.int64)
+    sat_t_end = np.array([s.t_end for s in sats], dtype=np.int64)
+    sat_cap = np.array([s.capacity for s in sats], dtype=np.int64)
+    sat_tau = np.array([s.transition_time for s in sats], dtype=np.int64)
+
+    # capacité globale
+    load = np.bincount(sat_idx[known], minlength=len(sats))
+    for k in np.flatnonzero(load > sat_cap):
+        violations.append(Violation("capacity", f"[ERREUR] Capacité globale dépassée sur {sats[k].sid}: {load[k]} > {sat_cap[k]}",
+                                    sid=sats[k].sid))
+
+    # horizon satellite et fenêtre de l'observation
+    s_k = sat_idx[known]
+    bad_horizon = known[(t[known] < sat_t_start[s_k]) | (end[known] > sat_t_end[s_k])]
+    for i in bad_horizon:
+        sat = sats[sat_idx[i]]
+        violations.append(Violation("horizon", f"[ERREUR] {uids[i]} / {sids[i]} : {obs[i].oid} sort de l'horizon sat [{sat.t_start},{sat.t_end}] avec [{t[i]},{end[i]}].",
+                                    uid=uids[i], sid=sids[i], oids=(obs[i].oid,)))
+    for i in np.flatnonzero((t < o_start) | (end > o_end)):
+        violations.append(Violation("window", f"[ERREUR] {uids[i]} / {sids[i]} : {obs[i].oid} hors de sa fenêtre [{obs[i].t_start},{obs[i].t_end}] avec [{t[i]},{end[i]}].",
+                                    uid=uids[i], sid=sids[i], oids=(obs[i].oid,)))
+
+    # transitions globales : tri par (satellite, t_start), comparaison des voisins sur un même satellite
+    order = known[np.lexsort((t[known], sat_idx[known]))]
+    if len(order) > 1:
+        a, b = order[:-1], order[1:]
+        same_sat = sat_idx[a] == sat_idx[b]
+        bad = np.flatnonzero(same_sat & (end[a] + sat_tau[sat_idx[a]] > t[b]))
+        for i, j in zip(a[bad], b[bad]):
+            tau = sat_tau[sat_idx[i]]
+            violations.append(Violation("transition", f"[ERREUR] Transition insuffisante sur {sids[i]} entre {obs[i].oid} ({uids[i]}) [{t[i]},{end[i]}] et {obs[j].oid} ({uids[j]}) commençant à t={t[j]} (tau={tau}).",
+                                        sid=sids[i], oids=(obs[i].oid, obs[j].oid)))
+
+    # fenêtres d'exclusivité pour les utilisateurs exclusifs (uid != "u0")
+    excl = np.fromiter((uid != "u0" and uid in users_by_id for uid in uids), dtype=bool, count=n)
+    if excl.any():
+        violations.extend(_exclusivity_violations(instance, uids, sids, obs, t, end, np.flatnonzero(excl)))
+
+    return FeasibilityReport(violations, n)
+
+def _exclusivity_violations(instance, uids, sids, obs, t, end, rows):
+    """
+        Observations (indices rows) d'exclusifs non contenues dans une fenêtre d'exclusivité de leur utilisateur
+        sur leur satellite.
+
+        Les fenêtres sont triées par (utilisateur, satellite, t_start) ; pour chaque observation on cherche par
+        searchsorted la dernière fenêtre du groupe commençant avant t, et on compare end au maximum courant des t_end
+        des fenêtres du groupe (robuste à des fenêtres qui se chevauchent).
+    """
+    group_pos = {}
+    w_group, w_start, w_end = [], [], []
+    for u in instance.users:
+        if u.uid == "u0":
+            continue
+        for w in u.exclusive_windows:
+            w_group.append(group_pos.setdefault((u.uid, w.satellite), len(group_pos)))
+            w_start.append(w.t_start)
+            w_end.append(w.t_end)
+    o_group = np.fromiter((group_pos.get((uids[i], sids[i]), -1) for i in rows), dtype=np.int64, count=len(rows))
+
+    contained = np.zeros(len(rows), dtype=bool)
+    if w_group:
+        w_group = np.array(w_group, dtype=np.int64)
+        w_start = np.array(w_start, dtype=np.int64)
+        w_end = np.array(w_end, dtype=np.int64)
+        order = np.lexsort((w_start, w_group))
+        w_group, w_start, w_end = w_group[order], w_start[order], w_end[order]
+
+        # clé composite (groupe, temps) sur un seul entier, croissante dans l'ordre du tri
+        lo = min(int(w_start.min()), int(w_end.min()), int(t[rows].min()))
+        span = max(int(w_end.max()), int(w_start.max()), int(end[rows].max())) - lo + 1
+        w_key = w_group * span + (w_start - lo)
+        # maximum courant des t_end par groupe (les groupes sont décalés de span, donc jamais mélangés)
+        w_reach = np.maximum.accumulate(w_group * span + (w_end - lo))
+
+        known = o_group >= 0
+        k = np.searchsorted(w_key, o_group * span + (t[rows] - lo), side="right") - 1
+        valid = known & (k >= 0)
+        k_safe = np.where(valid, k, 0)
+        valid &= w_group[k_safe] == o_group
+        contained = valid & (w_reach[k_safe] >= o_group * span + (end[rows] - lo))
+
+    violations = []
+    for i in rows[~contained]:
+        violations.append(Violation("exclusivity", f"[ERREUR] {uids[i]} / {sids[i]} : {obs[i].oid} planifiée en dehors de toute fenêtre d'exclusivité de {uids[i]}.",
+                                    uid=uids[i], sid=sids[i], oids=(obs[i].oid,)))
+    return violations
@@ -1,5 +1,14 @@
+from bisect import bisect_right
+from copy import copy
 from ESOPInstance import ESOPInstance
+from Timeline import Timeline
+import Instrumentation
 
+def greedy_key(o):
+    # ordre glouton : reward décroissant, t_start croissant
+    return (-o.reward, o.t_start)
+
+@Instrumentation.traced("greedy_schedule_P_u")
 def greedy_schedule_P_u(instance, user_id):
     """
         Résout P_u avec l'algorithme glouton pour un utilisateur donné :
@@ -10,9 +19,9 @@ def greedy_schedule_P_u(instance, user_id):
         - R_u : tâches dont le owner est u
         - O_u : observations dont le owner est u
     """
-    u = next(user for user in instance.users if user.uid == user_id)
-    tasks_u = [t for t in instance.tasks if t.owner == user_id]
-    obs_u = [o for o in instance.observations if o.owner == user_id]
+    u = instance.users_by_id[user_id]
+    tasks_u = instance.tasks_by_owner.get(user_id, [])
+    obs_u = instance.obs_by_owner.get(user_id, [])
 
     # Sous-instance P_u (mêmes satellites et horizon)
     inst_u = ESOPInstance(nb_satellites=instance.nb_satellites,
@@ -28,77 +37,38 @@ def greedy_schedule_P_u(instance, user_id):
     # On ne récupère que le plan de u
     return all_plans_u.get(user_id, {})
 
-def greedy_schedule(instance):
+@Instrumentation.traced("greedy_schedule")
+def greedy_schedule(instance, fixed_plans=None):
     """
         Algo 1 Greedy EOSCSP solver avec priorité absolue aux exclusifs en deux temps 1) exclusifs d'abord 2) u0 ensuite
+
+        fixed_plans (uid -> sid -> liste (Observation, t_start)) : plans déjà arrêtés dont les créneaux sont réservés
+        et les tâches considérées satisfaites ; ils ne sont pas repris dans le résultat.
     """
     user_plans = {} # uid -> sid -> liste (Observation, t_start)
     
-    # Rs : plan actuel par satellite
-    Rs = {sat.sid: [] for sat in instance.satellites}
-    sat_by_id = {s.sid: s for s in instance.satellites}
+    # Rs : plan actuel par satellite (index des créneaux libres, cf. Timeline)
+    Rs = {sat.sid: Timeline.for_satellite(sat) for sat in instance.satellites}
     tasks_satisfied = set() # (au plus une obs par tâche)
+
+    for plan in (fixed_plans or {}).values():
+        for sid, obs_list in plan.items():
+            for obs, t in obs_list:
+                Rs[sid].reserve(obs, t)
+                tasks_satisfied.add(obs.task_id)
     
     def first_slot(o):
         # trouve le premier créneau valide
-        s = sat_by_id[o.satellite]
-        sid = s.sid
-        tau = s.transition_time
-        
-        if len(Rs[sid]) >= s.capacity:
-            return None
-        
-        plan_s = Rs[sid]  # déjà trié par t_start
-        
-        # Satellite vide ?
-        if not plan_s:
-            t0 = max(s.t_start, o.t_start)
-            if t0 + o.duration <= min(s.t_end, o.t_end):
-                Rs[sid].append((o, t0))
-                return t0
-            return None
-        
-        # Avant première obs ?
-        first_obs, first_t = plan_s[0]
-        t_upper = first_t
-        t0 = max(s.t_start, o.t_start)
-        if t0 + o.duration + tau <= t_upper:
-            Rs[sid].insert(0, (o, t0))
-            return t0
-        
-        # Entre deux obs successives ?
-        for i in range(len(plan_s) - 1):
-            prev_obs, prev_t = plan_s[i]
-            next_obs, next_t = plan_s[i + 1]
-            
-            # Après prev + transition
-            after_prev = prev_t + prev_obs.duration + tau
-            # Avant next - transition
-            before_next = next_t - tau
-            
-            t0 = max(after_prev, o.t_start)
-            if t0 + o.duration <= min(before_next, o.t_end, s.t_end):
-                Rs[sid].insert(i + 1, (o, t0))
-                return t0
-        
-        # Dernier cas après dernière obs
-        last_obs, last_t = plan_s[-1]
-        after_last = last_t + last_obs.duration + tau
-        t0 = max(after_last, o.t_start)
-        if t0 + o.duration <= min(s.t_end, o.t_end):
-            Rs[sid].append((o, t0))
-            return t0
-        
-        return None
+        return Rs[o.satellite].place(o)
     
     # UNIQUEMENT obs EXCLUSIFS (priorité absolue)
     exclusive_obs = [o for o in instance.observations if o.owner != "u0"]
-    exclusive_obs.sort(key=lambda o: (-o.reward, o.t_start)) # tri par reward décroissant, t_start croissant
+    exclusive_obs.sort(key=greedy_key) # tri par reward décroissant, t_start croissant
+    windows = instance.exclusive_index
     
     for o in exclusive_obs:
         # Vérifier que l'obs est dans une exclusive de son owner
-        u_owner = next(u for u in instance.users if u.uid == o.owner)
-        in_exclusive = any(w.satellite == o.satellite and o.t_start >= w.t_start and o.t_end <= w.t_end for w in u_owner.exclusive_windows)
+        in_exclusive = windows.contains(o.owner, o.satellite, o.t_start, o.t_end)
         if not in_exclusive:
             continue
             
@@ -111,8 +81,7 @@ def greedy_schedule(instance):
             user_plans.setdefault(o.owner, {}).setdefault(o.satellite, []).append((o, t))
     
     # obs u0 APRÈS exclusifs
-    u0_obs = [o for o in instance.observations if o.owner == "u0"]
-    u0_obs.sort(key=lambda o: (-o.reward, o.t_start))
+    u0_obs = sorted(instance.obs_by_owner.get("u0", []), key=greedy_key)
     
     for o in u0_obs:
         if o.task_id in tasks_satisfied:
@@ -129,4 +98,150 @@ def greedy_schedule(instance):
             user_plans[uid][sid].sort(key=lambda p: p[1])
     
     #print(f"> Greedy: {len(tasks_satisfied)}/{len(instance.tasks)} tâches satisfaites")
-    return user_plans
\ No newline at end of file
+    return user_plans
+
+class UserGreedyState():
+    """
+        État persistant du glouton de P_u pour un utilisateur : ordre glouton de ses observations
+        (+ observations de u0 qu'il a acceptées) et décision prise pour chacune.
+
+        Insérer des observations ne modifie pas les décisions prises avant leur rang dans l'ordre glouton :
+        on reconstruit l'état à ce rang à partir des placements déjà connus et on ne rejoue que le suffixe.
+    """
+    def __init__(self, instance, user_id, accepted_obs=()):
+        self.instance = instance
+        self.user_id = user_id
+        self.user = instance.users_by_id[user_id]
+        own_obs = instance.obs_by_owner.get(user_id, [])
+        self._own_index = {o: i for i, o in enumerate(own_obs)}
+        self.accepted_obs = list(accepted_obs) # observations de u0 intégrées au plan de u
+        order = sorted(own_obs + self.accepted_obs, key=self._rank_key)
+        Instrumentation.count("greedy.states_built")
+        self._set_order(order, self._replay(0, order))
+
+    def _rank_key(self, o):
+        # ordre glouton ; à égalité, obs propres dans l'ordre de l'instance puis obs acceptées par oid,
+        # pour que l'état ne dépende que de l'ensemble des obs acceptées (et pas de l'ordre d'insertion)
+        i = self._own_index.get(o)
+        if i is not None:
+            return (-o.reward, o.t_start, 0, i)
+        return (-o.reward, o.t_start, 1, o.oid)
+
+    def copy(self):
+        """
+            Copie indépendante (les listes internes ne sont jamais modifiées en place, sauf accepted_obs).
+        """
+        state = copy(self)
+        state.accepted_obs = list(self.accepted_obs)
+        return state
+
+    def _set_order(self, order, steps):
+        self.order = order
+        self.steps = steps # t_start ou None, aligné sur order
+        self._keys = [self._rank_key(o) for o in order]
+        self._members = set(order)
+        self._placed = [(rank, o, t) for rank, (o, t) in enumerate(zip(order, steps)) if t is not None]
+        self._placed_ranks = [rank for rank, _, _ in self._placed]
+        self._start = {o: t for _, o, t in self._placed}
+        self.reward = sum(o.reward for _, o, _ in self._placed)
+
+        self.plan = self._plan_from(order, steps) # sid -> liste (Observation, t_start), comme greedy_schedule_P_u
+
+    @staticmethod
+    def _plan_from(order, steps):
+        plan = {}
+        for o, t in zip(order, steps):
+            if t is not None:
+                plan.setdefault(o.satellite, []).append((o, t))
+        for sid in plan:
+            plan[sid].sort(key=lambda p: p[1])
+        return plan
+
+    def start_time(self, obs):
+        return self._start.get(obs)
+
+    def _in_exclusive(self, o):
+        if self.user_id == "u0":
+            return True
+        return self.instance.exclusive_index.contains(self.user_id, o.satellite, o.t_start, o.t_end)
+
+    def _replay(self, k, obs_seq):
+        """
+            Rejoue le glouton sur obs_seq à partir de l'état obtenu après les k premières observations de self.order.
+        """
+        if Instrumentation.recorder is not None:
+            Instrumentation.count("greedy.replayed_obs", len(obs_seq))
+        prefix = self._placed[:bisect_right(self._placed_ranks, k - 1)] if k > 0 else []
+        tasks_satisfied = {o.task_id for _, o, _ in prefix}
+        items_by_sat = {}
+        for _, o, t in prefix:
+            items_by_sat.setdefault(o.satellite, []).append((o, t))
+
+        sats = self.instance.sats_by_id
+        timelines = {}
+        steps = []
+        for o in obs_seq:
+            t = None
+            if o.task_id not in tasks_satisfied and self._in_exclusive(o):
+                tl = timelines.get(o.satellite)
+                if tl is None:
+                    items = sorted(items_by_sat.get(o.satellite, []), key=lambda p: p[1])
+                    tl = timelines[o.satellite] = Timeline.from_items(sats[o.satellite], items)
+                t = tl.place(o)
+                if t is not None:
+                    tasks_satisfied.add(o.task_id)
+            steps.append(t)
+        return steps
+
+    def _insertion(self, extra_obs):
+        """
+            Calcule l'état après insertion de extra_obs : (ordre, décisions, gain, placements des extra_obs).
+            Retourne None si rien n'est placé ou si une observation déjà acceptée serait évincée.
+        """
+        extra = [o for o in extra_obs if o not in self._members]
+        if not extra:
+            return None
+        extra.sort(key=self._rank_key)
+        k = bisect_right(self._keys, self._rank_key(extra[0]))
+        suffix = sorted(self.order[k:] + extra, key=self._rank_key)
+        steps_suffix = self._replay(k, suffix)
+
+        extra_set = set(extra)
+        placements = [(o, t) for o, t in zip(suffix, steps_suffix) if t is not None and o in extra_set]
+        if not placements:
+            return None # une obs non placée ne change pas l'état
+        still_placed = {o for o, t in zip(suffix, steps_suffix) if t is not None}
+        dropped = {o for o, t in zip(suffix, steps_suffix) if t is None}
+        if any(o in self._start and o in dropped for o in self.accepted_obs):
+            return None # une obs de u0 déjà acceptée serait évincée
+
+        # on ne garde dans l'ordre que les extra_obs placées (les autres n'ont aucun effet sur l'état)
+        kept = [(o, t) for o, t in zip(suffix, steps_suffix) if t is not None or o not in extra_set]
+        prefix_reward = sum(o.reward for _, o, _ in self._placed[:bisect_right(self._placed_ranks, k - 1)]) if k > 0 else 0
+        gain = prefix_reward + sum(o.reward for o in still_placed) - self.reward
+        return self.order[:k] + [o for o, _ in kept], self.steps[:k] + [t for _, t in kept], gain, placements
+
+    def marginal_gain(self, extra_obs):
+        """
+            Gain de reward si u prend en charge extra_obs, et leurs placements [(obs, t_start)].
+        """
+        res = self._insertion(extra_obs)
+        if res is None:
+            return 0, []
+        _, _, gain, placements = res
+        return gain, placements
+
+    def insert(self, extra_obs, check=None):
+        """
+            Intègre extra_obs au plan courant (si au moins une est placée) et retourne leurs placements.
+            check(nouveau_plan) -> bool permet de refuser l'intégration (contrainte globale par ex.).
+        """
+        res = self._insertion(extra_obs)
+        if res is None:
+            return []
+        order, steps, _, placements = res
+        if check is not None and not check(self._plan_from(order, steps)):
+            return []
+        self.accepted_obs.extend(o for o, _ in placements)
+        self._set_order(order, steps)
+        return placements
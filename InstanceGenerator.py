@@ -1,7 +1,15 @@
 from ESOPInstance import *
+from DcopModel import DcopModel
+import bisect
+import hashlib
+import json
+import os
 import random
 import yaml
 
+# version du générateur : à incrémenter dès que les instances produites pour une graine changent (clé du cache de corpus)
+GENERATOR_VERSION = 2
+
 def print_user_plans(user_plans):
     if not user_plans:
         print("Aucun planning généré.")
@@ -18,122 +26,75 @@ def print_user_plans(user_plans):
         total_reward = sum(obs.reward for sat_obs in plan.values() for obs, _ in sat_obs)
         print(f"> Score total: {total_reward}\n")
 
-def generate_DCOP_instance(instance):
+def generate_DCOP_instance(instance, distribution="owner"):
     """
         Génère une instance DCOP à partir d'une instance ESOP donnée.
     """
+    return build_DCOP_model(instance, distribution).to_yaml()
+
+def build_DCOP_dict(instance, distribution="owner"):
+    """
+        DCOP de l'instance ESOP au format dict pydcop (avant sérialisation YAML).
+    """
+    return build_DCOP_model(instance, distribution).to_dict()
+
+def build_DCOP_model(instance, distribution="owner"):
+    """
+        DCOP de l'instance ESOP sous forme de DcopModel (variables x_{u,o}, contraintes au plus une / capacité / reward).
+
+        distribution="owner" : seuls les utilisateurs exclusifs sont agents, chacun héberge ses variables
+        (cf. DcopModel.distribution, à passer à pydcop avec --distribution).
+        distribution="aux" : ancien mode, agents auxiliaires aux_N ajoutés jusqu'au nombre de calculs.
+    """
+    model = DcopModel("esop_dcop")
     agents = [u.uid for u in instance.users if u.uid != "u0"] # tous les utilisateurs exclusifs
 
     # Variables x_{u,o} pour les observations du central
-    central_observations = [o for o in instance.observations if o.owner == "u0"]
-    exclusives_by_user = {u.uid: u.exclusive_windows for u in instance.users if u.uid != "u0"}
-    obs_by_id = {o.oid: o for o in instance.observations}
+    central_observations = instance.obs_by_owner.get("u0", [])
+    windows = instance.exclusive_index
 
-    variables_section = {}
     vars_by_obs = {}
     vars_by_user_sat = {}
+    rewards = []
     for o in central_observations:
-        for u_id, windows in exclusives_by_user.items():
-            has_excl = any(w.satellite == o.satellite and not (w.t_end <= o.t_start or w.t_start >= o.t_end) for w in windows)
-            if not has_excl: continue
-
+        for u_id in windows.users_overlapping(o.satellite, o.t_start, o.t_end): # exclusifs ayant une fenêtre qui chevauche o
             v_name = f"x_{u_id}_{o.oid}"
-            variables_section[v_name] = {"domain": "binary", "agent": u_id}
+            model.add_variable(v_name, agent=u_id)
+            rewards.append((v_name, o.reward))
 
             vars_by_obs.setdefault(o.oid, []).append(v_name)
             key = (u_id, o.satellite)
             vars_by_user_sat.setdefault(key, []).append(v_name)
 
-    constraints_section = {}
     # au plus une par observation
     for o in central_observations:
-        if o.oid not in vars_by_obs:
-            continue
-        vnames = vars_by_obs[o.oid]
-        c_name = f"c_atmost1_{o.oid}"
-
-        # syntaxe expression directe
-        total_expr = " + ".join(vnames) if len(vnames) > 1 else vnames[0]
-        expression = f"0 if {total_expr} <= 1 else 1e9"
-
-        constraints_section[c_name] = {"type": "intention", "function": expression}
+        if o.oid in vars_by_obs:
+            model.add_linear(f"c_atmost1_{o.oid}", vars_by_obs[o.oid], 1)
 
     # capacité par (u, s)
-    sat_capacity = {s.sid: s.capacity for s in instance.satellites}
-
+    sat_capacity = {sid: s.capacity for sid, s in instance.sats_by_id.items()}
     for (u_id, sat_id), vnames in vars_by_user_sat.items():
-        c_name = f"c_cap_{u_id}_{sat_id}"
-        cap = sat_capacity[sat_id]
-
-        total_expr = " + ".join(vnames) if len(vnames) > 1 else vnames[0]
-        expression = f"0 if {total_expr} <= {cap} else 1e9"
-
-        constraints_section[c_name] = {"type": "intention", "function": expression}
-
-    for v_name in variables_section.keys():
-        _, u_id, oid = v_name.split("_", 2)
-        o = obs_by_id[oid]
-        rew = o.reward
-        c_name = f"c_reward_{v_name}"
-
-        # syntaxe expression directe pour unaire
-        expression = f"{-rew} * {v_name}"
-        constraints_section[c_name] = {"type": "intention", "function": expression}
-
-    # Ajouter agents auxiliaires pour la distribution (contrainte PyDcop pour nb agents suffisant)
-    nb_vars = len(variables_section)
-    nb_constraints = len(constraints_section)
-    nb_computations = nb_vars + nb_constraints
-
-    real_agents = agents
-    while len(real_agents) < nb_computations:
-        real_agents.append(f"aux_{len(real_agents)}")
-
-    # DCOP YAML
-    dcop_dict = {
-        "name": "esop_dcop",
-        "objective": "min",
-        "domains": {"binary": {"values": [0, 1]}},
-        "agents": real_agents,
-        "variables": variables_section,
-        "constraints": constraints_section
-    }
-
-    yaml_str = yaml.dump(dcop_dict, sort_keys=False)
-    return yaml_str
-
-def generate_ESOP_instance(
-    nb_satellites,
-    nb_users, # nb d'utilisateurs exclusifs (hors u0)
-    nb_tasks,
-    horizon = 300,
-    capacity = 20,
-    seed = None,
-    scenario = "generic", # "generic", "small_scale", "large_scale",
-    one_exclusive_user_per_satellite=False # si True, chaque satellite a au plus un utilisateur exclusif par satellite
-):
+        model.add_linear(f"c_cap_{u_id}_{sat_id}", vnames, sat_capacity[sat_id])
+
+    # reward (unaire)
+    for v_name, rew in rewards:
+        model.add_unary(f"c_reward_{v_name}", v_name, -rew)
+
+    if distribution == "aux":
+        # Ajouter agents auxiliaires pour la distribution (contrainte PyDcop pour nb agents suffisant)
+        nb_computations = model.nb_variables + model.nb_constraints
+        while len(agents) < nb_computations:
+            agents.append(f"aux_{len(agents)}")
+    elif distribution != "owner":
+        raise ValueError(f"Mode de distribution inconnu : {distribution}")
+    for a in agents:
+        model.add_agent(a)
+    return model
+
+def scenario_params(scenario="generic", horizon=300):
     """
-    Génère une instance ESOP fidèle au modèle de l'article.
-
-    - S : nb_satellites, horizon, capacity, transition_time = 1.
-    - U : u0 (central, sans exclusives) + u1..u_nb_users (exclusifs, avec exclusive_windows).
-    - R : nb_tasks requêtes, réparties entre u0 et les exclusifs selon le scénario.
-    - O : opportunités pour chaque requête :
-        - pour un exclusif ui : chaque observation est incluse dans UNE de ses exclusives,
-          rewards élevés pour garantir la priorité.
-        - pour u0 : mix d'opportunités dans les exclusives (partage) et hors exclusives,
-          rewards plus faibles.
-
-    Le paramètre `scenario` permet de se rapprocher des configurations de la section 6 :
-      - "generic" : valeurs par défaut set en params.
-      - "small_scale" : proche des "highly conflicting small-scale problems".
-      - "large_scale" : proche des "realistic large-scale problems".
-    
-    Le paramètre one_exclusive_window_per_satellite permet de forcer au plus une un utilisateur exclusif par satellite.
+        Paramètres de génération d'un scénario (cf. generate_ESOP_instance), partagés par les générateurs.
     """
-    if seed is not None:
-        random.seed(seed)
-
     if scenario == "small_scale": # figure 4 article
         # 5 min horizon dans l'article, avec horizon=300 ici
         EXCL_WINDOWS_PER_USER = 8
@@ -207,10 +168,59 @@ def generate_ESOP_instance(
         REWARD_CENTRAL_RANGE = (1, 10)
 
         PROB_U0_IN_EXCLUSIVE = 0.7
+
+    return dict(EXCL_WINDOWS_PER_USER=EXCL_WINDOWS_PER_USER, EXCL_WINDOW_LENGTH_RANGE=EXCL_WINDOW_LENGTH_RANGE,
+                PROB_TASK_FOR_U0=PROB_TASK_FOR_U0, NB_OPPS_RANGE=NB_OPPS_RANGE, DURATION_RANGE=DURATION_RANGE,
+                TASK_WINDOW_MIN_LENGTH=TASK_WINDOW_MIN_LENGTH, REWARD_EXCLUSIVE_RANGE=REWARD_EXCLUSIVE_RANGE,
+                REWARD_CENTRAL_RANGE=REWARD_CENTRAL_RANGE, PROB_U0_IN_EXCLUSIVE=PROB_U0_IN_EXCLUSIVE, horizon=horizon)
+
+def generate_ESOP_instance(
+    nb_satellites,
+    nb_users, # nb d'utilisateurs exclusifs (hors u0)
+    nb_tasks,
+    horizon = 300,
+    capacity = 20,
+    seed = None, # entier, ou random.Random à utiliser tel quel ; None : flux global du module random
+    scenario = "generic", # "generic", "small_scale", "large_scale",
+    one_exclusive_user_per_satellite=False # si True, chaque satellite a au plus un utilisateur exclusif par satellite
+):
+    """
+    Génère une instance ESOP fidèle au modèle de l'article.
+
+    - S : nb_satellites, horizon, capacity, transition_time = 1.
+    - U : u0 (central, sans exclusives) + u1..u_nb_users (exclusifs, avec exclusive_windows).
+    - R : nb_tasks requêtes, réparties entre u0 et les exclusifs selon le scénario.
+    - O : opportunités pour chaque requête :
+        - pour un exclusif ui : chaque observation est incluse dans UNE de ses exclusives,
+          rewards élevés pour garantir la priorité.
+        - pour u0 : mix d'opportunités dans les exclusives (partage) et hors exclusives,
+          rewards plus faibles.
+
+    Le paramètre `scenario` permet de se rapprocher des configurations de la section 6 :
+      - "generic" : valeurs par défaut set en params.
+      - "small_scale" : proche des "highly conflicting small-scale problems".
+      - "large_scale" : proche des "realistic large-scale problems".
+    
+    Le paramètre one_exclusive_window_per_satellite permet de forcer au plus une un utilisateur exclusif par satellite.
+
+    Avec seed (entier ou random.Random), l'instance est tirée d'un flux propre et l'état global de random n'est pas
+    modifié ; sans seed, elle est tirée du flux global (reproductible après random.seed(k)).
+    """
+    # seed donnée : flux propre à l'instance (l'état global de random n'est pas modifié), même suite que random.seed(seed) ;
+    # seed=None : flux global du module random, comme avant (random.seed(k) en amont rend la génération reproductible)
+    if seed is None:
+        rng = random
+    else:
+        rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+
+    params = scenario_params(scenario, horizon)
+    (EXCL_WINDOWS_PER_USER, EXCL_WINDOW_LENGTH_RANGE, PROB_TASK_FOR_U0, NB_OPPS_RANGE, DURATION_RANGE, TASK_WINDOW_MIN_LENGTH,
+     REWARD_EXCLUSIVE_RANGE, REWARD_CENTRAL_RANGE, PROB_U0_IN_EXCLUSIVE, horizon) = params.values()
     
     satellites = []
     for i in range(nb_satellites):
         satellites.append(Satellite(sid=f"s{i}", t_start=0, t_end=horizon, capacity=capacity, transition_time=1))
+    sats_by_id = {s.sid: s for s in satellites}
 
     users = []
     users.append(User(uid="u0", exclusive_windows=[]))  # central
@@ -227,15 +237,15 @@ def generate_ESOP_instance(
         existing = excl_by_sat[sid]
         # si aucun intervalle, on place librement
         if not existing:
-            length = random.randint(*length_range)
-            start = random.randint(0, max(0, horizon - length))
+            length = rng.randint(*length_range)
+            start = rng.randint(0, max(0, horizon - length))
             end = start + length
             return (start, end)
 
         # on essaie quelques placements aléatoires compatibles
         for _ in range(20):
-            length = random.randint(*length_range)
-            start = random.randint(0, max(0, horizon - length))
+            length = rng.randint(*length_range)
+            start = rng.randint(0, max(0, horizon - length))
             end = start + length
             if all(end <= s0 or start >= s1 for (s0, s1) in existing):
                 return (start, end)
@@ -249,14 +259,14 @@ def generate_ESOP_instance(
         if one_exclusive_user_per_satellite:
             taken_sats = attributed_sats.get(uid, None)
             if taken_sats is not None: # cet utilisateur a déjà un satellite attribué
-                sat = next(s for s in satellites if s.sid == attributed_sats[uid])
+                sat = sats_by_id[attributed_sats[uid]]
             else:
                 available_sats = [s for s in satellites if s.sid not in attributed_sats.values()]
                 if not available_sats:
                     # plus de satellites disponibles pour des exclusives
                     users.append(User(uid=uid, exclusive_windows=[]))
                     continue
-                sat = random.choice(available_sats)
+                sat = rng.choice(available_sats)
                 attributed_sats[uid] = sat.sid
 
             # toutes les fenêtres de cet utilisateur seront sur ce satellite,
@@ -273,7 +283,7 @@ def generate_ESOP_instance(
             # cas général : l'utilisateur peut avoir plusieurs satellites,
             # mais les exclusives ne doivent pas se chevaucher sur un même sat
             for _ in range(EXCL_WINDOWS_PER_USER):
-                sat = random.choice(satellites)
+                sat = rng.choice(satellites)
                 interval = sample_non_overlapping_interval(sat.sid, EXCL_WINDOW_LENGTH_RANGE)
                 if interval is None:
                     # impossible de placer une nouvelle fenêtre sur ce sat sans chevauchement
@@ -285,59 +295,60 @@ def generate_ESOP_instance(
         users.append(User(uid=uid, exclusive_windows=exclusive_windows))
 
     exclusive_users = [u for u in users if u.uid != "u0"]
+    users_by_id = {u.uid: u for u in users}
 
     tasks = []
     observations = []
     for t_idx in range(nb_tasks):
         # Répartition des tasks entre u0 et les exclusifs
-        if random.random() < PROB_TASK_FOR_U0 or nb_users == 0:
+        if rng.random() < PROB_TASK_FOR_U0 or nb_users == 0:
             owner = "u0"
         else:
-            owner = f"u{random.randint(1, nb_users)}"
+            owner = f"u{rng.randint(1, nb_users)}"
 
         tid = f"r_{t_idx}"
 
         # Fenêtre de la requête
-        t_start = random.randint(0, max(0, horizon - TASK_WINDOW_MIN_LENGTH - 1))
-        t_end = random.randint(t_start + TASK_WINDOW_MIN_LENGTH, horizon)
+        t_start = rng.randint(0, max(0, horizon - TASK_WINDOW_MIN_LENGTH - 1))
+        t_end = rng.randint(t_start + TASK_WINDOW_MIN_LENGTH, horizon)
 
         # Durée d'une observation
-        duration = random.randint(*DURATION_RANGE)
+        duration = rng.randint(*DURATION_RANGE)
 
         # Reward de la requête (et des obs)
         if owner == "u0":
-            reward = random.randint(*REWARD_CENTRAL_RANGE)
+            reward = rng.randint(*REWARD_CENTRAL_RANGE)
         else:
-            reward = random.randint(*REWARD_EXCLUSIVE_RANGE)
+            reward = rng.randint(*REWARD_EXCLUSIVE_RANGE)
 
         task = Task(tid=tid, owner=owner, t_start=t_start, t_end=t_end, duration=duration, reward=reward, opportunities=[])
 
-        nb_opps = random.randint(*NB_OPPS_RANGE)
+        nb_opps = rng.randint(*NB_OPPS_RANGE)
 
         for k in range(nb_opps):
             oid = f"o_{tid}_{k}"
 
             # cas où requête d'un utilisateur exclusif
             if owner != "u0":
-                u_owner = next(u for u in users if u.uid == owner)
+                u_owner = users_by_id[owner]
                 if not u_owner.exclusive_windows:
                     # cas limite, on saute
                     continue
 
                 # toutes les opportunités d'un exclusif doivent être dans UNE de ses exclusives
                 windows = u_owner.exclusive_windows[:]
-                random.shuffle(windows)
+                rng.shuffle(windows)
                 placed = False
                 sat = None
 
                 for w in windows:
-                    sat = next(s for s in satellites if s.sid == w.satellite)
+                    sat = sats_by_id[w.satellite]
                     # intersection de la fenêtre de la requête et de l'exclusive
                     win_start = max(t_start, w.t_start)
                     win_end = min(t_end, w.t_end)
                     # fenêtre obs incluse dans l'exclusive
                     if win_end - win_start >= duration + 1:
-                        o_start = random.randint(win_start, win_end - duration - 1)
+                        o_start = rng.randint(win_start, win_end - duration - 1)
                         o_end = o_start + duration + 1
                         placed = True
                         break
@@ -348,35 +359,35 @@ def generate_ESOP_instance(
 
             # cas où requête du central u0
             else:
-                if exclusive_users and random.random() < PROB_U0_IN_EXCLUSIVE:
+                if exclusive_users and rng.random() < PROB_U0_IN_EXCLUSIVE:
                     # opportunité dans une exclusive d'un utilisateur
-                    excl_user = random.choice(exclusive_users)
+                    excl_user = rng.choice(exclusive_users)
                     if excl_user.exclusive_windows:
-                        w = random.choice(excl_user.exclusive_windows)
-                        sat = next(s for s in satellites if s.sid == w.satellite)
+                        w = rng.choice(excl_user.exclusive_windows)
+                        sat = sats_by_id[w.satellite]
 
                         win_start = max(t_start, w.t_start)
                         win_end = min(t_end, w.t_end)
 
                         if win_end - win_start >= duration + 1:
-                            o_start = random.randint(win_start, win_end - duration - 1)
+                            o_start = rng.randint(win_start, win_end - duration - 1)
                             o_end = o_start + duration + 1
                         else:
                             # pas assez de place dans cette exclusive -> hors exclusives
-                            sat = random.choice(satellites)
-                            win_len = random.randint(duration + 1, max(duration + 2, t_end - t_start))
-                            o_start = random.randint(t_start, max(t_start, t_end - win_len))
+                            sat = rng.choice(satellites)
+                            win_len = rng.randint(duration + 1, max(duration + 2, t_end - t_start))
+                            o_start = rng.randint(t_start, max(t_start, t_end - win_len))
                             o_end = min(t_end, o_start + win_len)
                     else:
-                        sat = random.choice(satellites)
-                        win_len = random.randint(duration + 1, max(duration + 2, t_end - t_start))
-                        o_start = random.randint(t_start, max(t_start, t_end - win_len))
+                        sat = rng.choice(satellites)
+                        win_len = rng.randint(duration + 1, max(duration + 2, t_end - t_start))
+                        o_start = rng.randint(t_start, max(t_start, t_end - win_len))
                         o_end = min(t_end, o_start + win_len)
                 else:
                     # opportunité de u0 hors de toute exclusive (au moins en intention)
-                    sat = random.choice(satellites)
-                    win_len = random.randint(duration + 1, max(duration + 2, t_end - t_start))
-                    o_start = random.randint(t_start, max(t_start, t_end - win_len))
+                    sat = rng.choice(satellites)
+                    win_len = rng.randint(duration + 1, max(duration + 2, t_end - t_start))
+                    o_start = rng.randint(t_start, max(t_start, t_end - win_len))
                     o_end = min(t_end, o_start + win_len)
 
             obs = Observation(oid=oid, task_id=tid, satellite=sat.sid, t_start=o_start, t_end=o_end, duration=duration, reward=reward, owner=owner)
@@ -388,40 +399,302 @@ def generate_ESOP_instance(
     instance = ESOPInstance(nb_satellites=nb_satellites, nb_users=nb_users, nb_tasks=nb_tasks, horizon=horizon, satellites=satellites, users=users, tasks=tasks, observations=observations)
 
     # Sanity check : toutes les obs d'exclusifs sont dans leurs exclusives
+    windows = instance.exclusive_index
     for o in instance.observations:
         if o.owner == "u0":
             continue
-        u = next(u for u in instance.users if u.uid == o.owner)
-        assert any(w.satellite == o.satellite and o.t_start >= w.t_start and o.t_end <= w.t_end for w in u.exclusive_windows), f"{o.oid} de {o.owner} hors exclusive"
+        assert windows.contains(o.owner, o.satellite, o.t_start, o.t_end), f"{o.oid} de {o.owner} hors exclusive"
 
     return instance
 
-def generate_benchmark_instances(scenario="small_scale", num_instances=30):
+def _allocate_window(rng, taken, horizon, length_range, tries=20):
     """
-        génère 30 instances qui matchent les configurations expérimentales de l'article pour le benchmarking.
+        Place une fenêtre sans chevauchement parmi les intervalles triés taken (modifié en place) : le début est tiré
+        uniformément parmi toutes les positions libres (segments entre intervalles), ce qui suit la loi des placements
+        acceptés par l'échantillonnage par rejet de generate_ESOP_instance. Retourne (start, end) ou None.
+    """
+    for _ in range(tries):
+        length = int(rng.integers(length_range[0], length_range[1] + 1))
+        max_start = max(0, horizon - length)
+        segments, total, prev_end = [], 0, 0
+        for s0, s1 in taken + [(max_start + length, None)]:
+            hi = min(s0 - length, max_start)
+            if hi >= prev_end:
+                segments.append((prev_end, hi))
+                total += hi - prev_end + 1
+            if s1 is not None:
+                prev_end = max(prev_end, s1)
+        if not total:
+            continue
+        r = int(rng.integers(total))
+        for lo, hi in segments:
+            if r <= hi - lo:
+                start = lo + r
+                break
+            r -= hi - lo + 1
+        bisect.insort(taken, (start, start + length))
+        return start, start + length
+    return None
+
+def _uniform_pick(rng, offsets, counts):
+    """
+        Indice tiré uniformément dans [offsets, offsets + counts[ pour chaque ligne ; -1 (dernier élément, fictif) si counts = 0.
+    """
+    import numpy as np
+    pick = offsets + np.minimum((rng.random(len(counts)) * counts).astype(np.int64), np.maximum(counts - 1, 0))
+    return np.where(counts > 0, pick, -1)
+
+def generate_ESOP_instance_numpy(nb_satellites, nb_users, nb_tasks, horizon=300, capacity=20, seed=None, scenario="generic",
+                                 one_exclusive_user_per_satellite=False, compact=False):
+    """
+        Même modèle et mêmes lois que generate_ESOP_instance, tirés par lots avec un numpy.random.Generator
+        (seed : entier, SeedSequence ou Generator) : les instances diffèrent de celles du générateur scalaire pour une
+        même graine, mais suivent les mêmes distributions.
+
+        - fenêtres d'exclusivité placées par allocation dans les segments libres triés de chaque satellite ;
+        - requêtes (propriétaire, fenêtre, durée, reward, nombre d'opportunités) tirées en tableaux ;
+        - opportunités d'un exclusif : fenêtre d'accueil tirée uniformément parmi ses exclusives compatibles avec la
+          requête (la première compatible dans un ordre aléatoire, comme generate_ESOP_instance) ;
+        - opportunités de u0 : dans une exclusive d'un exclusif tiré au hasard si elle peut l'accueillir, sinon hors exclusive.
+        compact=True : observations construites directement en colonnes (ObservationStore + vues, cf. ESOPInstance.compact).
+    """
+    import numpy as np
+    from ObservationStore import ObservationStore
+
+    rng = np.random.default_rng(seed)
+    p = scenario_params(scenario, horizon)
+    horizon = p["horizon"]
+
+    satellites = [Satellite(sid=f"s{i}", t_start=0, t_end=horizon, capacity=capacity, transition_time=1) for i in range(nb_satellites)]
+    users = [User(uid="u0", exclusive_windows=[])]
+    taken = {s.sid: [] for s in satellites}
+    attributed = set()
+    for u_idx in range(nb_users):
+        windows = []
+        if one_exclusive_user_per_satellite:
+            available = [s for s in satellites if s.sid not in attributed]
+            sats = [available[int(rng.integers(len(available)))]] * p["EXCL_WINDOWS_PER_USER"] if available else []
+            if sats:
+                attributed.add(sats[0].sid)
+        else:
+            sats = [satellites[i] for i in rng.integers(0, nb_satellites, p["EXCL_WINDOWS_PER_USER"])]
+        for sat in sats:
+            interval = _allocate_window(rng, taken[sat.sid], horizon, p["EXCL_WINDOW_LENGTH_RANGE"])
+            if interval is None:
+                if one_exclusive_user_per_satellite:
+                    break
+                continue
+            windows.append(ExclusiveWindow(satellite=sat.sid, t_start=interval[0], t_end=interval[1]))
+        users.append(User(uid=f"u{u_idx + 1}", exclusive_windows=windows))
+
+    # fenêtres en CSR par utilisateur (indice 0 = u0, sans fenêtre)
+    sat_pos = {s.sid: i for i, s in enumerate(satellites)}
+    win_count = np.array([len(u.exclusive_windows) for u in users], dtype=np.int64)
+    win_ptr = np.concatenate(([0], np.cumsum(win_count)))[:-1]
+    all_windows = [w for u in users for w in u.exclusive_windows]
+    # une fenêtre fictive en fin de tableau : cible des tirages sans fenêtre possible (écartés ensuite)
+    win_start = np.array([w.t_start for w in all_windows] + [0], dtype=np.int64)
+    win_end = np.array([w.t_end for w in all_windows] + [0], dtype=np.int64)
+    win_sat = np.array([sat_pos[w.satellite] for w in all_windows] + [0], dtype=np.int64)
+
+    # requêtes
+    N = nb_tasks
+    is_u0 = (rng.random(N) < p["PROB_TASK_FOR_U0"]) | (nb_users == 0)
+    owner = np.where(is_u0, 0, rng.integers(1, nb_users + 1, N)) if nb_users else np.zeros(N, dtype=np.int64)
+    t_start = rng.integers(0, max(0, horizon - p["TASK_WINDOW_MIN_LENGTH"] - 1) + 1, N)
+    t_end = rng.integers(t_start + p["TASK_WINDOW_MIN_LENGTH"], horizon + 1)
+    duration = rng.integers(p["DURATION_RANGE"][0], p["DURATION_RANGE"][1] + 1, N)
+    reward = np.where(is_u0, rng.integers(p["REWARD_CENTRAL_RANGE"][0], p["REWARD_CENTRAL_RANGE"][1] + 1, N),
+                      rng.integers(p["REWARD_EXCLUSIVE_RANGE"][0], p["REWARD_EXCLUSIVE_RANGE"][1] + 1, N))
+    nb_opps = rng.integers(p["NB_OPPS_RANGE"][0], p["NB_OPPS_RANGE"][1] + 1, N)
+
+    # exclusives compatibles avec chaque requête d'exclusif (couples requête x fenêtre de son propriétaire)
+    ex_tasks = np.flatnonzero(~is_u0)
+    n_w = win_count[owner[ex_tasks]]
+    pair_task = np.repeat(ex_tasks, n_w)
+    pair_win = win_ptr[owner[pair_task]] + np.arange(len(pair_task)) - np.repeat(np.cumsum(n_w) - n_w, n_w)
+    pair_ws = np.maximum(t_start[pair_task], win_start[pair_win])
+    pair_we = np.minimum(t_end[pair_task], win_end[pair_win])
+    fit = pair_we - pair_ws >= duration[pair_task] + 1
+    fit_task = pair_task[fit]
+    fit_win, fit_ws, fit_we = (np.append(a[fit], 0) for a in (pair_win, pair_ws, pair_we))
+    fit_count = np.bincount(fit_task, minlength=N)
+    fit_off = np.cumsum(fit_count) - fit_count
+
+    # opportunités (k = rang dans la requête, conservé même si l'opportunité est abandonnée)
+    M = int(nb_opps.sum())
+    task = np.repeat(np.arange(N), nb_opps)
+    k = np.arange(M) - np.repeat(np.cumsum(nb_opps) - nb_opps, nb_opps)
+    ts, te, dur = t_start[task], t_end[task], duration[task]
+    u0_opp = is_u0[task]
+
+    # exclusif : fenêtre compatible tirée uniformément
+    has_fit = fit_count[task] > 0
+    j = _uniform_pick(rng, fit_off[task], fit_count[task])
+    ex_ws, ex_we, ex_sat = fit_ws[j], fit_we[j], win_sat[fit_win[j]]
+
+    # u0 : exclusive d'un exclusif tiré au hasard, si elle peut accueillir l'opportunité
+    try_excl = (nb_users > 0) & (rng.random(M) < p["PROB_U0_IN_EXCLUSIVE"])
+    excl_user = rng.integers(1, nb_users + 1, M) if nb_users else np.zeros(M, dtype=np.int64)
+    w = _uniform_pick(rng, win_ptr[excl_user], win_count[excl_user])
+    u0_ws, u0_we, u0_sat = np.maximum(ts, win_start[w]), np.minimum(te, win_end[w]), win_sat[w]
+    in_excl = try_excl & (win_count[excl_user] > 0) & (u0_we - u0_ws >= dur + 1)
+
+    # placement hors exclusive
+    out_sat = rng.integers(0, nb_satellites, M)
+    win_len = rng.integers(dur + 1, np.maximum(dur + 2, te - ts) + 1)
+    out_start = rng.integers(ts, np.maximum(ts, te - win_len) + 1)
+    out_end = np.minimum(te, out_start + win_len)
+
+    # placement dans une exclusive (exclusif ou u0) : début uniforme, fenêtre de durée + 1
+    in_ws = np.where(u0_opp, u0_ws, ex_ws)
+    in_we = np.where(u0_opp, u0_we, ex_we)
+    span = np.maximum(in_we - dur - in_ws, 1)
+    in_start = in_ws + (rng.random(M) * span).astype(np.int64)
+    inside = np.where(u0_opp, in_excl, True)
+    o_sat = np.where(u0_opp, np.where(in_excl, u0_sat, out_sat), ex_sat)
+    o_start = np.where(inside, in_start, out_start)
+    o_end = np.where(inside, in_start + dur + 1, out_end)
+
+    keep = u0_opp | has_fit
+    task, k, o_sat, o_start, o_end = task[keep], k[keep], o_sat[keep], o_start[keep], o_end[keep]
+
+    tids = [f"r_{i}" for i in range(N)]
+    uids = [u.uid for u in users]
+    sids = [s.sid for s in satellites]
+    oids = [f"o_r_{t}_{kk}" for t, kk in zip(task.tolist(), k.tolist())]
+    if compact:
+        store = ObservationStore(oids=oids, task_ids=tids, sat_ids=sids, user_ids=uids,
+                                 task_idx=task.astype(np.int32), sat_idx=o_sat.astype(np.int16), owner_idx=owner[task].astype(np.int16),
+                                 t_start=o_start, t_end=o_end, duration=duration[task], reward=reward[task])
+        observations = store.views()
+    else:
+        observations = [Observation(oid=oid, task_id=tids[t], satellite=sids[s], t_start=a, t_end=b, duration=d, reward=r, owner=uids[u])
+                        for oid, t, s, a, b, d, r, u in zip(oids, task.tolist(), o_sat.tolist(), o_start.tolist(), o_end.tolist(),
+                                                            duration[task].tolist(), reward[task].tolist(), owner[task].tolist())]
+    opp_ptr = np.concatenate(([0], np.cumsum(np.bincount(task, minlength=N)))).tolist()
+    tasks = [Task(tid=tids[i], owner=uids[o], t_start=a, t_end=b, duration=d, reward=r, opportunities=observations[opp_ptr[i]:opp_ptr[i + 1]])
+             for i, (o, a, b, d, r) in enumerate(zip(owner.tolist(), t_start.tolist(), t_end.tolist(), duration.tolist(), reward.tolist()))]
+
+    instance = ESOPInstance(nb_satellites=nb_satellites, nb_users=nb_users, nb_tasks=nb_tasks, horizon=horizon,
+                            satellites=satellites, users=users, tasks=tasks, observations=observations)
+    if compact:
+        instance._derived("columns", lambda: store)
+    return instance
+
+def benchmark_grid(scenario="small_scale"):
+    """
+        Configurations expérimentales de l'article : nombre de satellites et d'exclusifs, tailles (nb_tasks).
     """
-    
     if scenario == "small_scale":
-        params = {'nb_satellites': 3, 'nb_users': 4, 'nb_tasks': [25, 50, 75, 100, 125, 150]} # 250-1500 obs
+        return {'nb_satellites': 3, 'nb_users': 4, 'nb_tasks': [25, 50, 75, 100, 125, 150]} # 250-1500 obs
     else: # large_scale
-        params = {'nb_satellites': 8, 'nb_users': 5, 'nb_tasks': [100, 200, 300, 400, 500]} # 500-2500 obs
-    
-    instances = {obs_count: [] for obs_count in params['nb_tasks']}
-    
-    for obs_count in params['nb_tasks']:
-        for seed in range(num_instances):
-            instance = generate_ESOP_instance(nb_satellites=params['nb_satellites'], nb_users=params['nb_users'], nb_tasks=obs_count, scenario=scenario, seed=seed)
-            instances[obs_count].append(instance)
-    
+        return {'nb_satellites': 8, 'nb_users': 5, 'nb_tasks': [100, 200, 300, 400, 500]} # 500-2500 obs
+
+def instance_seed(nb_tasks, index, root_seed=0):
+    """
+        Graine de la index-ième instance de taille nb_tasks : état tiré de SeedSequence(root_seed) à la clé de
+        dérivation (nb_tasks, index) (comme SeedSequence.spawn). Les flux des instances sont indépendants entre eux
+        et ne dépendent ni de l'ordre de génération ni du processus qui les produit.
+    """
+    import numpy as np
+    state = np.random.SeedSequence(root_seed, spawn_key=(nb_tasks, index)).generate_state(4, np.uint64)
+    return int.from_bytes(state.tobytes(), "little")
+
+def corpus_path(cache_dir, scenario, nb_satellites, nb_users, nb_tasks, seed, root_seed=0):
+    """
+        Fichier du cache de corpus d'une instance : adressé par le contenu de sa clé
+        (scénario, tailles, indice et graine racine, version du générateur).
+    """
+    key = json.dumps({"scenario": scenario, "nb_satellites": nb_satellites, "nb_users": nb_users, "nb_tasks": nb_tasks,
+                      "seed": seed, "root_seed": root_seed, "version": GENERATOR_VERSION}, sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{scenario}_{nb_tasks}_{seed}_{digest}.esop")
+
+def benchmark_instance(scenario, nb_satellites, nb_users, nb_tasks, seed, root_seed=0):
+    """
+        Instance de benchmark d'indice seed, générée avec son propre flux (cf. instance_seed).
+    """
+    return generate_ESOP_instance(nb_satellites=nb_satellites, nb_users=nb_users, nb_tasks=nb_tasks, scenario=scenario,
+                                  seed=instance_seed(nb_tasks, seed, root_seed))
+
+def cached_ESOP_instance(cache_dir, scenario, nb_satellites, nb_users, nb_tasks, seed, compact=False, root_seed=0):
+    """
+        Instance lue depuis le cache de corpus (format binaire projeté en mémoire, cf. InstanceIO), ou générée puis
+        enregistrée (écriture dans un fichier temporaire puis renommage atomique). Même représentation que le cache
+        soit lu ou rempli : compact=True, observations en vues (sur le fichier si lu) ; sinon objets Observation.
+    """
+    path = corpus_path(cache_dir, scenario, nb_satellites, nb_users, nb_tasks, seed, root_seed)
+    if os.path.exists(path):
+        try:
+            instance = ESOPInstance.from_binary(path)
+        except (ValueError, OSError): # fichier tronqué ou illisible : régénéré
+            pass
+        else:
+            return instance if compact else instance.materialize()
+    instance = benchmark_instance(scenario, nb_satellites, nb_users, nb_tasks, seed, root_seed)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    instance.to_binary(tmp)
+    os.replace(tmp, path)
+    return instance.compact() if compact else instance
+
+def _benchmark_job(job):
+    """
+        Tâche d'un processus du pool : remplit le cache (rien n'est renvoyé) ou renvoie l'instance générée.
+    """
+    cache_dir, scenario, nb_satellites, nb_users, nb_tasks, seed, compact, root_seed = job
+    if cache_dir is not None:
+        cached_ESOP_instance(cache_dir, scenario, nb_satellites, nb_users, nb_tasks, seed, root_seed=root_seed)
+        return None
+    instance = benchmark_instance(scenario, nb_satellites, nb_users, nb_tasks, seed, root_seed)
+    return instance.compact() if compact else instance
+
+def iter_benchmark_instances(scenario="small_scale", num_instances=30, compact=False, cache_dir=None, root_seed=0, workers=1):
+    """
+        Parcourt paresseusement les instances de benchmark : (nb_tasks, seed, instance), une à la fois
+        (la mémoire ne dépend pas du nombre d'instances si l'appelant ne les garde pas).
+        cache_dir : répertoire du cache de corpus (cf. cached_ESOP_instance) ; None pour toujours générer.
+        root_seed : graine racine du corpus, d'où sont dérivés les flux des instances (cf. instance_seed).
+        workers > 1 : génération répartie sur un pool de processus ; les instances (et leur ordre) sont les mêmes
+        quel que soit le nombre de processus. Avec cache_dir, les processus écrivent le cache et les instances sont
+        relues par projection mémoire plutôt que transférées.
+    """
+    params = benchmark_grid(scenario)
+    jobs = [(cache_dir, scenario, params['nb_satellites'], params['nb_users'], nb_tasks, seed, compact, root_seed)
+            for nb_tasks in params['nb_tasks'] for seed in range(num_instances)]
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for job, instance in zip(jobs, pool.map(_benchmark_job, jobs, chunksize=max(1, len(jobs) // (4 * workers)))):
+                if cache_dir is not None:
+                    instance = cached_ESOP_instance(*job[:7], root_seed=root_seed)
+                yield job[4], job[5], instance
+        return
+    for job in jobs:
+        if cache_dir is not None:
+            instance = cached_ESOP_instance(*job[:7], root_seed=root_seed)
+        else:
+            instance = _benchmark_job(job)
+        yield job[4], job[5], instance
+
+def generate_benchmark_instances(scenario="small_scale", num_instances=30, compact=False, cache_dir=None, root_seed=0, workers=1):
+    """
+        génère 30 instances qui matchent les configurations expérimentales de l'article pour le benchmarking.
+        compact=True : observations stockées en colonnes NumPy (cf. ESOPInstance.compact), pour limiter la mémoire.
+        cache_dir, root_seed, workers : cache de corpus, graine racine et pool de processus (cf. iter_benchmark_instances).
+    """
+    instances = {nb_tasks: [] for nb_tasks in benchmark_grid(scenario)['nb_tasks']}
+    for nb_tasks, _, instance in iter_benchmark_instances(scenario, num_instances, compact, cache_dir, root_seed, workers):
+        instances[nb_tasks].append(instance)
     return instances
 
 if __name__ == "__main__":
     from GreedySolver import greedy_schedule
-    instances = generate_benchmark_instances(scenario="small_scale", num_instances=30)
-    for i in instances:
+    # une instance à la fois (cache de corpus dans .esop_cache)
+    for _, _, inst in iter_benchmark_instances(scenario="small_scale", num_instances=30, cache_dir=".esop_cache"):
         # solve with greedy and print plans
-        for inst in instances[i]:
-            plans = greedy_schedule(inst)
-            print_user_plans(plans)
-            score = assess_solution(inst, plans)
-            print(f"Score total pour l'instance : {sum(score.values())}\n")
\ No newline at end of file
+        plans = greedy_schedule(inst)
+        print_user_plans(plans)
+        score = assess_solution(inst, plans)
+        print(f"Score total pour l'instance : {sum(score.values())}\n")
\ No newline at end of file
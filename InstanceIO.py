@@ -0,0 +1,247 @@
+import json
+import numpy as np
+from ESOPInstance import ESOPInstance, Satellite, ExclusiveWindow, User, Observation, Task
+from ObservationStore import ObservationStore
+
+MAGIC = b"ESOPBIN1"
+_ALIGN = 64
+
+class StringTable():
+    """
+        Table de chaînes (identifiants) : octets UTF-8 concaténés et décalages (n + 1), décodés à l'accès.
+    """
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, strings):
+        encoded = [s.encode() for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+    def column(self, indices):
+        return _StringColumn(self, indices)
+
+class _StringColumn():
+    """
+        Colonne de chaînes désignées par leur indice dans une StringTable (décodage paresseux, ex. oids).
+    """
+    __slots__ = ("_table", "_indices")
+
+    def __init__(self, table, indices):
+        self._table = table
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        return self._table[self._indices[i]]
+
+def _instance_arrays(instance):
+    """
+        Tableaux colonnaires (nom -> tableau NumPy) d'une instance ; les identifiants sont des indices dans la table
+        de chaînes "strings" (satellites, utilisateurs et tâches du store, puis oids).
+    """
+    store = instance.columns
+    names = list(store.sat_ids) + list(store.user_ids) + list(store.task_ids) + [o.oid for o in instance.observations]
+    table = StringTable.build(names)
+    n_sat, n_user, n_task = len(store.sat_ids), len(store.user_ids), len(store.task_ids)
+    sat_pos = store._sat_pos
+    user_pos = store._user_pos
+    obs_pos = {id(o): i for i, o in enumerate(instance.observations)}
+
+    sats, users, tasks = instance.satellites, instance.users, instance.tasks
+    windows = [w for u in users for w in u.exclusive_windows]
+    opportunities = [obs_pos[id(o)] for t in tasks for o in t.opportunities]
+    arrays = {
+        "str_data": table.data,
+        "str_offsets": table.offsets,
+        # identifiants du store : sat_ids, user_ids, task_ids (dans cet ordre dans la table)
+        "sat_t_start": np.array([s.t_start for s in sats], dtype=np.int64),
+        "sat_t_end": np.array([s.t_end for s in sats], dtype=np.int64),
+        "sat_capacity": np.array([s.capacity for s in sats], dtype=np.int64),
+        "sat_transition": np.array([s.transition_time for s in sats], dtype=np.int64),
+        "user_win_ptr": np.cumsum([0] + [len(u.exclusive_windows) for u in users], dtype=np.int64),
+        "win_sat": np.array([sat_pos[w.satellite] for w in windows], dtype=np.int16),
+        "win_t_start": np.array([w.t_start for w in windows], dtype=np.int64),
+        "win_t_end": np.array([w.t_end for w in windows], dtype=np.int64),
+        "task_owner": np.array([user_pos[t.owner] for t in tasks], dtype=np.int16),
+        "task_t_start": np.array([t.t_start for t in tasks], dtype=np.int64),
+        "task_t_end": np.array([t.t_end for t in tasks], dtype=np.int64),
+        "task_duration": np.array([t.duration for t in tasks], dtype=np.int64),
+        "task_reward": np.array([t.reward for t in tasks], dtype=np.int64),
+        "task_opp_ptr": np.cumsum([0] + [len(t.opportunities) for t in tasks], dtype=np.int64),
+        "task_opps": np.array(opportunities, dtype=np.int64),
+        "obs_task": store.task_idx,
+        "obs_sat": store.sat_idx,
+        "obs_owner": store.owner_idx,
+        "obs_t_start": store.t_start,
+        "obs_t_end": store.t_end,
+        "obs_duration": store.duration,
+        "obs_reward": store.reward,
+    }
+    counts = {"sat_ids": n_sat, "user_ids": n_user, "task_ids": n_task,
+              "satellites": len(sats), "users": len(users), "tasks": len(tasks), "observations": len(instance.observations)}
+    return arrays, counts
+
+def write_instance_binary(instance, path):
+    """
+        Écrit l'instance au format binaire : MAGIC, longueur (uint32) et en-tête JSON (paramètres, nombre d'éléments,
+        dtype / longueur / position de chaque tableau), puis les tableaux colonnaires, alignés sur 64 octets.
+    """
+    arrays, counts = _instance_arrays(instance)
+    layout = {}
+    offset = 0
+    for name, a in arrays.items():
+        layout[name] = [a.dtype.str, len(a), offset]
+        offset += -(-a.nbytes // _ALIGN) * _ALIGN
+    header = {"nb_satellites": instance.nb_satellites, "nb_users": instance.nb_users, "nb_tasks": instance.nb_tasks,
+              "horizon": instance.horizon, "counts": counts, "arrays": layout}
+    header_bytes = json.dumps(header).encode()
+    start = -(-(len(MAGIC) + 4 + len(header_bytes)) // _ALIGN) * _ALIGN
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        f.write(b"\0" * (start - f.tell()))
+        for name, a in arrays.items():
+            f.write(np.ascontiguousarray(a).tobytes())
+            f.write(b"\0" * (start + layout[name][2] + -(-a.nbytes // _ALIGN) * _ALIGN - f.tell()))
+
+def _read_header(buf):
+    """
+        En-tête et position des tableaux ; ValueError si le fichier est tronqué (en-tête ou tableaux incomplets).
+    """
+    if len(buf) < len(MAGIC) + 4 or bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Fichier d'instance binaire invalide (en-tête)")
+    n = int(np.frombuffer(bytes(buf[len(MAGIC):len(MAGIC) + 4]), dtype=np.uint32)[0])
+    if len(buf) < len(MAGIC) + 4 + n:
+        raise ValueError("Fichier d'instance binaire tronqué (en-tête)")
+    header = json.loads(bytes(buf[len(MAGIC) + 4:len(MAGIC) + 4 + n]).decode())
+    start = -(-(len(MAGIC) + 4 + n) // _ALIGN) * _ALIGN
+    for name, (dtype, length, offset) in header["arrays"].items():
+        if len(buf) < start + offset + length * np.dtype(dtype).itemsize:
+            raise ValueError(f"Fichier d'instance binaire tronqué (tableau {name})")
+    return header, start
+
+def load_instance_binary(path, mmap=True):
+    """
+        Charge une instance écrite par write_instance_binary.
+
+        Avec mmap=True, le fichier est projeté en mémoire (numpy.memmap) et les colonnes des observations sont des vues
+        sur cette projection, sans copie : les observations de l'instance sont des ObservationView (cf. compact) et
+        leurs oids sont décodés à l'accès. Satellites, utilisateurs et tâches sont reconstruits en objets.
+    """
+    # vues ndarray ordinaires sur la projection (l'indexation d'un numpy.memmap est plus coûteuse)
+    buf = np.asarray(np.memmap(path, dtype=np.uint8, mode="r")) if mmap else np.fromfile(path, dtype=np.uint8)
+    header, start = _read_header(buf)
+    arrays = {}
+    for name, (dtype, length, offset) in header["arrays"].items():
+        dtype = np.dtype(dtype)
+        arrays[name] = buf[start + offset:start + offset + length * dtype.itemsize].view(dtype)
+    counts = header["counts"]
+
+    table = StringTable(arrays["str_data"], arrays["str_offsets"])
+    n_sat, n_user, n_task = counts["sat_ids"], counts["user_ids"], counts["task_ids"]
+    sat_ids = [table[i] for i in range(n_sat)]
+    user_ids = [table[n_sat + i] for i in range(n_user)]
+    task_ids = [table[n_sat + n_user + i] for i in range(n_task)]
+    store = ObservationStore(oids=table.column(np.arange(n_sat + n_user + n_task, len(table))),
+                             task_ids=task_ids, sat_ids=sat_ids, user_ids=user_ids,
+                             task_idx=arrays["obs_task"], sat_idx=arrays["obs_sat"], owner_idx=arrays["obs_owner"],
+                             t_start=arrays["obs_t_start"], t_end=arrays["obs_t_end"],
+                             duration=arrays["obs_duration"], reward=arrays["obs_reward"])
+    views = store.views()
+
+    satellites = [Satellite(sid=sat_ids[k], t_start=int(t0), t_end=int(t1), capacity=int(cap), transition_time=int(tau))
+                  for k, (t0, t1, cap, tau) in enumerate(zip(arrays["sat_t_start"].tolist(), arrays["sat_t_end"].tolist(),
+                                                             arrays["sat_capacity"].tolist(), arrays["sat_transition"].tolist()))]
+    win_sat, win_t_start, win_t_end = arrays["win_sat"].tolist(), arrays["win_t_start"].tolist(), arrays["win_t_end"].tolist()
+    ptr = arrays["user_win_ptr"].tolist()
+    users = [User(uid=user_ids[k], exclusive_windows=[ExclusiveWindow(satellite=sat_ids[win_sat[j]], t_start=win_t_start[j], t_end=win_t_end[j])
+                                                      for j in range(ptr[k], ptr[k + 1])])
+             for k in range(counts["users"])]
+    opps, ptr = arrays["task_opps"].tolist(), arrays["task_opp_ptr"].tolist()
+    tasks = [Task(tid=task_ids[k], owner=user_ids[owner], t_start=t0, t_end=t1, duration=d, reward=r,
+                  opportunities=[views[j] for j in opps[ptr[k]:ptr[k + 1]]])
+             for k, (owner, t0, t1, d, r) in enumerate(zip(arrays["task_owner"].tolist(), arrays["task_t_start"].tolist(),
+                                                           arrays["task_t_end"].tolist(), arrays["task_duration"].tolist(),
+                                                           arrays["task_reward"].tolist()))]
+
+    inst = ESOPInstance(nb_satellites=header["nb_satellites"], nb_users=header["nb_users"], nb_tasks=header["nb_tasks"],
+                        horizon=header["horizon"], satellites=satellites, users=users, tasks=tasks, observations=views)
+    inst._derived("columns", lambda: store)
+    return inst
+
+def _window(value):
+    a, b = value.strip("[]").split(",")
+    return int(a), int(b)
+
+def parse_instance_text(source, horizon=None):
+    """
+        Lit une instance au format texte de ESOPInstance.to_text (objet fichier, chemin ou itérable de lignes),
+        ligne par ligne. Le format n'inclut pas l'horizon : à défaut de horizon, on prend la plus grande fin de
+        visibilité des satellites. Les opportunités des tâches sont leurs observations, dans l'ordre du fichier.
+    """
+    if isinstance(source, str):
+        with open(source) as f:
+            return parse_instance_text(f, horizon)
+    params = {}
+    satellites, users, tasks, observations = [], [], [], []
+    tasks_by_id = {}
+    section = None
+    for line in source:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("["):
+            section = line
+            continue
+        if section == "[Parameters]":
+            key, _, value = line.partition(":")
+            params[key.strip()] = int(value)
+        elif section == "[Satellites]":
+            sid, t0, t1, cap, tau = line.split()
+            satellites.append(Satellite(sid=sid, t_start=int(t0), t_end=int(t1), capacity=int(cap), transition_time=int(tau)))
+        elif section == "[Users]":
+            uid, _, wins = line.partition(" ")
+            windows = []
+            if wins.strip() != "-":
+                for w in wins.split(","):
+                    sid, _, span = w.strip().rpartition(":")
+                    t0, t1 = span.split("-")
+                    windows.append(ExclusiveWindow(satellite=sid, t_start=int(t0), t_end=int(t1)))
+            users.append(User(uid=uid, exclusive_windows=windows))
+        elif section == "[Tasks]":
+            tid, *fields = line.split()
+            kv = dict(f.split("=", 1) for f in fields)
+            t0, t1 = _window(kv["window"])
+            task = Task(tid=tid, owner=kv["owner"], t_start=t0, t_end=t1, duration=int(kv["duration"]), reward=int(kv["reward"]),
+                        opportunities=[])
+            tasks.append(task)
+            tasks_by_id[tid] = task
+        elif section == "[Observations]":
+            oid, *fields = line.split()
+            kv = dict(f.split("=", 1) for f in fields)
+            t0, t1 = _window(kv["window"])
+            obs = Observation(oid=oid, task_id=kv["task"], satellite=kv["sat"], t_start=t0, t_end=t1,
+                              duration=int(kv["duration"]), reward=int(kv["reward"]), owner=kv["owner"])
+            observations.append(obs)
+            if obs.task_id in tasks_by_id:
+                tasks_by_id[obs.task_id].opportunities.append(obs)
+        else:
+            raise ValueError(f"Ligne hors section : {line}")
+    if horizon is None:
+        horizon = max((s.t_end for s in satellites), default=0)
+    return ESOPInstance(nb_satellites=params.get("Satellites", len(satellites)), nb_users=params.get("Exclusive users", len(users) - 1),
+                        nb_tasks=params.get("Tasks", len(tasks)), horizon=horizon,
+                        satellites=satellites, users=users, tasks=tasks, observations=observations)
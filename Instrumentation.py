@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+class TraceRecorder():
+    """
+        Enregistrement d'une exécution : intervalles nommés (spans) et compteurs.
+
+        Les spans sont horodatés par time.perf_counter et rattachés au thread (ou à la tâche asyncio) qui les ouvre ;
+        export au format Chrome trace (chrome://tracing, Perfetto) par write / to_chrome_trace, résumé agrégé
+        par nom avec summary. Les workers des pools de processus ne sont pas enregistrés.
+    """
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans = [] # (nom, début, fin, piste, args)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, end, track, args=None):
+        self.spans.append((name, start, end, track, args))
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """
+            {"spans": nom -> {calls, total, max} (secondes), "counters": nom -> valeur}.
+        """
+        spans = {}
+        for name, start, end, _, _ in self.spans:
+            s = spans.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0})
+            s["calls"] += 1
+            s["total"] += end - start
+            s["max"] = max(s["max"], end - start)
+        return {"spans": spans, "counters": dict(self.counters)}
+
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        us = lambda t: (t - self.t0) * 1e6
+        events = [{"name": name, "ph": "X", "ts": us(start), "dur": (end - start) * 1e6, "pid": pid, "tid": track,
+                   **({"args": args} if args else {})}
+                  for name, start, end, track, args in self.spans]
+        end = max((s[2] for s in self.spans), default=time.perf_counter())
+        events += [{"name": name, "ph": "C", "ts": us(end), "pid": pid, "args": {name: value}}
+                   for name, value in self.counters.items()]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": dict(self.counters)}}
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+# enregistreur actif ; None : instrumentation désactivée (span et count ne font rien)
+recorder = None
+
+class _Span():
+    __slots__ = ("recorder", "name", "args", "start", "track")
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError: # pas de boucle d'événements dans ce thread
+            task = None
+        self.track = id(task) if task is not None else threading.get_ident()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_span(self.name, self.start, time.perf_counter(), self.track, self.args)
+
+class _NullSpan():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+def span(name, **args):
+    """
+        Contexte mesurant un intervalle nommé (args : attributs exportés avec lui) ; sans effet si l'instrumentation
+        est désactivée.
+    """
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name, args or None)
+
+def count(name, n=1):
+    """
+        Incrémente le compteur name ; sans effet si l'instrumentation est désactivée.
+        Dans les boucles chaudes, tester `Instrumentation.recorder is not None` avant de calculer n.
+    """
+    if recorder is not None:
+        recorder.count(name, n)
+
+def traced(name=None):
+    """
+        Décorateur : chaque appel de la fonction est un span (nom : name ou nom qualifié de la fonction).
+    """
+    def decorate(f):
+        label = name or f.__qualname__
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if recorder is None:
+                return f(*args, **kwargs)
+            with _Span(recorder, label, None):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@contextmanager
+def tracing(path=None):
+    """
+        Active l'instrumentation le temps du bloc et fournit l'enregistreur ; path : fichier Chrome trace écrit à la sortie.
+    """
+    global recorder
+    previous, rec = recorder, TraceRecorder()
+    recorder = rec
+    try:
+        yield rec
+    finally:
+        recorder = previous
+        if path is not None:
+            rec.write(path)
@@ -0,0 +1,258 @@
+import json
+import struct
+
+# types de message (octet d'en-tête, bits de poids fort : options)
+ANNOUNCE, BID, AWARD, PLAN, START = 1, 2, 3, 4, 5
+_TYPE_MASK = 0x0F
+_FLOAT = 0x80   # valeur en double IEEE 754 (8 octets) plutôt qu'en entier varint
+_VALUE = 0x40   # annonce : valeur (regret) présente ; attribution : pas d'ordonnancement
+_LOADS = 0x20   # attribution : charges des autres exclusifs par satellite jointes
+
+def write_varint(buf, n):
+    """
+        Entier positif au format LEB128 (7 bits par octet).
+    """
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+def read_varint(data, pos):
+    n, shift = 0, 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+def _zigzag(n):
+    return 2 * n if n >= 0 else -2 * n - 1
+
+def _unzigzag(z):
+    return z >> 1 if not z & 1 else -((z + 1) >> 1)
+
+class BinaryCodec():
+    """
+        Format binaire compact des messages d'enchères (annonces, offres, attributions, plans).
+
+        Les identifiants sont des indices dans l'instance, connue des deux côtés du lien : requête et utilisateur par
+        leur rang dans instance.tasks / instance.users, observation par son rang parmi les opportunités de sa requête.
+        Entiers en varint (LEB128) ; valeurs entières en varint zigzag, les autres en double.
+        Ordonnancements codés en delta : date de début relative au début de la fenêtre de l'observation (attribution),
+        ou à la date précédente sur le même satellite (plan) ; listes de requêtes triées et codées par écarts.
+
+        vocabulary : tables d'indices d'un autre codec (cf. vocabulary()), pour échanger avec lui depuis une
+        sous-instance (agent distant) ; les observations décodées sont alors celles de instance.
+    """
+    def __init__(self, instance, vocabulary=None):
+        self.instance = instance
+        if vocabulary is None:
+            vocabulary = ([u.uid for u in instance.users], [s.sid for s in instance.satellites],
+                          {t.tid: (i, [o.oid for o in t.opportunities]) for i, t in enumerate(instance.tasks)})
+        user_ids, sat_ids, tasks = vocabulary
+        self._user_ids = list(user_ids)
+        self._sat_ids = list(sat_ids)
+        self._tasks = dict(tasks)
+        self._task_ids = {pos: tid for tid, (pos, _) in self._tasks.items()}
+        self._task_pos = {tid: pos for tid, (pos, _) in self._tasks.items()}
+        self._opps = {pos: oids for pos, oids in self._tasks.values()}
+        self._user_pos = {uid: i for i, uid in enumerate(self._user_ids)}
+        self._sat_pos = {sid: i for i, sid in enumerate(self._sat_ids)}
+        self._opp_rank = {oid: k for _, oids in self._tasks.values() for k, oid in enumerate(oids)}
+
+    def vocabulary(self, task_ids=None):
+        """
+            Tables d'indices (utilisateurs, satellites, requêtes et leurs opportunités), restreintes aux requêtes task_ids.
+        """
+        tasks = self._tasks if task_ids is None else {tid: self._tasks[tid] for tid in task_ids}
+        return list(self._user_ids), list(self._sat_ids), tasks
+
+    def _value(self, buf, value, flags=0):
+        if float(value).is_integer():
+            buf[0] |= flags
+            write_varint(buf, _zigzag(int(value)))
+        else:
+            buf[0] |= flags | _FLOAT
+            buf += struct.pack("<d", value)
+
+    def _read_value(self, head, data, pos):
+        if head & _FLOAT:
+            return struct.unpack_from("<d", data, pos)[0], pos + 8
+        z, pos = read_varint(data, pos)
+        return _unzigzag(z), pos
+
+    def _obs(self, buf, obs):
+        write_varint(buf, self._task_pos[obs.task_id])
+        write_varint(buf, self._opp_rank[obs.oid])
+
+    def _read_obs(self, data, pos):
+        task, pos = read_varint(data, pos)
+        rank, pos = read_varint(data, pos)
+        return self.instance.obs_by_id[self._opps[task][rank]], pos
+
+    def announce(self, user_id, task_ids, value=None):
+        """
+            Annonce des requêtes task_ids à user_id (value : information jointe, p. ex. le regret de l'utilisateur).
+        """
+        buf = bytearray([ANNOUNCE])
+        write_varint(buf, self._user_pos[user_id])
+        positions = sorted(self._task_pos[tid] for tid in task_ids)
+        write_varint(buf, len(positions))
+        prev = 0
+        for p in positions:
+            write_varint(buf, p - prev)
+            prev = p
+        if value is not None:
+            self._value(buf, value, _VALUE)
+        return bytes(buf)
+
+    def bid(self, task_id, user_id, value):
+        buf = bytearray([BID])
+        write_varint(buf, self._task_pos[task_id])
+        write_varint(buf, self._user_pos[user_id])
+        self._value(buf, value)
+        return bytes(buf)
+
+    def award(self, task_id, user_id, schedule, loads=None):
+        """
+            Notification au gagnant : schedule = (Observation, t_start) ou None ; loads : sid -> nombre d'observations
+            planifiées par les autres exclusifs (capacité partagée), un varint par satellite de l'instance.
+        """
+        buf = bytearray([AWARD])
+        write_varint(buf, self._task_pos[task_id])
+        write_varint(buf, self._user_pos[user_id])
+        if schedule is None:
+            buf[0] |= _VALUE
+        else:
+            obs, t = schedule
+            write_varint(buf, self._opp_rank[obs.oid])
+            write_varint(buf, _zigzag(t - obs.t_start))
+        if loads is not None:
+            buf[0] |= _LOADS
+            for sid in self._sat_ids:
+                write_varint(buf, loads.get(sid, 0))
+        return bytes(buf)
+
+    def start(self, user_id, round_num):
+        """
+            Début d'un tour d'enchères : l'utilisateur repart de son plan de référence.
+        """
+        buf = bytearray([START])
+        write_varint(buf, self._user_pos[user_id])
+        write_varint(buf, round_num)
+        return bytes(buf)
+
+    def plan(self, user_id, plan):
+        """
+            Plan d'un utilisateur (sid -> liste (Observation, t_start)) ; chaque satellite trié par date.
+            Tous les satellites donnés sont codés, même vides (mise à jour partielle d'un plan).
+        """
+        buf = bytearray([PLAN])
+        write_varint(buf, self._user_pos[user_id])
+        write_varint(buf, len(plan))
+        for sid, obs_list in plan.items():
+            write_varint(buf, self._sat_pos[sid])
+            write_varint(buf, len(obs_list))
+            prev = 0
+            for obs, t in sorted(obs_list, key=lambda p: p[1]):
+                self._obs(buf, obs)
+                write_varint(buf, t - prev)
+                prev = t
+        return bytes(buf)
+
+    def decode(self, data):
+        """
+            Message décodé : (type, champs...) avec les objets de l'instance (cf. méthodes d'encodage).
+        """
+        head = data[0]
+        kind = head & _TYPE_MASK
+        pos = 1
+        if kind == ANNOUNCE:
+            user, pos = read_varint(data, pos)
+            n, pos = read_varint(data, pos)
+            tids, p = [], 0
+            for _ in range(n):
+                d, pos = read_varint(data, pos)
+                p += d
+                tids.append(self._task_ids[p])
+            value = self._read_value(head, data, pos)[0] if head & _VALUE else None
+            return "announce", self._user_ids[user], tids, value
+        if kind == BID:
+            task, pos = read_varint(data, pos)
+            user, pos = read_varint(data, pos)
+            return "bid", self._task_ids[task], self._user_ids[user], self._read_value(head, data, pos)[0]
+        if kind == AWARD:
+            task, pos = read_varint(data, pos)
+            user, pos = read_varint(data, pos)
+            schedule = None
+            if not head & _VALUE:
+                rank, pos = read_varint(data, pos)
+                offset, pos = read_varint(data, pos)
+                obs = self.instance.obs_by_id[self._opps[task][rank]]
+                schedule = (obs, obs.t_start + _unzigzag(offset))
+            loads = None
+            if head & _LOADS:
+                loads = {}
+                for sid in self._sat_ids:
+                    loads[sid], pos = read_varint(data, pos)
+            return "award", self._task_ids[task], self._user_ids[user], schedule, loads
+        if kind == START:
+            user, pos = read_varint(data, pos)
+            return "start", self._user_ids[user], read_varint(data, pos)[0]
+        if kind == PLAN:
+            user, pos = read_varint(data, pos)
+            nsat, pos = read_varint(data, pos)
+            plan = {}
+            for _ in range(nsat):
+                sat, pos = read_varint(data, pos)
+                n, pos = read_varint(data, pos)
+                items, t = [], 0
+                for _ in range(n):
+                    obs, pos = self._read_obs(data, pos)
+                    d, pos = read_varint(data, pos)
+                    t += d
+                    items.append((obs, t))
+                plan[self._sat_ids[sat]] = items
+            return "plan", self._user_ids[user], plan
+        raise ValueError(f"Type de message inconnu : {kind}")
+
+class JsonCodec():
+    """
+        Mêmes messages en JSON compact, identifiants en clair (référence lisible pour comparer les volumes).
+        Sans table d'indices : vocabulary n'est accepté que pour l'interface commune avec BinaryCodec.
+    """
+    def __init__(self, instance, vocabulary=None):
+        self.instance = instance
+
+    def vocabulary(self, task_ids=None):
+        return None
+
+    @staticmethod
+    def _dump(message):
+        return json.dumps(message, separators=(",", ":")).encode()
+
+    def announce(self, user_id, task_ids, value=None):
+        return self._dump(["announce", user_id, list(task_ids), value])
+
+    def bid(self, task_id, user_id, value):
+        return self._dump(["bid", task_id, user_id, value])
+
+    def award(self, task_id, user_id, schedule, loads=None):
+        return self._dump(["award", task_id, user_id, None if schedule is None else [schedule[0].oid, schedule[1]], loads])
+
+    def start(self, user_id, round_num):
+        return self._dump(["start", user_id, round_num])
+
+    def plan(self, user_id, plan):
+        return self._dump(["plan", user_id, {sid: [[o.oid, t] for o, t in obs_list] for sid, obs_list in plan.items()}])
+
+    def decode(self, data):
+        message = json.loads(data)
+        obs_by_id = self.instance.obs_by_id
+        if message[0] == "award" and message[3] is not None:
+            message[3] = (obs_by_id[message[3][0]], message[3][1])
+        elif message[0] == "plan":
+            message[2] = {sid: [(obs_by_id[oid], t) for oid, t in items] for sid, items in message[2].items()}
+        return tuple(message)
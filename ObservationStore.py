@@ -0,0 +1,132 @@
+import numpy as np
+
+class ObservationStore():
+    """
+        Représentation colonnaire (struct-of-arrays) des observations d'une instance.
+
+        Les champs numériques sont des tableaux NumPy alignés (une case par observation) ; satellite, owner et tâche
+        sont codés par leur indice dans sat_ids / user_ids / task_ids. Les identifiants (oid) restent une liste Python.
+    """
+    def __init__(self, oids, task_ids, sat_ids, user_ids, task_idx, sat_idx, owner_idx, t_start, t_end, duration, reward):
+        self.oids = oids
+        self.task_ids = task_ids
+        self.sat_ids = sat_ids
+        self.user_ids = user_ids
+        self.task_idx = task_idx
+        self.sat_idx = sat_idx
+        self.owner_idx = owner_idx
+        self.t_start = t_start
+        self.t_end = t_end
+        self.duration = duration
+        self.reward = reward
+        self._task_pos = {tid: i for i, tid in enumerate(task_ids)}
+        self._sat_pos = {sid: i for i, sid in enumerate(sat_ids)}
+        self._user_pos = {uid: i for i, uid in enumerate(user_ids)}
+
+    @classmethod
+    def from_instance(cls, instance):
+        """
+            Construit le store à partir des observations (objets) d'une instance.
+        """
+        sat_pos = {s.sid: i for i, s in enumerate(instance.satellites)}
+        user_pos = {u.uid: i for i, u in enumerate(instance.users)}
+        task_pos = {t.tid: i for i, t in enumerate(instance.tasks)}
+        # satellites / users / tâches référencés mais absents des listes (instances partielles)
+        for o in instance.observations:
+            for pos, key in ((sat_pos, o.satellite), (user_pos, o.owner), (task_pos, o.task_id)):
+                if key not in pos:
+                    pos[key] = len(pos)
+        sat_ids, user_ids, task_ids = list(sat_pos), list(user_pos), list(task_pos)
+
+        obs = instance.observations
+        n = len(obs)
+        return cls(oids=[o.oid for o in obs], task_ids=task_ids, sat_ids=sat_ids, user_ids=user_ids,
+                   task_idx=np.fromiter((task_pos[o.task_id] for o in obs), dtype=np.int32, count=n),
+                   sat_idx=np.fromiter((sat_pos[o.satellite] for o in obs), dtype=np.int16, count=n),
+                   owner_idx=np.fromiter((user_pos[o.owner] for o in obs), dtype=np.int16, count=n),
+                   t_start=np.fromiter((o.t_start for o in obs), dtype=np.int64, count=n),
+                   t_end=np.fromiter((o.t_end for o in obs), dtype=np.int64, count=n),
+                   duration=np.fromiter((o.duration for o in obs), dtype=np.int64, count=n),
+                   reward=np.fromiter((o.reward for o in obs), dtype=np.int64, count=n))
+
+    def __len__(self):
+        return len(self.oids)
+
+    def __getitem__(self, i):
+        return ObservationView(self, i)
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.task_idx, self.sat_idx, self.owner_idx, self.t_start, self.t_end, self.duration, self.reward))
+
+    def select(self, satellite=None, owner=None, task_id=None, t_min=None, t_max=None, min_reward=None):
+        """
+            Filtre vectorisé : indices des observations vérifiant tous les critères donnés.
+            t_min / t_max bornent la fenêtre de l'observation ([t_start, t_end] incluse dans [t_min, t_max]).
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if satellite is not None:
+            mask &= self.sat_idx == self._sat_pos.get(satellite, -1)
+        if owner is not None:
+            mask &= self.owner_idx == self._user_pos.get(owner, -1)
+        if task_id is not None:
+            mask &= self.task_idx == self._task_pos.get(task_id, -1)
+        if t_min is not None:
+            mask &= self.t_start >= t_min
+        if t_max is not None:
+            mask &= self.t_end <= t_max
+        if min_reward is not None:
+            mask &= self.reward >= min_reward
+        return np.flatnonzero(mask)
+
+    def views(self, indices=None):
+        """
+            Vues (ObservationView) sur les observations d'indices donnés (toutes par défaut).
+        """
+        if indices is None:
+            indices = range(len(self))
+        return [ObservationView(self, int(i)) for i in indices]
+
+class ObservationView():
+    """
+        Vue légère (__slots__) sur une ligne d'un ObservationStore, avec les mêmes attributs qu'Observation.
+    """
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store, i):
+        self._store = store
+        self._i = i
+
+    @property
+    def oid(self):
+        return self._store.oids[self._i]
+
+    @property
+    def task_id(self):
+        return self._store.task_ids[self._store.task_idx[self._i]]
+
+    @property
+    def satellite(self):
+        return self._store.sat_ids[self._store.sat_idx[self._i]]
+
+    @property
+    def owner(self):
+        return self._store.user_ids[self._store.owner_idx[self._i]]
+
+    @property
+    def t_start(self):
+        return int(self._store.t_start[self._i])
+
+    @property
+    def t_end(self):
+        return int(self._store.t_end[self._i])
+
+    @property
+    def duration(self):
+        return int(self._store.duration[self._i])
+
+    @property
+    def reward(self):
+        return int(self._store.reward[self._i])
+
+    def __repr__(self):
+        return f"ObservationView({self.oid})"
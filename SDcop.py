@@ -1,19 +1,24 @@
 import os
+import threading
 import yaml
-from ESOPInstance import ESOPInstance, Observation, Task
-from GreedySolver import greedy_schedule, greedy_schedule_P_u
+from ESOPInstance import ESOPInstance
+from DcopModel import DcopModel
+from GreedySolver import greedy_schedule, UserGreedyState
+from LRUCache import LRUCache
+import Instrumentation
 
 def build_restricted_plan_for_user(instance, user_id, extra_obs, accepted_u0_obs):
     """
     Construit un plan glouton pour user_id en respectant STRICTEMENT les fenêtres exclusives.
     """
-    u = next(user for user in instance.users if user.uid == user_id)
+    windows = instance.exclusive_index
+    accepted_u0_obs = set(accepted_u0_obs)
     base_obs = [o for o in instance.observations if (o.owner == user_id) or (o in accepted_u0_obs)]
     
     if extra_obs is not None:
         base_obs = base_obs + [extra_obs]
 
-    sats_by_id = {s.sid: s for s in instance.satellites}
+    sats_by_id = instance.sats_by_id
     plans = {s.sid: [] for s in instance.satellites}
     
     # TRI PAR REWARD DÉCROISSANT (GREEDY)
@@ -27,17 +32,10 @@ def build_restricted_plan_for_user(instance, user_id, extra_obs, accepted_u0_obs
             continue
         
         # check fenêtres exclusives
-        exclusives_on_sat = [w for w in u.exclusive_windows if w.satellite == sat.sid]
-        
-        if exclusives_on_sat:
+        if windows.has_windows(user_id, sat.sid):
             # L'obs DOIT être dans AU MOINS UNE exclusive
-            in_any_exclusive = any(obs.t_start >= w.t_start and obs.t_end <= w.t_end for w in exclusives_on_sat)
-            
-            if not in_any_exclusive:
-                continue  # Skip cette obs (pas dans une exclusive)
-            
             # Calculer la fenêtre (intersection obs ∩ exclusives valides), on prend la plus large fenêtre où l'obs est compatible
-            valid_windows = [w for w in exclusives_on_sat if obs.t_start >= w.t_start and obs.t_end <= w.t_end]
+            valid_windows = windows.windows_containing(user_id, sat.sid, obs.t_start, obs.t_end)
             
             if not valid_windows:
                 continue
@@ -102,250 +100,466 @@ def build_restricted_plan_for_user(instance, user_id, extra_obs, accepted_u0_obs
 def compute_reward_from_plan(plan_for_user):
     return sum(obs.reward for sat_plan in plan_for_user.values() for (obs, _) in sat_plan)
 
-_plan_cache = {}
+class PiCache():
+    """
+        Évaluations de pi(o, M_u) mémoïsées, pour une suite de S-DCOP sur une même instance.
 
-def compute_pi(instance, user_id, obs_candidate, allocated_obs):
+        M_u est l'état glouton de u avec les observations de u0 qui lui sont déjà allouées (UserGreedyState) ;
+        pi est le gain de reward à y insérer o (UserGreedyState.marginal_gain : seul le suffixe de l'ordre glouton
+        est rejoué). Les valeurs sont indexées par (instance, version, utilisateur, obs, frozenset des obs allouées),
+        les états par (instance, version, utilisateur, frozenset des obs allouées) ; les deux caches sont bornés (LRU).
+        Quand une allocation est validée (commit), le nouvel état est obtenu par insertion dans l'ancien et les
+        entrées de l'ancienne allocation de u sont retirées.
     """
-        Calcule π = reward_after - reward_before
-        en créant une COPIE de obs_candidate avec owner=user_id
+    def __init__(self, maxsize=65536, state_maxsize=256):
+        self.values = LRUCache(maxsize=maxsize)
+        self.states = LRUCache(maxsize=state_maxsize)
+        self.invalidations = 0
+        self._lock = threading.Lock() # les S-DCOP peuvent être préparés dans plusieurs threads (pipeline)
+
+    @staticmethod
+    def _state_key(instance, user_id, allocated_obs):
+        return (instance, instance.version, user_id, frozenset(o.oid for o in allocated_obs))
+
+    def state(self, instance, user_id, allocated_obs):
+        """
+            État M_u (à ne pas modifier : il est partagé par le cache).
+        """
+        key = self._state_key(instance, user_id, allocated_obs)
+        with self._lock:
+            state = self.states.get(key)
+        if state is None:
+            state = UserGreedyState(instance, user_id, allocated_obs)
+            with self._lock:
+                self.states.put(key, state)
+        return state
+
+    def pi(self, instance, user_id, obs, allocated_obs):
+        """
+            pi(o, M_u) > 0, ou None si o n'est pas insérée dans le plan de u (ou n'apporte aucun gain).
+        """
+        state_key = self._state_key(instance, user_id, allocated_obs)
+        key = state_key[:3] + (obs.oid, state_key[3])
+        with self._lock:
+            value = self.values.get(key, _MISSING)
+        Instrumentation.count("sdcop.pi_calls")
+        if value is _MISSING:
+            Instrumentation.count("sdcop.pi_computed")
+            gain, placements = self.state(instance, user_id, allocated_obs).marginal_gain([obs])
+            value = gain if placements and gain > 0 else None
+            with self._lock:
+                self.values.put(key, value)
+        return value
+
+    def commit(self, instance, user_id, allocated_before, obs):
+        """
+            Allocation de obs à user_id (allocated_before : ses obs allouées avant) : l'état suivant est calculé par
+            insertion dans l'état courant, et les entrées devenues inutiles pour u sont invalidées.
+        """
+        state = self.state(instance, user_id, allocated_before).copy()
+        if not state.insert([obs]):
+            state = UserGreedyState(instance, user_id, list(allocated_before) + [obs])
+        old = self._state_key(instance, user_id, allocated_before)
+        with self._lock:
+            self.invalidations += self.values.pop_matching(lambda k: k[:3] == old[:3] and k[4] == old[3])
+            self.states.pop(old)
+            self.states.put(self._state_key(instance, user_id, list(allocated_before) + [obs]), state)
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+            self.states.clear()
+            self.invalidations = 0
+
+    def stats(self):
+        return {"values": self.values.stats(), "states": self.states.stats(), "invalidations": self.invalidations}
+
+_MISSING = object()
+
+def instance_pi_cache(instance):
     """
-    cache_key = (user_id, tuple(sorted([o.oid for o in allocated_obs])))
-    
-    if cache_key not in _plan_cache:
-        plan_before = greedy_schedule_P_u(instance, user_id)
-        _plan_cache[cache_key] = sum(o.reward for sat_plan in plan_before.values() 
-                                   for o, _ in sat_plan)
-    
-    reward_before = _plan_cache[cache_key]
-    
-    # Créer une COPIE de obs_candidate avec owner=user_id
-    obs_copy = Observation(oid=f"{obs_candidate.oid}_pi_{user_id}",
-                        task_id=obs_candidate.task_id,
-                        satellite=obs_candidate.satellite,
-                        t_start=obs_candidate.t_start,
-                        t_end=obs_candidate.t_end,
-                        duration=obs_candidate.duration,
-                        reward=obs_candidate.reward,
-                        owner=user_id)
-    
-    # Création d'une sous-instance AVEC obs_copy
-    user = next(u for u in instance.users if u.uid == user_id)
-    
-    new_obs = [o for o in instance.observations if o.owner == user_id]
-    new_obs.append(obs_copy)
-    new_tasks = [t for t in instance.tasks if t.owner == user_id]
-    
-    if obs_candidate.task_id not in [t.tid for t in new_tasks]: # Ajouter la task si elle n'existe pas
-        orig_task = next((t for t in instance.tasks if t.tid == obs_candidate.task_id), None)
-        if orig_task:
-            # Créer copie
-            task_copy = Task(tid=orig_task.tid,
-                            owner=user_id,  # <- owner=user_id
-                            t_start=orig_task.t_start,
-                            t_end=orig_task.t_end,
-                            duration=orig_task.duration,
-                            reward=orig_task.reward,
-                            opportunities=orig_task.opportunities)
-            new_tasks.append(task_copy)
-    
-    inst_with_obs = ESOPInstance(nb_satellites=instance.nb_satellites, nb_users=1, nb_tasks=len(new_tasks), horizon=instance.horizon,
-                                 satellites=instance.satellites, users=[user], tasks=new_tasks, observations=new_obs)
-    
-    plan_after = greedy_schedule(inst_with_obs).get(user_id, {})
-    reward_after = sum(o.reward for sat_plan in plan_after.values() for o, _ in sat_plan)
-    
-    # Vérifier que obs_copy est bien dans le plan
-    obs_inserted = any(obs_copy.oid == o.oid for sat_plan in plan_after.values() for o, _ in sat_plan)
-    if not obs_inserted:
-        return None
-    
-    pi_val = reward_after - reward_before
-    assert pi_val > 0, "pi doit être strictement positif si l'observation est insérée" # le coût sera mis en négatif dans le yaml
-    return pi_val
+        Cache par défaut de compute_pi, rattaché à l'instance : libéré avec elle et invalidé avec ses index
+        (sdcop_with_pydcop utilise un cache propre à chaque exécution).
+    """
+    return instance._derived("pi_cache", PiCache)
+
+def compute_pi(instance, user_id, obs_candidate, allocated_obs, cache=None):
+    """
+        Calcule π = reward_after - reward_before : gain de reward de user_id s'il prend en charge obs_candidate,
+        son plan courant M_u comprenant déjà les observations allocated_obs. None si l'observation n'est pas insérée.
+    """
+    cache = instance_pi_cache(instance) if cache is None else cache
+    return cache.pi(instance, user_id, obs_candidate, allocated_obs)
 
 import yaml
 from ESOPInstance import ESOPInstance, Task
 
-def generate_sdcop_yaml_for_request(instance, request, user_allocated_obs, user_obs_times, output_path):
+def build_sdcop_for_request(instance, request, user_allocated_obs, user_obs_times, distribution="owner", cache=None):
     """
-        Génère un fichier YAML DCOP pour une requête centrale donnée.
+        Construit le DCOP (dict au format YAML pydcop) d'une requête centrale donnée, ou None s'il est vide.
+    """
+    model = build_sdcop_model_for_request(instance, request, user_allocated_obs, user_obs_times, distribution, cache)
+    return model.to_dict() if model is not None else None
+
+def sdcop_candidates(instance, request):
+    """
+        Couples (observation de u0, exclusif) candidats pour une requête centrale : l'observation chevauche
+        une fenêtre exclusive de l'utilisateur sur son satellite.
+    """
+    candidate_obs = [o for o in instance.obs_by_task.get(request.tid, []) if o.owner == "u0"]
+    windows = instance.exclusive_index
+    for obs in candidate_obs:
+        for user_id in windows.users_overlapping(obs.satellite, obs.t_start, obs.t_end):
+            yield obs, user_id
+
+def build_sdcop_model_for_request(instance, request, user_allocated_obs, user_obs_times, distribution="owner", cache=None):
+    """
+        Construit le DCOP (DcopModel) d'une requête centrale donnée, ou None s'il est vide.
+        distribution : "owner" (chaque exclusif héberge ses variables) ou "aux" (agents auxiliaires), cf. build_DCOP_model.
+        cache : PiCache des évaluations de pi (par défaut instance_pi_cache(instance)).
     """
     agents = [u.uid for u in instance.users if u.uid != "u0"]
     if not agents:
-        return False
-    
-    candidate_obs = [o for o in instance.observations 
-                     if o.task_id == request.tid and o.owner == "u0"]
-    
-    if not candidate_obs:
-        return False
+        return None
     
-    variables_section = {}
-    constraints_section = {}
+    model = DcopModel(f"sdcop_{request.tid}")
     vars_by_request = []
     vars_by_user_sat = {}
     
-    exclusives_by_user = {u.uid: u.exclusive_windows for u in instance.users if u.uid != "u0"}
-    
-    for obs in candidate_obs: # variables
-        for user_id in agents:
-            windows = exclusives_by_user[user_id]
-            
-            in_exclusive = any(
-                w.satellite == obs.satellite and
-                not (w.t_end <= obs.t_start or w.t_start >= obs.t_end)
-                for w in windows
-            )
-            
-            if not in_exclusive:
-                continue
-            
-            pi = compute_pi(instance, user_id, obs, user_allocated_obs.get(user_id, []))
-            
-            if pi is None:
-                continue
-            
-            v_name = f"x_{user_id}_{obs.oid}"
-            
-            variables_section[v_name] = {
-                "domain": "binary"
-            }
-            
-            vars_by_request.append(v_name)
-            key = (user_id, obs.satellite)
-            vars_by_user_sat.setdefault(key, []).append(v_name)
-            
-            c_name = f"c_pi_{user_id}_{obs.oid}"
-            constraints_section[c_name] = {
-                "type": "intention",
-                "function": f"{-pi} * {v_name}"
-            }
+    for obs, user_id in sdcop_candidates(instance, request): # variables
+        pi = compute_pi(instance, user_id, obs, user_allocated_obs.get(user_id, []), cache)
+        
+        if pi is None:
+            continue
+        
+        v_name = f"x_{user_id}_{obs.oid}"
+        model.add_variable(v_name, agent=user_id)
+        
+        vars_by_request.append(v_name)
+        key = (user_id, obs.satellite)
+        vars_by_user_sat.setdefault(key, []).append(v_name)
+        
+        model.add_unary(f"c_pi_{user_id}_{obs.oid}", v_name, -pi)
     
-    if not variables_section:
-        return False
+    if not model.nb_variables:
+        return None
     
-    nb_vars = len(variables_section)
-    print(f"> DCOP {request.tid}: {nb_vars} variables")
+    print(f"> DCOP {request.tid}: {model.nb_variables} variables")
     
     # contrainte au plus 1
     if len(vars_by_request) > 1:
-        c_name = f"c_atmost1_{request.tid}"
-        sum_expr = " + ".join(vars_by_request)
-        
-        constraints_section[c_name] = {"type": "intention", "function": f"0 if {sum_expr} <= 1 else 1e9"}
+        model.add_linear(f"c_atmost1_{request.tid}", vars_by_request, 1)
     
-    # contrainte capacité satellite
-    sat_capacity = {s.sid: s.capacity for s in instance.satellites}
+    # contrainte capacité satellite (une par couple (utilisateur, satellite))
+    sat_capacity = {sid: s.capacity for sid, s in instance.sats_by_id.items()}
     for (user_id, sat_id), vnames in vars_by_user_sat.items():
-        c_name = f"c_cap_{sat_id}_{request.tid}"
-        cap = sat_capacity[sat_id]
-        
-        sum_expr = " + ".join(vnames) if len(vnames) > 1 else vnames[0]
-        
-        constraints_section[c_name] = {"type": "intention", "function": f"0 if {sum_expr} <= {cap} else 1e9"}
-    
-    # !!! REAJOUTER agents auxiliaires AVEC capacité
-    nb_computations = len(variables_section) + len(constraints_section)
+        model.add_linear(f"c_cap_{user_id}_{sat_id}_{request.tid}", vnames, sat_capacity[sat_id])
     
     agents_list = list(agents)
-    while len(agents_list) < nb_computations:
-        agents_list.append(f"aux_{len(agents_list)}")
+    if distribution == "aux":
+        # !!! REAJOUTER agents auxiliaires AVEC capacité
+        nb_computations = model.nb_variables + model.nb_constraints
+        while len(agents_list) < nb_computations:
+            agents_list.append(f"aux_{len(agents_list)}")
+    elif distribution != "owner":
+        raise ValueError(f"Mode de distribution inconnu : {distribution}")
     
-    agents_with_capacity = {}
     for agent_id in agents_list:
-        agents_with_capacity[agent_id] = {"capacity": 1000} # grande capacité arbitraire pour agents auxiliaires
-    
-    dcop_dict = {
-        "name": f"sdcop_{request.tid}",
-        "objective": "min",
-        "domains": {"binary": {"values": [0, 1]}},
-        "agents": agents_with_capacity,
-        "variables": variables_section,
-        "constraints": constraints_section
-    }
-    
-    with open(output_path, 'w') as f:
-        yaml.dump(dcop_dict, f, sort_keys=False)
+        model.add_agent(agent_id, capacity=1000) # grande capacité arbitraire pour agents auxiliaires
+    return model
+
+def generate_sdcop_yaml_for_request(instance, request, user_allocated_obs, user_obs_times, output_path, distribution="owner", algo="dpop"):
+    """
+        Génère un fichier YAML DCOP pour une requête centrale donnée.
+        En mode "owner", la répartition des calculs est écrite à côté (output_path + ".dist.yaml").
+    """
+    model = build_sdcop_model_for_request(instance, request, user_allocated_obs, user_obs_times, distribution)
+    if model is None:
+        return False
     
+    model.write_yaml(output_path)
+    if distribution == "owner":
+        model.write_distribution(output_path + ".dist.yaml", algo)
     return True
 
 import tempfile
 import os
 import json
-from DCOP import run_pydcop_solve, extract_metrics_from_output, parse_assignment_from_output
-def sdcop_with_pydcop(instance: ESOPInstance, timeout_per_dcop=5000, algo="dpop"):
+import asyncio
+from collections import deque
+from DCOP import run_pydcop_solve, run_pydcop_solve_async, extract_metrics_from_output, parse_assignment_from_output
+from DpopSolver import solve_dcop_dict
+from AllocationSolver import solve_dcop_model_native
+@Instrumentation.traced("sdcop.solve")
+def _solve_sdcop_model(model, backend, algo, timeout, distribution):
+    """
+        Résout un modèle S-DCOP avec le backend demandé ; retourne la sortie au format JSON de pydcop (ou None).
+    """
+    if backend == "native":
+        return json.dumps(solve_dcop_model_native(model))
+    if backend == "inprocess":
+        result = solve_dcop_dict(model.to_dict(), algo=algo, timeout=timeout)
+        return json.dumps(result) if result is not None else None
+
+    yaml_path, dist_path = None, None
+    try:
+        yaml_path, dist_path = _write_sdcop_files(model, algo, distribution)
+        return run_pydcop_solve(yaml_path, algo=algo, timeout=timeout, distribution=dist_path)
+    finally:
+        _remove_files(yaml_path, dist_path)
+
+@Instrumentation.traced("sdcop.write_yaml")
+def _write_sdcop_files(model, algo, distribution):
+    """
+        Écrit le modèle dans un fichier YAML temporaire (et sa répartition en mode "owner") ; retourne les chemins.
+    """
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
+        yaml_path = f.name
+        model.write_yaml(f)
+    dist_path = None
+    if distribution == "owner":
+        dist_path = yaml_path + ".dist.yaml"
+        model.write_distribution(dist_path, algo)
+    return yaml_path, dist_path
+
+def _remove_files(*paths):
+    for path in paths:
+        if path and os.path.exists(path):
+            try:
+                os.unlink(path)
+            except:
+                pass
+
+async def _solve_sdcop_model_async(model, backend, algo, timeout, distribution):
+    """
+        Version asyncio de _solve_sdcop_model : pydcop tourne dans un sous-processus asyncio, les backends en mémoire
+        dans un thread.
+    """
+    if backend != "subprocess":
+        return await asyncio.to_thread(_solve_sdcop_model, model, backend, algo, timeout, distribution)
+    yaml_path, dist_path = None, None
+    try:
+        with Instrumentation.span("sdcop.solve"):
+            yaml_path, dist_path = await asyncio.to_thread(_write_sdcop_files, model, algo, distribution)
+            return await run_pydcop_solve_async(yaml_path, algo=algo, timeout=timeout, distribution=dist_path)
+    finally:
+        _remove_files(yaml_path, dist_path)
+
+def sdcop_batches(instance, requests, batch_size):
+    """
+        Découpe requests (dans l'ordre) en lots consécutifs d'au plus batch_size requêtes indépendantes :
+        leurs candidats touchent des couples (utilisateur, satellite) disjoints. Un lot s'arrête au premier conflit.
+        Les pi d'un lot sont évalués sur les plans M_u du début du lot.
+    """
+    batch, used = [], set()
+    for request in requests:
+        pairs = {(user_id, obs.satellite) for obs, user_id in sdcop_candidates(instance, request)}
+        if batch and (len(batch) >= batch_size or pairs & used):
+            yield batch
+            batch, used = [], set()
+        batch.append(request)
+        used |= pairs
+    if batch:
+        yield batch
+
+@Instrumentation.traced("sdcop.build")
+def _build_batch_model(instance, batch, user_allocated_obs, user_obs_times, distribution, cache):
+    """
+        Modèle S-DCOP d'un lot de requêtes (réunion des modèles par requête) et variable -> requête ;
+        (None, {}) si aucune requête du lot n'a de candidat.
+    """
+    models = []
+    tid_of_var = {}
+    for request in batch:
+        try:
+            model = build_sdcop_model_for_request(instance, request, user_allocated_obs, user_obs_times, distribution, cache)
+        except Exception as e:
+            print(f"Erreur {request.tid}: {e}")
+            continue
+        if model is None:
+            continue
+        models.append(model)
+        for v in model.variables:
+            tid_of_var[v] = request.tid
+    if not models:
+        return None, tid_of_var
+    model = models[0] if len(models) == 1 else DcopModel.merge(f"sdcop_batch_{batch[0].tid}", models)
+    return model, tid_of_var
+
+@Instrumentation.traced("sdcop.commit")
+def _commit_batch(instance, batch, output, tid_of_var, user_allocated_obs, all_assignments, stats, cache):
+    """
+        Lit la sortie d'un S-DCOP (lot) et enregistre les allocations dans l'ordre des requêtes
+        (le plan M_u de chaque exclusif servi est mis à jour dans cache).
+    """
+    if output is None:
+        stats["timeouts"] += 1
+        return
+    
+    msgs, load = extract_metrics_from_output(output)
+    stats["msgs"] += msgs
+    stats["load"] += load
+    try:
+        result_json = json.loads(output)
+        stats["time"] += result_json.get('time', 0.0)
+    except:
+        pass
+    
+    stats["solved"] += 1
+    
+    assignment = parse_assignment_from_output(output)
+    chosen = {}
+    for var_name, value in assignment.items(): # analyser l'assignement
+        if value == 1 and var_name in tid_of_var:
+            parts = var_name.split('_', 2)
+            if len(parts) == 3:
+                chosen.setdefault(tid_of_var[var_name], []).append((parts[1], parts[2]))
+    for request in batch: # allocations dans l'ordre des requêtes
+        for user_id, obs_id in chosen.get(request.tid, []):
+            obs = instance.obs_by_id.get(obs_id)
+            if obs:
+                all_assignments.append((request.tid, user_id, obs))
+                cache.commit(instance, user_id, user_allocated_obs[user_id], obs)
+                user_allocated_obs[user_id].append(obs)
+
+async def _sdcop_pipeline(instance, batches, user_allocated_obs, user_obs_times, all_assignments, stats, cache,
+                          timeout, algo, backend, distribution, concurrency):
+    """
+        Pipeline asyncio : jusqu'à concurrency lots sont préparés (calcul de pi, YAML) et résolus en même temps,
+        pendant que les résultats sont lus et validés dans l'ordre des requêtes.
+
+        Un lot lancé en avance l'est sur une copie des allocations à cet instant (spéculation). Au moment de le valider,
+        si un exclusif concerné a reçu des allocations entre-temps, son modèle est reconstruit ; il n'est résolu à
+        nouveau que s'il a changé. Le résultat est donc celui de la boucle séquentielle.
+    """
+    async def prepare_and_solve(batch, allocated):
+        model, tid_of_var = await asyncio.to_thread(_build_batch_model, instance, batch, allocated, user_obs_times, distribution, cache)
+        output = None
+        if model is not None:
+            output = await _solve_sdcop_model_async(model, backend, algo, timeout, distribution)
+        return model, tid_of_var, output
+
+    def launch(batch):
+        allocated = {u: list(obs) for u, obs in user_allocated_obs.items()}
+        users = {user_id for request in batch for _, user_id in sdcop_candidates(instance, request)}
+        return batch, allocated, users, asyncio.ensure_future(prepare_and_solve(batch, allocated))
+
+    pending = deque()
+    batches = iter(batches)
+    try:
+        while True:
+            while len(pending) < concurrency:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                pending.append(launch(batch))
+            if not pending:
+                break
+            batch, allocated, users, future = pending.popleft()
+            stats["attempted"] += len(batch)
+            try:
+                model, tid_of_var, output = await future
+                if any(len(user_allocated_obs[u]) != len(allocated[u]) for u in users):
+                    rebuilt, tid_of_var = await asyncio.to_thread(_build_batch_model, instance, batch, user_allocated_obs,
+                                                                  user_obs_times, distribution, cache)
+                    if (rebuilt is None) != (model is None) or (rebuilt is not None and rebuilt.to_dict() != model.to_dict()):
+                        stats["misses"] += 1
+                        model = rebuilt
+                        output = None
+                        if model is not None:
+                            output = await _solve_sdcop_model_async(model, backend, algo, timeout, distribution)
+                if model is None:
+                    continue
+                _commit_batch(instance, batch, output, tid_of_var, user_allocated_obs, all_assignments, stats, cache)
+            except Exception as e:
+                print(f"Erreur {', '.join(r.tid for r in batch)}: {e}")
+    finally:
+        for _, _, _, future in pending:
+            future.cancel()
+
+def _sdcop_setup(instance, backend):
+    """
+        État initial d'une exécution S-DCOP : allocations par exclusif, dates, allocations retenues, cache de pi et
+        statistiques.
+    """
+    if backend not in ("subprocess", "inprocess", "native"):
+        raise ValueError(f"Backend DCOP inconnu : {backend}")
+    user_allocated_obs = {u.uid: [] for u in instance.users if u.uid != "u0"}
+    user_obs_times = {u.uid: {} for u in instance.users if u.uid != "u0"}
+    cache = PiCache() # évaluations de pi propres à cette exécution
+    stats = {"msgs": 0, "load": 0, "time": 0.0, "solved": 0, "timeouts": 0, "attempted": 0, "misses": 0}
+    return user_allocated_obs, user_obs_times, [], cache, stats
+
+@Instrumentation.traced("sdcop_with_pydcop")
+def sdcop_with_pydcop(instance: ESOPInstance, timeout_per_dcop=5000, algo="dpop", backend="subprocess", distribution="owner", batch_size=1, concurrency=1):
     """
     Résout l'instance ESOP avec l'approche SDCOP + PyDCOP.
+    backend="inprocess" : chaque S-DCOP est résolu en mémoire par le DPOP intégré, sans fichier YAML ni sous-processus.
+    backend="native" : même chose avec le solveur exact par flot (AllocationSolver), sans messages échangés.
+    distribution : "owner" (chaque exclusif héberge ses variables, fichier --distribution pour pydcop) ou "aux".
+    batch_size > 1 : les requêtes consécutives indépendantes (cf. sdcop_batches) sont réunies en un seul DCOP, résolu
+    en un appel ; l'affectation est ensuite redécoupée par requête. Les contraintes des S-DCOP d'un lot portent sur
+    des variables disjointes : l'optimum du DCOP réuni est celui de chaque S-DCOP.
+    concurrency > 1 : pipeline asyncio (cf. sdcop_with_pydcop_async), exécuté dans sa propre boucle d'événements ;
+    depuis une boucle déjà en cours (coroutine, Jupyter), appeler directement sdcop_with_pydcop_async.
     """
+    if concurrency > 1:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError: # pas de boucle en cours
+            return asyncio.run(sdcop_with_pydcop_async(instance, timeout_per_dcop, algo, backend, distribution, batch_size, concurrency))
+        raise RuntimeError("sdcop_with_pydcop(concurrency > 1) appelé depuis une boucle asyncio en cours : "
+                           "utiliser await sdcop_with_pydcop_async(...)")
+    user_allocated_obs, user_obs_times, all_assignments, cache, stats = _sdcop_setup(instance, backend)
     central_requests = [r for r in instance.tasks if r.owner == "u0"]
     if not central_requests:
         return greedy_schedule(instance), [], 0.0, 0, 0
-    
-    user_allocated_obs = {u.uid: [] for u in instance.users if u.uid != "u0"}
-    user_obs_times = {u.uid: {} for u in instance.users if u.uid != "u0"}
-    
-    all_assignments = []
-    
-    total_msgs = 0
-    total_load = 0
-    total_time = 0.0
-    nb_dcops = 0
-    nb_timeouts = 0
-    nb_dcops_attempted = 0
-    
-    for request in central_requests:
-        nb_dcops_attempted += 1
-        yaml_path = None
-        
+
+    for batch in sdcop_batches(instance, central_requests, batch_size):
+        stats["attempted"] += len(batch)
+        model, tid_of_var = _build_batch_model(instance, batch, user_allocated_obs, user_obs_times, distribution, cache)
+        if model is None:
+            continue
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-                yaml_path = f.name
-            ok = generate_sdcop_yaml_for_request(instance, request, user_allocated_obs, user_obs_times, yaml_path)
-            
-            if not ok:
-                continue
-            
-            output = run_pydcop_solve(yaml_path, algo=algo, timeout=timeout_per_dcop)
-            
-            if output is None:
-                nb_timeouts += 1
-                continue
-            
-            msgs, load = extract_metrics_from_output(output)
-            total_msgs += msgs
-            total_load += load
-            try:
-                result_json = json.loads(output)
-                total_time += result_json.get('time', 0.0)
-            except:
-                pass
-            
-            nb_dcops += 1
-            
-            assignment = parse_assignment_from_output(output)            
-            for var_name, value in assignment.items(): # analyser l'assignement
-                if value == 1 and var_name.startswith('x_'):
-                    parts = var_name.split('_', 2)
-                    if len(parts) == 3:
-                        user_id = parts[1]
-                        obs_id = parts[2]
-                        
-                        obs = next((o for o in instance.observations if o.oid == obs_id), None)
-                        if obs:
-                            all_assignments.append((request.tid, user_id, obs))
-                            user_allocated_obs[user_id].append(obs)
-        
+            output = _solve_sdcop_model(model, backend, algo, timeout_per_dcop, distribution)
+            _commit_batch(instance, batch, output, tid_of_var, user_allocated_obs, all_assignments, stats, cache)
         except Exception as e:
-            print(f"Erreur {request.tid}: {e}")
-        
-        finally:
-            if yaml_path and os.path.exists(yaml_path):
-                try:
-                    os.unlink(yaml_path)
-                except:
-                    pass
+            print(f"Erreur {', '.join(r.tid for r in batch)}: {e}")
+    return _sdcop_plans(instance, user_allocated_obs, all_assignments, stats, cache, concurrency)
+
+async def sdcop_with_pydcop_async(instance: ESOPInstance, timeout_per_dcop=5000, algo="dpop", backend="subprocess", distribution="owner",
+                                  batch_size=1, concurrency=1):
+    """
+    Version asyncio de sdcop_with_pydcop (mêmes paramètres et résultat), utilisable depuis une boucle en cours :
+    les S-DCOP passent par le pipeline (cf. _sdcop_pipeline), jusqu'à concurrency lots préparés ou résolus en même
+    temps (sous-processus pydcop asyncio, backends en mémoire dans des threads) ; les allocations sont validées dans
+    l'ordre des requêtes, comme dans la boucle séquentielle.
+    """
+    with Instrumentation.span("sdcop_with_pydcop_async"):
+        user_allocated_obs, user_obs_times, all_assignments, cache, stats = _sdcop_setup(instance, backend)
+        central_requests = [r for r in instance.tasks if r.owner == "u0"]
+        if not central_requests:
+            return greedy_schedule(instance), [], 0.0, 0, 0
+
+        batches = sdcop_batches(instance, central_requests, batch_size)
+        await _sdcop_pipeline(instance, batches, user_allocated_obs, user_obs_times, all_assignments, stats, cache,
+                              timeout_per_dcop, algo, backend, distribution, max(1, concurrency))
+        return _sdcop_plans(instance, user_allocated_obs, all_assignments, stats, cache, concurrency)
+
+def _sdcop_plans(instance, user_allocated_obs, all_assignments, stats, cache, concurrency):
+    """
+        Bilan affiché et plans finaux (glouton de chaque exclusif avec ses allocations, puis de u0 sur le reste) :
+        (plans, allocations, temps moyen par DCOP, messages, charge).
+    """
+    total_msgs, total_load, total_time = stats["msgs"], stats["load"], stats["time"]
+    nb_dcops, nb_timeouts, nb_dcops_attempted = stats["solved"], stats["timeouts"], stats["attempted"]
     
     print(f"> SDCOP: {nb_dcops}/{nb_dcops_attempted} DCOPs résolus, {nb_timeouts} timeouts, {len(all_assignments)} allocations")
+    if concurrency > 1:
+        print(f"> SDCOP pipeline: {stats['misses']} spéculations invalidées (concurrency={concurrency})")
+    pi_stats = cache.stats()
+    print(f"> SDCOP pi: {pi_stats['values']['hits']} hits / {pi_stats['values']['misses']} calculs, "
+          f"{pi_stats['invalidations']} invalidées, {pi_stats['states']['misses']} plans M_u construits")
     
     # Construction des plans finaux
     sdcop_plan = {}
@@ -353,14 +567,13 @@ def sdcop_with_pydcop(instance: ESOPInstance, timeout_per_dcop=5000, algo="dpop"
         if user.uid == "u0":
             continue
         
-        user_obs = [o for o in instance.observations if o.owner == user.uid]
-        user_obs += user_allocated_obs[user.uid]
+        user_obs = instance.obs_by_owner.get(user.uid, []) + user_allocated_obs[user.uid]
         
-        user_tasks = [t for t in instance.tasks if t.owner == user.uid]
+        user_tasks = list(instance.tasks_by_owner.get(user.uid, []))
         
         for obs in user_allocated_obs[user.uid]:
             if obs.task_id not in [t.tid for t in user_tasks]:
-                orig_task = next((t for t in instance.tasks if t.tid == obs.task_id), None)
+                orig_task = instance.tasks_by_id.get(obs.task_id)
                 if orig_task:
                     user_tasks.append(orig_task)
         
@@ -379,11 +592,10 @@ def sdcop_with_pydcop(instance: ESOPInstance, timeout_per_dcop=5000, algo="dpop"
             sdcop_plan[user.uid] = {}
     
     allocated_obs_ids = {obs.oid for _, _, obs in all_assignments}
-    u0_obs = [o for o in instance.observations 
-              if o.owner == "u0" and o.oid not in allocated_obs_ids]
+    u0_obs = [o for o in instance.obs_by_owner.get("u0", []) if o.oid not in allocated_obs_ids]
     
-    u0_tasks = [t for t in instance.tasks if t.owner == "u0"]
-    u0_user = next(u for u in instance.users if u.uid == "u0")
+    u0_tasks = instance.tasks_by_owner.get("u0", [])
+    u0_user = instance.users_by_id["u0"]
     
     if u0_obs:
         inst_u0 = ESOPInstance(nb_satellites=instance.nb_satellites,
@@ -400,3 +612,56 @@ def sdcop_with_pydcop(instance: ESOPInstance, timeout_per_dcop=5000, algo="dpop"
     
     avg_time = total_time / nb_dcops if nb_dcops > 0 else 0.0
     return sdcop_plan, all_assignments, avg_time, total_msgs, total_load
+
+def benchmark_distribution(scenario="small_scale", num_instances=3, algo="dpop", timeout_per_dcop=60):
+    """
+        Compare les modes de distribution "aux" et "owner" sur des instances de benchmark :
+        taille des S-DCOP et du DCOP complet générés (agents, octets YAML) et, si pydcop est installé,
+        temps total de sdcop_with_pydcop.
+    """
+    import io
+    import shutil
+    import time
+    import contextlib
+    from InstanceGenerator import generate_benchmark_instances, build_DCOP_model
+
+    has_pydcop = shutil.which("pydcop") is not None
+    instances = generate_benchmark_instances(scenario=scenario, num_instances=num_instances)
+    results = {}
+    for size, insts in instances.items():
+        for mode in ("aux", "owner"):
+            agents, nbytes, solve_time = 0, 0, 0.0
+            dcop_agents, dcop_bytes = 0, 0
+            for inst in insts:
+                model = build_DCOP_model(inst, mode)
+                buf = io.StringIO()
+                model.write_yaml(buf)
+                if mode == "owner":
+                    model.write_distribution(buf, algo)
+                dcop_agents += len(model.agents)
+                dcop_bytes += len(buf.getvalue())
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for request in inst.tasks_by_owner.get("u0", []):
+                        model = build_sdcop_model_for_request(inst, request, {}, {}, mode)
+                        if model is None:
+                            continue
+                        agents += len(model.agents)
+                        buf = io.StringIO()
+                        model.write_yaml(buf)
+                        if mode == "owner":
+                            model.write_distribution(buf, algo)
+                        nbytes += len(buf.getvalue())
+                    if has_pydcop:
+                        t0 = time.perf_counter()
+                        sdcop_with_pydcop(inst, timeout_per_dcop=timeout_per_dcop, algo=algo, distribution=mode)
+                        solve_time += time.perf_counter() - t0
+            n = len(insts)
+            results[(size, mode)] = {"agents": agents / n, "yaml_bytes": nbytes / n,
+                                     "dcop_agents": dcop_agents / n, "dcop_yaml_bytes": dcop_bytes / n,
+                                     "solve_time": solve_time / n if has_pydcop else None}
+            r = results[(size, mode)]
+            solve = f"{r['solve_time']:.2f}s" if has_pydcop else "pydcop absent"
+            print(f"{scenario} {size} tâches [{mode}] : S-DCOP {r['agents']:.0f} agents / {r['yaml_bytes'] / 1024:.1f} Ko, "
+                  f"DCOP {r['dcop_agents']:.0f} agents / {r['dcop_yaml_bytes'] / 1024:.1f} Ko, {solve}")
+    return results
@@ -0,0 +1,95 @@
+from bisect import bisect_left, bisect_right
+import Instrumentation
+
+class Timeline():
+    """
+        Planning d'un satellite indexé par ses créneaux libres.
+
+        Les observations planifiées sont triées par t_start ; entre deux observations consécutives (et avant la première,
+        après la dernière) on garde un créneau libre [lo, hi] : une observation de durée d peut commencer à t si
+        lo <= t et t + d <= hi. La transition tau est déjà intégrée aux bornes des créneaux.
+
+        Les bornes hi sont croissantes, les bornes lo aussi : on localise par bisect le premier créneau assez long
+        côté fin, puis on ne parcourt que les créneaux qui intersectent [a, b].
+    """
+    def __init__(self, t_start, t_end, capacity, transition_time):
+        self.t_start = t_start
+        self.t_end = t_end
+        self.capacity = capacity
+        self.transition_time = transition_time
+        self.items = [] # (Observation, t_start) triés par t_start
+        self._gap_lo = [t_start]
+        self._gap_hi = [t_end]
+
+    @classmethod
+    def for_satellite(cls, sat):
+        return cls(sat.t_start, sat.t_end, sat.capacity, sat.transition_time)
+
+    @classmethod
+    def from_items(cls, sat, items):
+        """
+            Timeline d'un satellite déjà chargé avec items = [(Observation, t_start)] triés par t_start.
+        """
+        tl = cls.for_satellite(sat)
+        tau = tl.transition_time
+        tl.items = list(items)
+        tl._gap_lo = [tl.t_start] + [t + o.duration + tau for o, t in tl.items]
+        tl._gap_hi = [t - tau for _, t in tl.items] + [tl.t_end]
+        return tl
+
+    def __len__(self):
+        return len(self.items)
+
+    def is_full(self):
+        return len(self.items) >= self.capacity
+
+    def find_slot(self, duration, a, b):
+        """
+            Plus petit t >= a tel que [t, t + duration] tienne dans [a, b] et dans un créneau libre.
+            Retourne (indice du créneau, t) ou None.
+        """
+        if self.is_full():
+            return None
+        gap_lo = self._gap_lo
+        gap_hi = self._gap_hi
+        j = j0 = bisect_left(gap_hi, a + duration) # créneaux finissant trop tôt ignorés
+        while j < len(gap_lo) and gap_lo[j] + duration <= b:
+            t0 = max(gap_lo[j], a)
+            if t0 + duration <= min(gap_hi[j], b):
+                if Instrumentation.recorder is not None:
+                    Instrumentation.count("timeline.gaps_scanned", j - j0 + 1)
+                return j, t0
+            j += 1
+        if Instrumentation.recorder is not None:
+            Instrumentation.count("timeline.gaps_scanned", j - j0)
+        return None
+
+    def insert(self, j, obs, t):
+        """
+            Insère obs à t dans le créneau j (retourné par find_slot) et découpe ce créneau en deux.
+        """
+        tau = self.transition_time
+        self.items.insert(j, (obs, t))
+        self._gap_hi.insert(j, t - tau)
+        self._gap_lo.insert(j + 1, t + obs.duration + tau)
+
+    def reserve(self, obs, t):
+        """
+            Insère obs à un t_start imposé (plan déjà fixé), sans vérification de faisabilité.
+        """
+        j = max(0, bisect_right(self._gap_lo, t) - 1)
+        self.insert(j, obs, t)
+
+    def place(self, obs, a=None, b=None):
+        """
+            Place obs au plus tôt dans [a, b] (par défaut sa fenêtre intersectée avec l'horizon du satellite).
+            Retourne t_start ou None si aucun créneau ne convient.
+        """
+        a = max(self.t_start, obs.t_start) if a is None else a
+        b = min(self.t_end, obs.t_end) if b is None else b
+        slot = self.find_slot(obs.duration, a, b)
+        if slot is None:
+            return None
+        j, t = slot
+        self.insert(j, obs, t)
+        return t
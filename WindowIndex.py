@@ -0,0 +1,68 @@
+from bisect import bisect_left, bisect_right
+
+class ExclusiveWindowIndex():
+    """
+        Index des fenêtres d'exclusivité par (utilisateur, satellite) : débuts triés et maximum courant des fins.
+
+        - contains(u, s, a, b) : [a, b] est inclus dans une fenêtre de u sur s (dernière fenêtre commençant avant a,
+          comparaison de b au maximum des fins jusqu'à elle, robuste aux fenêtres qui se chevauchent) ;
+        - overlaps(u, s, a, b) : une fenêtre de u sur s chevauche ]a, b[ (t_start < b et t_end > a).
+        Chaque requête coûte O(log W) ; les variantes users_* parcourent les utilisateurs ayant une fenêtre sur s,
+        dans l'ordre de l'instance.
+    """
+    def __init__(self, users):
+        self._by_key = {}   # (uid, sid) -> (débuts triés, maximum courant des fins, fenêtres triées)
+        self._users_by_sat = {} # sid -> uids (ordre des utilisateurs)
+        for u in users:
+            if u.uid == "u0":
+                continue
+            by_sat = {}
+            for w in u.exclusive_windows:
+                by_sat.setdefault(w.satellite, []).append(w)
+            for sid, windows in by_sat.items():
+                windows.sort(key=lambda w: w.t_start)
+                reach, best = [], None
+                for w in windows:
+                    best = w.t_end if best is None else max(best, w.t_end)
+                    reach.append(best)
+                self._by_key[(u.uid, sid)] = ([w.t_start for w in windows], reach, windows)
+                self._users_by_sat.setdefault(sid, []).append(u.uid)
+
+    @classmethod
+    def from_instance(cls, instance):
+        return cls(instance.users)
+
+    def has_windows(self, uid, sid):
+        return (uid, sid) in self._by_key
+
+    def contains(self, uid, sid, a, b):
+        entry = self._by_key.get((uid, sid))
+        if entry is None:
+            return False
+        starts, reach, _ = entry
+        k = bisect_right(starts, a) - 1
+        return k >= 0 and reach[k] >= b
+
+    def overlaps(self, uid, sid, a, b):
+        entry = self._by_key.get((uid, sid))
+        if entry is None:
+            return False
+        starts, reach, _ = entry
+        k = bisect_left(starts, b) - 1
+        return k >= 0 and reach[k] > a
+
+    def windows_containing(self, uid, sid, a, b):
+        """
+            Fenêtres de uid sur sid qui contiennent [a, b].
+        """
+        entry = self._by_key.get((uid, sid))
+        if entry is None:
+            return []
+        starts, _, windows = entry
+        return [w for w in windows[:bisect_right(starts, a)] if w.t_end >= b]
+
+    def users_containing(self, sid, a, b):
+        return [uid for uid in self._users_by_sat.get(sid, ()) if self.contains(uid, sid, a, b)]
+
+    def users_overlapping(self, sid, a, b):
+        return [uid for uid in self._users_by_sat.get(sid, ()) if self.overlaps(uid, sid, a, b)]
@@ -0,0 +1,144 @@
+from InstanceGenerator import generate_ESOP_instance
+from ESOPInstance import estRealisable
+from AuctionSolver import psi_solve, ssi_solve, regret_auction_solve
+from LRUCache import LRUCache
+
+
+def plan_signature(plans):
+    return {uid: {sid: [(obs.oid, t) for obs, t in obs_list] for sid, obs_list in plan.items()} for uid, plan in plans.items()}
+
+
+def test_auctions_feasible():
+    """
+    Les plans des trois enchères respectent les contraintes de l'instance.
+    """
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=50, scenario="small_scale", seed=3)
+    for solve in (psi_solve, ssi_solve, regret_auction_solve):
+        plans, nb_messages, comm_load = solve(inst)
+        assert estRealisable(inst, plans)
+        assert nb_messages > 0 and comm_load > 0
+
+
+def test_ssi_allocates_central_requests():
+    """
+    Les requêtes de u0 gagnées par un exclusif apparaissent dans son plan et plus dans celui de u0.
+    """
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=50, scenario="small_scale", seed=3)
+    plans, _, _ = ssi_solve(inst)
+    won = [obs for uid, plan in plans.items() if uid != "u0" for obs_list in plan.values() for obs, _ in obs_list if obs.owner == "u0"]
+    assert won
+    u0_tasks = {obs.task_id for obs_list in plans["u0"].values() for obs, _ in obs_list}
+    assert all(obs.task_id not in u0_tasks for obs in won)
+
+
+def test_baseline_plan_cache_shared():
+    """
+    Les plans de référence sont calculés une fois par état utilisateur et partagés entre les enchères,
+    sans changer les résultats.
+    """
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=50, scenario="small_scale", seed=3)
+    cache = LRUCache(maxsize=64)
+
+    plans_psi, _, _ = psi_solve(inst, plan_cache=cache)
+    assert cache.misses == 4 and cache.hits == 0  # un plan initial par exclusif
+    plans_ssi, _, _ = ssi_solve(inst, plan_cache=cache)
+    assert cache.hits == 4
+    plans_regret, _, _ = regret_auction_solve(inst, plan_cache=cache)
+    assert cache.hits == 4 + 3 * 4
+
+    assert plan_signature(plans_ssi) == plan_signature(ssi_solve(inst, plan_cache=LRUCache(maxsize=1))[0])
+    assert plan_signature(plans_regret) == plan_signature(regret_auction_solve(inst, plan_cache=LRUCache(maxsize=1))[0])
+
+
+def test_executors_give_identical_allocations():
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=50, scenario="small_scale", seed=3)
+    for solve in (psi_solve, ssi_solve):
+        serial = solve(inst, plan_cache=LRUCache(), executor="serial")
+        for executor in ("thread", "process"):
+            plans, nb_messages, comm_load = solve(inst, plan_cache=LRUCache(), executor=executor, max_workers=2)
+            assert plan_signature(plans) == plan_signature(serial[0])
+            assert (nb_messages, comm_load) == serial[1:]
+
+def test_message_codecs_round_trip():
+    """
+    Les messages binaires et JSON se décodent à l'identique ; le binaire est plus compact.
+    """
+    from MessageCodec import BinaryCodec, JsonCodec
+
+    inst = generate_ESOP_instance(3, 4, 60, seed=2, scenario="small_scale")
+    plans, _, _ = ssi_solve(inst)
+    u0_tids = [r.tid for r in inst.tasks_by_owner["u0"]]
+    obs = inst.obs_by_owner["u0"][3]
+    for codec in (BinaryCodec(inst), JsonCodec(inst)):
+        assert codec.decode(codec.announce("u2", u0_tids)) == ("announce", "u2", sorted(u0_tids, key=[t.tid for t in inst.tasks].index), None)
+        assert codec.decode(codec.announce("u1", [obs.task_id], 0.35)) == ("announce", "u1", [obs.task_id], 0.35)
+        assert codec.decode(codec.bid(obs.task_id, "u3", 17)) == ("bid", obs.task_id, "u3", 17)
+        assert codec.decode(codec.bid(obs.task_id, "u3", 17.25)) == ("bid", obs.task_id, "u3", 17.25)
+        assert codec.decode(codec.award(obs.task_id, "u1", (obs, obs.t_start + 2))) == ("award", obs.task_id, "u1", (obs, obs.t_start + 2), None)
+        loads = {s.sid: i for i, s in enumerate(inst.satellites)}
+        assert codec.decode(codec.award(obs.task_id, "u1", None, loads)) == ("award", obs.task_id, "u1", None, loads)
+        assert codec.decode(codec.start("u4", 2)) == ("start", "u4", 2)
+        for uid, plan in plans.items():
+            decoded = codec.decode(codec.plan(uid, plan))
+            assert decoded[:2] == ("plan", uid)
+            assert decoded[2] == {sid: sorted(items, key=lambda p: p[1]) for sid, items in plan.items()}
+    binary, text = (ssi_solve(inst, codec=codec(inst))[2] for codec in (BinaryCodec, JsonCodec))
+    assert 0 < binary < text
+
+def test_agent_runtime_matches_solvers():
+    """
+    Les enchères jouées par les agents asyncio donnent les plans des solveurs ; la latence allonge le makespan.
+    """
+    from AgentRuntime import run_auction
+
+    inst = generate_ESOP_instance(3, 4, 40, seed=5, scenario="small_scale")
+    for protocol, solve in (("psi", psi_solve), ("ssi", ssi_solve), ("regret", regret_auction_solve)):
+        plans, metrics = run_auction(inst, protocol)
+        assert plan_signature(plans) == plan_signature(solve(inst)[0])
+        assert metrics["nb_messages"] == sum(m["messages"] for m in metrics["per_agent"].values())
+    _, fast = run_auction(inst, "psi")
+    _, slow = run_auction(inst, "psi", latency=0.01)
+    assert slow["makespan"] > fast["makespan"] + 0.02
+
+def test_agent_processes_match_in_process_runtime():
+    """
+    Avec un processus par exclusif (sous-instance seule, échanges par tube), les plans et les messages sont inchangés.
+    """
+    from AgentRuntime import run_auction
+    from MessageCodec import JsonCodec
+
+    inst = generate_ESOP_instance(3, 4, 40, seed=6, scenario="small_scale")
+    for protocol in ("ssi", "regret"):
+        plans, metrics = run_auction(inst, protocol)
+        for codec in (None, JsonCodec(inst)):
+            remote, remote_metrics = run_auction(inst, protocol, processes=True, codec=codec)
+            assert plan_signature(remote) == plan_signature(plans)
+        assert remote_metrics["nb_messages"] == metrics["nb_messages"]
+        agents = [remote_metrics["per_agent"][u.uid] for u in inst.users if u.uid != "u0"]
+        assert all(a["handled"] > 0 and 0 < a["init_time"] < remote_metrics["startup_time"] for a in agents)
+
+def test_default_baseline_cache_released_with_instance():
+    import gc
+    import weakref
+
+    inst = generate_ESOP_instance(3, 4, 40, seed=4, scenario="small_scale")
+    ssi_solve(inst)
+    assert len(inst.baseline_cache) > 0
+    ref = weakref.ref(inst)
+    del inst
+    gc.collect()
+    assert ref() is None
+
+def test_regret_without_rounds_returns_initial_plans():
+    from AgentRuntime import run_auction
+    from GreedySolver import greedy_schedule_P_u
+
+    inst = generate_ESOP_instance(3, 4, 40, seed=5, scenario="small_scale")
+    initial = {u.uid: greedy_schedule_P_u(inst, u.uid) for u in inst.users if u.uid != "u0"}
+    assert plan_signature(regret_auction_solve(inst, n_rounds=0)[0]) == plan_signature(initial)
+    assert plan_signature(run_auction(inst, "regret", n_rounds=0)[0]) == plan_signature(initial)
+
+    from AuctionSolver import bid, regret_bid
+    r = inst.tasks_by_owner["u0"][0]
+    value, schedule = bid("u1", inst, r)
+    assert regret_bid("u1", inst, r, {}, {"u1": 2.0}, alpha=0.5) == (value + 1.0, schedule)
@@ -0,0 +1,30 @@
+from Benchmark import run_benchmark, load_results, summarize
+
+
+def test_benchmark_records(tmp_path):
+    """
+    Une mesure par (taille, instance, solveur), relue telle qu'écrite ; les plans datés sont vérifiés.
+    """
+    output = str(tmp_path / "results.jsonl")
+    records = run_benchmark(scenarios=("small_scale",), solvers=("greedy", "dcop", "sdcop"), num_instances=1,
+                            output=output, measure_memory=False)
+    assert len(records) == 6 * 3
+    assert load_results(output) == records
+    for r in records:
+        assert r["status"] == "ok" and r["score"] > 0 and r["wall_time"] >= 0
+        assert (r["feasible"] is None) == (r["solver"] == "dcop")
+        assert (r["msgs"] is None) == (r["solver"] == "greedy")
+    assert all(r["feasible"] for r in records if r["solver"] == "greedy")
+    summary = summarize(records)
+    assert summary[("small_scale", 25, "greedy")]["ok"] == 1
+
+
+def test_auction_measures_start_from_cold_cache():
+    from Benchmark import run_solver
+    from InstanceGenerator import generate_ESOP_instance
+
+    inst = generate_ESOP_instance(3, 4, 40, seed=1, scenario="small_scale")
+    first = run_solver("ssi", inst, {"latency": 0.0})
+    second = run_solver("ssi", inst, {"latency": 0.0})
+    assert len(inst.baseline_cache) == 0
+    assert first["score"] == second["score"] and second["peak_memory"] > 0
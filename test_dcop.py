@@ -176,6 +176,128 @@ def test_yaml_validity():
         print(f"Erreur YAML: {str(e)}")
         return False
 
+def test_inprocess_dpop_is_exact():
+    """
+    Le DPOP intégré (backend "inprocess") trouve le coût optimal, vérifié par énumération.
+    """
+    from itertools import product
+    from DpopSolver import DpopSolver, solve_dcop_dict
+
+    solved = 0
+    for seed in range(20):
+        inst = generate_ESOP_instance(nb_satellites=2, nb_users=2, nb_tasks=4, horizon=100, seed=seed)
+        dcop = yaml.safe_load(generate_DCOP_instance(inst))
+        var_names = list(dcop['variables'])
+        if not var_names or len(var_names) > 12:
+            continue
+        result = solve_dcop_dict(dcop)
+        constraints = [c for c in DpopSolver(dcop).constraints if c.scope]
+        best = min(sum(c.cost(dict(zip(var_names, values))) for c in constraints)
+                   for values in product([0, 1], repeat=len(var_names)))
+        assert result['cost'] == best and result['violation'] == 0
+        solved += 1
+    assert solved > 0
+
+def test_native_solver_matches_dpop():
+    """
+    Le solveur par flot (backend "native") atteint le même coût optimal que DPOP.
+    """
+    from DpopSolver import solve_dcop_dict
+    from AllocationSolver import solve_dcop_dict_native
+    from InstanceGenerator import build_DCOP_dict
+
+    compared = 0
+    for seed in range(20):
+        inst = generate_ESOP_instance(nb_satellites=2, nb_users=3, nb_tasks=6, horizon=100, capacity=2, seed=seed)
+        dcop = build_DCOP_dict(inst)
+        if not dcop['variables'] or len(dcop['variables']) > 14:
+            continue
+        native = solve_dcop_dict_native(dcop)
+        assert native['violation'] == 0
+        assert native['cost'] == solve_dcop_dict(dcop)['cost']
+        compared += 1
+    assert compared > 0
+
+def test_model_yaml_matches_dict():
+    """
+    Le YAML écrit en flux par DcopModel se relit comme le dict du modèle.
+    """
+    from InstanceGenerator import build_DCOP_model
+    from AllocationSolver import solve_dcop_model_native, solve_dcop_dict_native
+
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=40, scenario="small_scale", seed=11)
+    model = build_DCOP_model(inst)
+    assert yaml.safe_load(model.to_yaml()) == model.to_dict()
+    assert model.stats()['variables'] == len(model.to_dict()['variables'])
+    assert solve_dcop_model_native(model)['cost'] == solve_dcop_dict_native(model.to_dict())['cost']
+
+def test_owner_distribution_has_no_aux_agents():
+    """
+    En mode "owner", seuls les exclusifs sont agents et chacun héberge ses propres variables.
+    """
+    from InstanceGenerator import build_DCOP_model
+
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=40, scenario="small_scale", seed=12)
+    model = build_DCOP_model(inst)
+    assert set(model.agents) == {u.uid for u in inst.users if u.uid != "u0"}
+
+    dist = model.distribution()
+    assert sorted(c for comps in dist.values() for c in comps) == sorted(model.variables)
+    assert all(v.split("_")[1] == agent for agent, comps in dist.items() for v in comps)
+    factor = model.distribution("maxsum")
+    assert sum(len(c) for c in factor.values()) == model.nb_variables + model.nb_constraints
+    assert len(build_DCOP_model(inst, "aux").agents) == model.nb_variables + model.nb_constraints
+
+def test_sdcop_batches_keep_allocations():
+    """
+    Réunir les requêtes indépendantes en lots ne change pas les allocations du S-DCOP.
+    """
+    from SDcop import sdcop_with_pydcop, sdcop_batches, sdcop_candidates
+
+    inst = generate_ESOP_instance(nb_satellites=8, nb_users=5, nb_tasks=200, scenario="large_scale", seed=0)
+    requests = inst.tasks_by_owner["u0"]
+    for batch in sdcop_batches(inst, requests, 4):
+        assert len(batch) <= 4
+        pairs = [{(u, o.satellite) for o, u in sdcop_candidates(inst, r)} for r in batch]
+        assert sum(len(p) for p in pairs) == len(set().union(*pairs))
+
+    runs = [sdcop_with_pydcop(inst, backend="native", batch_size=bs)[1] for bs in (1, 8)]
+    assert [(t, u, o.oid) for t, u, o in runs[0]] == [(t, u, o.oid) for t, u, o in runs[1]]
+
+def test_sdcop_pipeline_keeps_allocations():
+    """
+    Le pipeline asyncio (requêtes préparées et résolues en avance) valide les allocations dans l'ordre des requêtes.
+    """
+    from SDcop import sdcop_with_pydcop
+
+    inst = generate_ESOP_instance(nb_satellites=8, nb_users=5, nb_tasks=200, scenario="large_scale", seed=3)
+    for backend in ("native", "inprocess"):
+        runs = [sdcop_with_pydcop(inst, backend=backend, concurrency=c)[1] for c in (1, 4)]
+        assert runs[0]
+        assert [(t, u, o.oid) for t, u, o in runs[0]] == [(t, u, o.oid) for t, u, o in runs[1]]
+
+def test_sdcop_async_from_running_loop():
+    """
+    Depuis une boucle en cours : la version asyncio donne les allocations séquentielles, l'entrée synchrone refuse.
+    """
+    import asyncio
+    from SDcop import sdcop_with_pydcop, sdcop_with_pydcop_async
+
+    inst = generate_ESOP_instance(nb_satellites=4, nb_users=3, nb_tasks=60, scenario="large_scale", seed=2)
+    expected = [(t, u, o.oid) for t, u, o in sdcop_with_pydcop(inst, backend="native")[1]]
+
+    async def main():
+        result = await sdcop_with_pydcop_async(inst, backend="native", concurrency=2)
+        try:
+            sdcop_with_pydcop(inst, backend="native", concurrency=2)
+        except RuntimeError as e:
+            return result, str(e)
+        return result, None
+
+    result, error = asyncio.run(main())
+    assert [(t, u, o.oid) for t, u, o in result[1]] == expected
+    assert error is not None and "sdcop_with_pydcop_async" in error
+
 def show_dcop_sample():
     inst = generate_ESOP_instance(nb_satellites=2, nb_users=2, nb_tasks=2, seed=999)
     
@@ -224,4 +346,42 @@ if __name__ == "__main__":
     if yaml_ok and struct_ok and expr_ok:
         print("\n Tous les tests sont réussis.")
     else:
-        print("\n Certains tests ont échoué : DCOP invalide.")
\ No newline at end of file
+        print("\n Certains tests ont échoué : DCOP invalide.")
+def test_pi_cache_incremental_commit():
+    """
+    pi est évalué sur le plan courant M_u ; après une allocation, l'état obtenu par insertion est celui d'un glouton
+    recalculé, et les valeurs de l'ancienne allocation sont invalidées.
+    """
+    from SDcop import PiCache, sdcop_candidates
+    from GreedySolver import UserGreedyState
+
+    inst = generate_ESOP_instance(nb_satellites=8, nb_users=5, nb_tasks=200, scenario="large_scale", seed=0)
+    cache = PiCache(maxsize=64)
+    allocated = {}
+    for request in inst.tasks_by_owner["u0"]:
+        for obs, uid in sdcop_candidates(inst, request):
+            pi = cache.pi(inst, uid, obs, allocated.get(uid, []))
+            assert pi == cache.pi(inst, uid, obs, allocated.get(uid, []))
+            if pi is not None:
+                cache.commit(inst, uid, allocated.get(uid, []), obs)
+                allocated.setdefault(uid, []).append(obs)
+                break
+    assert allocated
+    for uid, obs_list in allocated.items():
+        assert cache.state(inst, uid, obs_list).plan == UserGreedyState(inst, uid, obs_list).plan
+    stats = cache.stats()
+    assert stats["values"]["size"] <= 64 and stats["values"]["hits"] > 0 and stats["invalidations"] > 0
+
+def test_default_pi_cache_released_with_instance():
+    import gc
+    import weakref
+    from SDcop import compute_pi, instance_pi_cache, sdcop_candidates
+
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=40, scenario="small_scale", seed=4)
+    obs, uid = next(c for r in inst.tasks_by_owner["u0"] for c in sdcop_candidates(inst, r))
+    compute_pi(inst, uid, obs, [])
+    assert instance_pi_cache(inst).stats()["values"]["size"] == 1
+    ref = weakref.ref(inst)
+    del inst, obs
+    gc.collect()
+    assert ref() is None
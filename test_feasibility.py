@@ -0,0 +1,47 @@
+from InstanceGenerator import generate_ESOP_instance
+from GreedySolver import greedy_schedule
+from FeasibilityChecker import check_plans
+
+
+def test_greedy_plans_are_feasible():
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=100, scenario="small_scale", seed=7)
+    report = check_plans(inst, greedy_schedule(inst))
+    assert report.ok and report.nb_scheduled > 0
+
+
+def test_violations_are_reported_by_kind():
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=100, scenario="small_scale", seed=7)
+    plans = greedy_schedule(inst)
+    sid, obs_list = next((sid, l) for sid, l in plans["u0"].items() if l)
+    o, t = obs_list[0]
+
+    plans["u0"][sid].append((o, t))                       # observation et tâche dupliquées, transition violée
+    plans["u0"].setdefault("s_x", []).append((o, t))       # satellite inconnu
+    scheduled = {x.task_id for plan in plans.values() for l in plan.values() for x, _ in l}
+    excl = next(x for x in inst.observations if x.task_id not in scheduled)
+    plans.setdefault("u1", {}).setdefault(excl.satellite, []).append((excl, excl.t_end))  # hors fenêtre
+
+    kinds = check_plans(inst, plans).by_kind()
+    assert kinds["duplicate_observation"] == 2 and kinds["duplicate_task"] == 2
+    assert kinds["transition"] >= 1 and kinds["unknown_satellite"] == 1
+    assert kinds["window"] == 1 and kinds["exclusivity"] == 1
+
+
+def test_unknown_user_without_observations_reported():
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=20, scenario="small_scale", seed=7)
+    report = check_plans(inst, {"u_x": {}})
+    assert not report.ok and report.by_kind() == {"unknown_user": 1}
+
+
+def test_fractional_start_not_truncated():
+    from ESOPInstance import ESOPInstance, Satellite, User, Observation, Task
+
+    obs = Observation(oid="o1", task_id="r1", satellite="s1", t_start=10, t_end=15, duration=5, reward=1, owner="u0")
+    task = Task(tid="r1", owner="u0", t_start=10, t_end=15, duration=5, reward=1, opportunities=[obs])
+    inst = ESOPInstance(nb_satellites=1, nb_users=0, nb_tasks=1, horizon=100, satellites=[Satellite("s1", 0, 100, 5, 1)],
+                        users=[User("u0", [])], tasks=[task], observations=[obs])
+    assert check_plans(inst, {"u0": {"s1": [(obs, 10)]}}).ok
+    late = check_plans(inst, {"u0": {"s1": [(obs, 10.5)]}})
+    assert late.by_kind() == {"window": 1}
+    early = check_plans(inst, {"u0": {"s1": [(obs, 9.5)]}})
+    assert early.by_kind() == {"window": 1} and "[9.5,14.5]" in early.messages()[0]
@@ -0,0 +1,94 @@
+from ESOPInstance import Observation, Satellite
+from Timeline import Timeline
+from InstanceGenerator import generate_ESOP_instance
+from GreedySolver import greedy_schedule, greedy_schedule_P_u, UserGreedyState
+
+
+def test_timeline_first_fit():
+    """
+    Vérifie que Timeline place au plus tôt en respectant la transition tau.
+    """
+    sat = Satellite(sid="s0", t_start=0, t_end=100, capacity=10, transition_time=1)
+    tl = Timeline.for_satellite(sat)
+
+    o1 = Observation("o1", "r1", "s0", 10, 30, 5, 10, "u1")
+    o2 = Observation("o2", "r2", "s0", 0, 30, 5, 10, "u1")
+    o3 = Observation("o3", "r3", "s0", 0, 30, 5, 10, "u1")
+    o4 = Observation("o4", "r4", "s0", 11, 16, 5, 10, "u1")
+
+    assert tl.place(o1) == 10
+    assert tl.place(o2) == 0   # avant o1 : 0 + 5 + 1 <= 10
+    assert tl.place(o3) == 16  # après o1 : 10 + 5 + 1
+    assert tl.place(o4) is None  # fenêtre entièrement couverte par o1 (+ tau)
+    assert [o.oid for o, _ in tl.items] == ["o2", "o1", "o3"]
+
+
+def test_timeline_capacity():
+    sat = Satellite(sid="s0", t_start=0, t_end=100, capacity=1, transition_time=1)
+    tl = Timeline.for_satellite(sat)
+    assert tl.place(Observation("o1", "r1", "s0", 0, 50, 5, 1, "u0")) == 0
+    assert tl.is_full()
+    assert tl.place(Observation("o2", "r2", "s0", 50, 60, 5, 1, "u0")) is None
+
+
+def test_greedy_plans_sorted_and_disjoint():
+    """
+    Les plans gloutons sont triés par t_start et respectent tau sur chaque satellite.
+    """
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=100, scenario="small_scale", seed=3)
+    plans = greedy_schedule(inst)
+    tau = {s.sid: s.transition_time for s in inst.satellites}
+
+    by_sat = {}
+    for plan in plans.values():
+        for sid, obs_list in plan.items():
+            assert [t for _, t in obs_list] == sorted(t for _, t in obs_list)
+            by_sat.setdefault(sid, []).extend(obs_list)
+
+    for sid, obs_list in by_sat.items():
+        obs_list.sort(key=lambda p: p[1])
+        for (o1, t1), (o2, t2) in zip(obs_list, obs_list[1:]):
+            assert t1 + o1.duration + tau[sid] <= t2
+
+
+def test_user_state_matches_greedy_P_u():
+    inst = generate_ESOP_instance(nb_satellites=8, nb_users=5, nb_tasks=200, scenario="large_scale", seed=4)
+    for u in inst.users:
+        state = UserGreedyState(inst, u.uid)
+        assert state.plan == greedy_schedule_P_u(inst, u.uid)
+
+
+def test_marginal_gain_matches_full_replan():
+    """
+    L'insertion incrémentale (rejeu du suffixe) donne le même gain et le même plan qu'un glouton refait de zéro.
+    """
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=100, scenario="small_scale", seed=5)
+    for u in inst.users[1:]:
+        state = UserGreedyState(inst, u.uid)
+        for r in inst.tasks_by_owner["u0"]:
+            obs_r = inst.obs_by_task[r.tid]
+            gain, placements = state.marginal_gain(obs_r)
+            full = UserGreedyState(inst, u.uid, accepted_obs=state.accepted_obs + [o for o, _ in placements])
+            assert gain == full.reward - state.reward
+            if placements:
+                state.insert([placements[0][0]])
+                assert state.plan == full.plan
+
+def test_slot_before_first_observation_respects_window_end():
+    """
+    Avant la première observation planifiée, le créneau est aussi borné par la fin de fenêtre de l'observation
+    (l'ancien parcours de greedy_schedule plaçait ici o2 à t=10, donc jusqu'à 15 > t_end=12).
+    """
+    from ESOPInstance import ESOPInstance, User, Task
+    from FeasibilityChecker import check_plans
+
+    o1 = Observation(oid="o1", task_id="r1", satellite="s0", t_start=50, t_end=60, duration=5, reward=10, owner="u0")
+    o2 = Observation(oid="o2", task_id="r2", satellite="s0", t_start=10, t_end=12, duration=5, reward=1, owner="u0")
+    tasks = [Task(tid=o.task_id, owner="u0", t_start=o.t_start, t_end=o.t_end, duration=o.duration, reward=o.reward,
+                  opportunities=[o]) for o in (o1, o2)]
+    inst = ESOPInstance(nb_satellites=1, nb_users=0, nb_tasks=2, horizon=100,
+                        satellites=[Satellite(sid="s0", t_start=0, t_end=100, capacity=10, transition_time=1)],
+                        users=[User("u0", [])], tasks=tasks, observations=[o1, o2])
+    plans = greedy_schedule(inst)
+    assert [(o.oid, t) for o, t in plans["u0"]["s0"]] == [("o1", 50)]
+    assert check_plans(inst, plans).ok
@@ -0,0 +1,182 @@
+import random
+import io
+import os
+from ESOPInstance import ESOPInstance, Observation, User, ExclusiveWindow
+from WindowIndex import ExclusiveWindowIndex
+from InstanceGenerator import generate_ESOP_instance
+from GreedySolver import greedy_schedule
+
+
+def test_indexes_match_linear_scans():
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=50, scenario="small_scale", seed=1)
+
+    for u in inst.users:
+        assert inst.users_by_id[u.uid] is u
+        assert inst.obs_by_owner.get(u.uid, []) == [o for o in inst.observations if o.owner == u.uid]
+        assert inst.tasks_by_owner.get(u.uid, []) == [t for t in inst.tasks if t.owner == u.uid]
+    for t in inst.tasks:
+        assert inst.obs_by_task.get(t.tid, []) == [o for o in inst.observations if o.task_id == t.tid]
+    for s in inst.satellites:
+        assert inst.obs_by_satellite.get(s.sid, []) == [o for o in inst.observations if o.satellite == s.sid]
+    assert all(inst.obs_by_id[o.oid] is o for o in inst.observations)
+
+
+def test_indexes_invalidated_on_mutation():
+    inst = generate_ESOP_instance(nb_satellites=2, nb_users=2, nb_tasks=5, seed=2)
+    first = inst.observations[0]
+    assert first.oid in inst.obs_by_id
+
+    # réaffectation : invalidation automatique
+    inst.observations = inst.observations[1:]
+    assert first.oid not in inst.obs_by_id
+
+    # modification en place : invalidation explicite
+    extra = Observation("o_extra", "r_extra", "s0", 0, 10, 3, 1, "u0")
+    inst.observations.append(extra)
+    inst.invalidate_indexes()
+    assert inst.obs_by_id["o_extra"] is extra
+    assert inst.obs_by_task["r_extra"] == [extra]
+
+
+def test_without_tasks_shares_objects():
+    inst = generate_ESOP_instance(nb_satellites=2, nb_users=2, nb_tasks=10, seed=3)
+    removed = {inst.tasks[0].tid, inst.tasks[1].tid}
+    view = inst.without_tasks(removed)
+
+    assert view.nb_tasks == len(inst.tasks) - 2
+    assert all(o.task_id not in removed for o in view.observations)
+    assert view.satellites is inst.satellites and view.users is inst.users
+    assert all(inst.obs_by_id[o.oid] is o for o in view.observations)
+    assert len(inst.tasks) == 10  # instance d'origine intacte
+
+
+def test_compact_instance_matches_objects():
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=100, scenario="small_scale", seed=6)
+    store = inst.columns
+    assert len(store) == len(inst.observations)
+
+    idx = store.select(satellite="s1", owner="u0", t_min=100)
+    expected = [o.oid for o in inst.observations if o.satellite == "s1" and o.owner == "u0" and o.t_start >= 100]
+    assert [store.oids[i] for i in idx] == expected
+
+    compact = inst.compact()
+    fields = ("oid", "task_id", "satellite", "t_start", "t_end", "duration", "reward", "owner")
+    for o, v in zip(inst.observations, compact.observations):
+        assert all(getattr(o, f) == getattr(v, f) for f in fields)
+    plan = lambda plans: {u: {s: [(o.oid, t) for o, t in l] for s, l in p.items()} for u, p in plans.items()}
+    assert plan(greedy_schedule(compact)) == plan(greedy_schedule(inst))
+
+def test_exclusive_index_matches_linear_scans():
+    rng = random.Random(0)
+    users = [User("u0", [])]
+    for k in range(1, 5):
+        windows = []
+        for _ in range(rng.randint(0, 12)): # fenêtres qui peuvent se chevaucher
+            a = rng.randint(0, 900)
+            windows.append(ExclusiveWindow(satellite=f"s{rng.randint(0, 2)}", t_start=a, t_end=a + rng.randint(1, 200)))
+        users.append(User(f"u{k}", windows))
+    index = ExclusiveWindowIndex(users)
+
+    for _ in range(2000):
+        sid = f"s{rng.randint(0, 2)}"
+        a = rng.randint(0, 1000)
+        b = a + rng.randint(0, 150)
+        contains = [u.uid for u in users[1:] if any(w.satellite == sid and a >= w.t_start and b <= w.t_end for w in u.exclusive_windows)]
+        overlaps = [u.uid for u in users[1:] if any(w.satellite == sid and not (w.t_end <= a or w.t_start >= b) for w in u.exclusive_windows)]
+        assert index.users_containing(sid, a, b) == contains
+        assert index.users_overlapping(sid, a, b) == overlaps
+        for u in users[1:]:
+            assert sorted(map(id, index.windows_containing(u.uid, sid, a, b))) == \
+                sorted(id(w) for w in u.exclusive_windows if w.satellite == sid and a >= w.t_start and b <= w.t_end)
+
+def test_binary_and_text_round_trip(tmp_path):
+    inst = generate_ESOP_instance(nb_satellites=3, nb_users=4, nb_tasks=200, scenario="large_scale", seed=2)
+    path = str(tmp_path / "inst.esop")
+    inst.to_binary(path)
+    loaded = ESOPInstance.from_binary(path)
+    parsed = ESOPInstance.from_text(io.StringIO(inst.to_text()), horizon=inst.horizon)
+
+    for other in (loaded, parsed):
+        assert other.to_text() == inst.to_text() and other.horizon == inst.horizon
+        assert [[o.oid for o in t.opportunities] for t in other.tasks] == [[o.oid for o in t.opportunities] for t in inst.tasks]
+        plans = greedy_schedule(other)
+        assert {u: {s: [(o.oid, t) for o, t in l] for s, l in p.items()} for u, p in plans.items()} == \
+               {u: {s: [(o.oid, t) for o, t in l] for s, l in p.items()} for u, p in greedy_schedule(inst).items()}
+    # colonnes projetées depuis le fichier, sans copie
+    assert not loaded.columns.t_start.flags.owndata
+
+def test_corpus_cache_matches_generation(tmp_path):
+    from InstanceGenerator import iter_benchmark_instances, corpus_path, benchmark_grid
+
+    cache_dir = str(tmp_path / "corpus")
+    fresh = [(n, seed, inst.to_text()) for n, seed, inst in iter_benchmark_instances("large_scale", num_instances=2)]
+    cold = [(n, seed, inst.to_text()) for n, seed, inst in iter_benchmark_instances("large_scale", num_instances=2, cache_dir=cache_dir)]
+    grid = benchmark_grid("large_scale")
+    path = corpus_path(cache_dir, "large_scale", grid["nb_satellites"], grid["nb_users"], grid["nb_tasks"][0], 0)
+    mtime = os.path.getmtime(path)
+    warm = [(n, seed, inst.to_text()) for n, seed, inst in iter_benchmark_instances("large_scale", num_instances=2, cache_dir=cache_dir)]
+    assert fresh == cold == warm
+    assert os.path.getmtime(path) == mtime # relue, pas régénérée
+
+def test_truncated_cache_file_regenerated(tmp_path):
+    """
+    Un fichier de cache tronqué est refusé par le chargeur puis régénéré ; lu ou généré, même représentation.
+    """
+    from InstanceGenerator import cached_ESOP_instance, corpus_path
+
+    cache_dir = str(tmp_path / "corpus")
+    generated = cached_ESOP_instance(cache_dir, "small_scale", 3, 4, 40, 0)
+    path = corpus_path(cache_dir, "small_scale", 3, 4, 40, 0)
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size // 2)
+    try:
+        ESOPInstance.from_binary(path)
+        assert False, "fichier tronqué accepté"
+    except ValueError:
+        pass
+    regenerated = cached_ESOP_instance(cache_dir, "small_scale", 3, 4, 40, 0)
+    assert os.path.getsize(path) == size
+    cached = cached_ESOP_instance(cache_dir, "small_scale", 3, 4, 40, 0)
+    assert regenerated.to_text() == cached.to_text() == generated.to_text()
+    assert type(cached.observations[0]) is type(generated.observations[0]) is Observation
+    signature = lambda plans: {uid: {sid: [(o.oid, t) for o, t in obs_list] for sid, obs_list in plan.items()} for uid, plan in plans.items()}
+    assert signature(greedy_schedule(cached)) == signature(greedy_schedule(generated))
+
+def test_numpy_generator_valid_instance():
+    from InstanceGenerator import generate_ESOP_instance_numpy
+
+    inst = generate_ESOP_instance_numpy(6, 4, 400, seed=5)
+    assert inst.to_text() == generate_ESOP_instance_numpy(6, 4, 400, seed=5).to_text()
+    for u in inst.users:
+        for a in u.exclusive_windows:
+            for b in u.exclusive_windows + [w for v in inst.users if v is not u for w in v.exclusive_windows]:
+                assert a is b or a.satellite != b.satellite or a.t_end <= b.t_start or b.t_end <= a.t_start
+    windows = inst.exclusive_index
+    for t in inst.tasks:
+        for o in t.opportunities:
+            assert (o.task_id, o.owner, o.duration, o.reward) == (t.tid, t.owner, t.duration, t.reward)
+            assert t.t_start <= o.t_start < o.t_end <= t.t_end
+            assert o.owner == "u0" or windows.contains(o.owner, o.satellite, o.t_start, o.t_end)
+    compact = generate_ESOP_instance_numpy(6, 4, 400, seed=5, compact=True)
+    assert compact.to_text() == inst.to_text()
+
+def test_benchmark_generation_independent_of_workers():
+    from InstanceGenerator import iter_benchmark_instances, instance_seed
+
+    serial = [(n, seed, inst.to_text()) for n, seed, inst in iter_benchmark_instances("large_scale", num_instances=2)]
+    parallel = [(n, seed, inst.to_text()) for n, seed, inst in iter_benchmark_instances("large_scale", num_instances=2, workers=2)]
+    assert serial == parallel
+    state = random.getstate()
+    iter_benchmark_instances("large_scale", num_instances=1).__next__()
+    assert random.getstate() == state # pas d'état global
+    assert len({instance_seed(n, i) for n in (100, 200) for i in range(3)}) == 6
+
+def test_generator_without_seed_uses_global_random():
+    random.seed(42)
+    first = generate_ESOP_instance(3, 4, 30, scenario="small_scale").to_text()
+    random.seed(42)
+    assert generate_ESOP_instance(3, 4, 30, scenario="small_scale").to_text() == first
+    state = random.getstate()
+    generate_ESOP_instance(3, 4, 30, scenario="small_scale", seed=1)
+    assert random.getstate() == state
@@ -0,0 +1,24 @@
+import json
+import Instrumentation
+from InstanceGenerator import generate_ESOP_instance
+from AuctionSolver import ssi_solve
+
+
+def test_tracing_records_spans_and_counters(tmp_path):
+    """
+    Spans et compteurs enregistrés seulement dans le bloc tracing, exportés au format Chrome trace.
+    """
+    inst = generate_ESOP_instance(3, 4, 40, seed=1, scenario="small_scale")
+    path = str(tmp_path / "ssi.trace.json")
+    plans = ssi_solve(inst)
+    with Instrumentation.tracing(path) as rec:
+        assert ssi_solve(inst) == plans
+    assert Instrumentation.recorder is None
+    summary = rec.summary()
+    assert summary["spans"]["ssi_solve"]["calls"] == 1
+    assert summary["spans"]["auction.collect"]["calls"] == len(inst.tasks_by_owner["u0"])
+    assert summary["counters"]["auction.bids"] == len(inst.tasks_by_owner["u0"]) * 4
+    assert summary["counters"]["timeline.gaps_scanned"] > 0
+    events = json.load(open(path))["traceEvents"]
+    assert {e["ph"] for e in events} == {"X", "C"}
+    assert sum(1 for e in events if e["name"] == "ssi_solve") == 1